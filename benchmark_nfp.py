@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+NFP Benchmark
+
+Compares the orbital NFP (used with explore_concave) against the Minkowski
+path on concave part pairs: runtime, vertex count, and how much area they
+disagree on.  The orbital NFP also reports the interlocking pockets it finds,
+which the Minkowski path drops.
+
+Run with: python benchmark_nfp.py [--pairs 20] [--seed 0]
+"""
+
+import argparse
+import math
+import random
+import time
+from nester.nfp_calculator import NFPCalculator
+from nester.polygon import Polygon
+
+
+def create_star(points, outer, inner, rng):
+    """Create a star with jittered radii"""
+    coords = []
+    for i in range(2 * points):
+        radius = (outer if i % 2 == 0 else inner) * rng.uniform(0.8, 1.2)
+        angle = math.pi * i / points
+        coords.append((radius * math.cos(angle), radius * math.sin(angle)))
+    return Polygon(coords)
+
+
+def create_comb(teeth, tooth_width, tooth_height, rng):
+    """Create a comb: a bar with rectangular teeth of random heights"""
+    coords = [(0, 0), (teeth * 2 * tooth_width, 0)]
+    for i in reversed(range(teeth)):
+        x = i * 2 * tooth_width
+        height = tooth_height * rng.uniform(0.5, 1.0)
+        coords += [(x + 2 * tooth_width, 1), (x + tooth_width, 1), (x + tooth_width, 1 + height), (x, 1 + height)]
+    return Polygon(coords[:-1] + [(0, coords[-1][1])])
+
+
+def create_frame(size, wall, mouth):
+    """Create a square frame with a narrow mouth in the top wall"""
+    half = size / 2
+    return Polygon([(0, 0), (size, 0), (size, size), (half + mouth / 2, size), (half + mouth / 2, size - wall),
+                    (size - wall, size - wall), (size - wall, wall), (wall, wall), (wall, size - wall),
+                    (half - mouth / 2, size - wall), (half - mouth / 2, size), (0, size)])
+
+
+def create_pairs(count, seed):
+    """Create concave part pairs of a few families"""
+    rng = random.Random(seed)
+    pairs = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            pairs.append(('star/star', create_star(rng.randint(4, 8), 10, 4, rng), create_star(rng.randint(3, 6), 5, 2, rng)))
+        elif kind == 1:
+            pairs.append(('comb/comb', create_comb(rng.randint(3, 6), 1, 4, rng), create_comb(rng.randint(2, 4), 1, 3, rng)))
+        else:
+            pairs.append(('frame/star', create_frame(12, 2, 1), create_star(rng.randint(3, 5), 3, 1.5, rng)))
+    return pairs
+
+
+def measure(method, polygon_a, polygon_b):
+    """Run an NFP method, returning the NFP and its runtime in milliseconds"""
+    start = time.perf_counter()
+    nfp = method(polygon_a, polygon_b)
+    return nfp, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the orbital NFP against the Minkowski path')
+    parser.add_argument('--pairs', type=int, default=18, help='Number of part pairs')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the shapes')
+    args = parser.parse_args()
+
+    header = f"{'pair':<12}{'vertices':>10}{'minkowski ms':>14}{'orbital ms':>12}{'mink. verts':>13}{'orb. verts':>12}{'holes':>7}{'area diff':>11}"
+    print(header)
+    print('-' * len(header))
+
+    totals = {'minkowski': 0.0, 'orbital': 0.0}
+    for name, polygon_a, polygon_b in create_pairs(args.pairs, args.seed):
+        minkowski, minkowski_ms = measure(NFPCalculator._minkowski_difference, polygon_a, polygon_b)
+        orbital, orbital_ms = measure(NFPCalculator._nfp_polygon_orbital, polygon_a, polygon_b)
+        totals['minkowski'] += minkowski_ms
+        totals['orbital'] += orbital_ms
+
+        # Outer boundaries should enclose the same area; holes are extra free space
+        area_diff = abs(abs(orbital[0].area) - abs(minkowski[0].area))
+        print(f"{name:<12}{len(polygon_a) + len(polygon_b):>10}{minkowski_ms:>14.2f}{orbital_ms:>12.2f}"
+              f"{len(minkowski[0]):>13}{sum(len(ring) for ring in orbital):>12}{len(orbital) - 1:>7}{area_diff:>11.2e}")
+
+    print('-' * len(header))
+    print(f"Total: minkowski {totals['minkowski']:.1f} ms, orbital {totals['orbital']:.1f} ms "
+          f"({totals['orbital'] / max(totals['minkowski'], 1e-9):.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -197,8 +197,8 @@ def example_complex():
         'population_size': 20,
         'mutation_rate': 20,
         'max_generations': 100,
-        'explore_concave': True,  # Enable concave area exploration
-        'use_holes': False        # Disable part-in-part for now
+        'explore_concave': False, # Orbital NFPs find interlocking pockets but cost far more
+        'use_holes': False        # No holes in these parts
     }
     
     # Run nesting
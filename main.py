@@ -12,16 +12,52 @@ import sys
 import time
 from pathlib import Path
 
-from nester import Nester
+from nester import Nester, GeometryUtils, Polygon
 from nester.dxf_handler import DXFHandler
 
 
+def format_nfp_cache(stats):
+    """Format NFP cache statistics"""
+    return (f"NFP cache: {stats['entries']} entries, "
+            f"{stats['bytes'] / (1024 * 1024):.1f} MB, "
+            f"hit rate {stats['hit_rate'] * 100:.0f}%, "
+            f"{stats['evictions']} evicted")
+
+
 def print_progress(stats):
     """Print progress information"""
     print(f"Generation {stats['generation']}: "
           f"Best fitness: {stats['best_fitness']:.2f}, "
           f"Placed: {stats['best_placed']}/{stats['total_parts']}, "
-          f"Avg fitness: {stats['avg_fitness']:.2f}")
+          f"Avg fitness: {stats['avg_fitness']:.2f}"
+          f"{' (coarse)' if stats.get('fidelity') == 'coarse' else ''}")
+    if 'nfp_cache' in stats:
+        print(f"  {format_nfp_cache(stats['nfp_cache'])}")
+
+
+def print_nfp_progress(stats):
+    """Print NFP precomputation progress"""
+    print(f"NFP precomputation: {stats['done']}/{stats['total']} "
+          f"({format_nfp_cache(stats['nfp_cache'])})")
+
+
+def group_identical_parts(shapes, quantity=1):
+    """Merge identical part shapes (outline and holes) into single parts with a quantity"""
+    grouped = {}
+    for shape in shapes:
+        outline = Polygon.from_points(shape['points'])
+        min_x, min_y = outline.bbox[:2]
+        # Holes are identified by their shape and their position relative to the outline
+        holes = []
+        for hole in map(Polygon.from_points, shape['holes']):
+            holes.append((GeometryUtils.normalize_polygon(hole).fingerprint,
+                          round(hole.bbox[0] - min_x, 6), round(hole.bbox[1] - min_y, 6)))
+        fingerprint = (GeometryUtils.normalize_polygon(outline).fingerprint, tuple(sorted(holes)))
+        if fingerprint in grouped:
+            grouped[fingerprint]['quantity'] += quantity
+        else:
+            grouped[fingerprint] = dict(shape, quantity=quantity)
+    return list(grouped.values())
 
 
 def main():
@@ -50,6 +86,9 @@ Examples:
     parser.add_argument('-o', '--output', required=True,
                        help='Output DXF file path')
     
+    parser.add_argument('--quantity', type=int, default=1,
+                       help='Number of copies to nest of every part shape (default: 1)')
+    
     # Algorithm parameters
     parser.add_argument('--spacing', type=float, default=0,
                        help='Spacing between parts for laser kerf, CNC offset etc. (default: 0)')
@@ -73,7 +112,31 @@ Examples:
                        help='Explore concave areas for better placement (slower but better results)')
     
     parser.add_argument('--use-holes', action='store_true',
-                       help='Enable part-in-part placement (experimental)')
+                       help='Place small parts inside the holes of larger ones')
+    
+    parser.add_argument('--simplify', action='store_true',
+                       help='Drop vertices within the curve tolerance before computing NFPs')
+    
+    parser.add_argument('--coarse-generations', type=int, default=0,
+                       help='Generations evaluated on coarse outlines first (default: 0)')
+    
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                       help='Worker processes for parallel stages (default: number of CPUs)')
+    
+    parser.add_argument('--executor', choices=['process', 'thread', 'serial'], default='process',
+                       help='How to evaluate GA individuals in parallel (default: process)')
+    
+    parser.add_argument('--seed', type=int,
+                       help='Random seed for reproducible results (default: random)')
+    
+    parser.add_argument('--nfp-cache',
+                       help='SQLite file for an NFP cache reused across runs (default: disabled)')
+    
+    parser.add_argument('--nfp-cache-max-mb', type=float, default=512,
+                       help='Size cap of the NFP cache file in MB (default: 512)')
+    
+    parser.add_argument('--nfp-memory-mb', type=float, default=1024,
+                       help='Memory budget of the in-memory NFP cache in MB (default: 1024)')
     
     # Other options
     parser.add_argument('--verbose', '-v', action='store_true',
@@ -149,13 +212,19 @@ Examples:
         
         # Read parts
         print(f"Reading {len(part_files)} part files...")
-        all_part_polygons = DXFHandler.read_multiple_dxf_files(part_files)
+        # Contours inside a part's outline are its holes, not parts of their own
+        all_part_shapes = DXFHandler.read_multiple_dxf_files(part_files, group_holes=True)
         
-        if not all_part_polygons:
+        if not all_part_shapes:
             print("Error: No valid polygons found in part files")
             sys.exit(1)
         
-        print(f"Found {len(all_part_polygons)} part polygons")
+        hole_count = sum(len(shape['holes']) for shape in all_part_shapes)
+        print(f"Found {len(all_part_shapes)} part polygons ({hole_count} holes)")
+        
+        # Identical shapes are nested as one part with a quantity
+        parts = group_identical_parts(all_part_shapes, args.quantity)
+        print(f"  {len(parts)} unique shapes, {sum(p['quantity'] for p in parts)} parts to nest")
         
         # Configure nester
         config = {
@@ -166,7 +235,15 @@ Examples:
             'mutation_rate': args.mutation_rate,
             'max_generations': args.max_generations,
             'explore_concave': args.explore_concave,
-            'use_holes': args.use_holes
+            'use_holes': args.use_holes,
+            'simplify': args.simplify,
+            'coarse_generations': args.coarse_generations,
+            'nfp_cache_path': args.nfp_cache,
+            'nfp_cache_max_mb': args.nfp_cache_max_mb,
+            'nfp_cache_memory_mb': args.nfp_memory_mb,
+            'workers': args.jobs,
+            'executor': args.executor,
+            'seed': args.seed
         }
         
         print(f"Configuration:")
@@ -176,7 +253,17 @@ Examples:
         # Initialize nester
         nester = Nester(config)
         nester.add_container(container_polygon)
-        nester.add_parts(all_part_polygons)
+        nester.add_parts(parts)
+        if args.simplify:
+            counts = nester.simplification
+            print(f"Simplified {counts['shapes']} shapes: "
+                  f"{counts['vertices_before']} -> {counts['vertices_after']} vertices")
+        
+        # Compute all NFPs up front, in parallel
+        print(f"\nPrecomputing NFPs with {args.jobs} worker(s)...")
+        start_time = time.time()
+        computed = nester.precompute_nfps(print_nfp_progress if args.verbose else None)
+        print(f"Computed {computed} NFPs in {time.time() - start_time:.2f} seconds")
         
         # Run nesting
         print(f"\nStarting nesting optimization...")
@@ -200,6 +287,7 @@ Examples:
         # Save result
         print(f"\nSaving result to: {args.output}")
         placement_data = nester.get_placement_data()
+        nester.close()
         
         if placement_data:
             DXFHandler.write_dxf(args.output, placement_data)
@@ -1,7 +1,8 @@
 from .nester import Nester
+from .polygon import Polygon
 from .geometry_utils import GeometryUtils
 from .nfp_calculator import NFPCalculator
 from .genetic_algorithm import GeneticAlgorithm
 
 __version__ = "1.0.0"
-__all__ = ["Nester", "GeometryUtils", "NFPCalculator", "GeneticAlgorithm"]
\ No newline at end of file
+__all__ = ["Nester", "Polygon", "GeometryUtils", "NFPCalculator", "GeneticAlgorithm"]
\ No newline at end of file
@@ -2,6 +2,7 @@ import ezdxf
 import math
 from ezdxf import units
 from .geometry_utils import GeometryUtils
+from .polygon import Polygon
 
 
 class DXFHandler:
@@ -38,6 +39,53 @@ class DXFHandler:
         except Exception as e:
             raise ValueError(f"Error reading DXF file: {str(e)}")
     
+    @staticmethod
+    def group_holes(polygons):
+        """
+        Group closed contours into part outlines with holes
+        
+        A contour inside an odd number of others is a hole of the smallest
+        contour around it; every other contour is an outline (an island
+        inside a hole is a part of its own).
+        
+        Args:
+            polygons (list): Contours, as returned by ``read_dxf``
+            
+        Returns:
+            list: Parts as dicts with 'points' and a list of 'holes', in the
+            order their outlines were given
+        """
+        shapes = [Polygon.from_points(points) for points in polygons]
+        areas = [abs(shape.area) for shape in shapes]
+        
+        # The parent of a contour is the smallest larger contour holding most of its vertices
+        parents = []
+        for i, shape in enumerate(shapes):
+            parent = None
+            min_x, min_y, max_x, max_y = shape.bbox
+            for j, other in enumerate(shapes):
+                if areas[j] <= areas[i] or (parent is not None and areas[j] >= areas[parent]):
+                    continue
+                other_min_x, other_min_y, other_max_x, other_max_y = other.bbox
+                if min_x < other_min_x or min_y < other_min_y or max_x > other_max_x or max_y > other_max_y:
+                    continue
+                if GeometryUtils.points_in_polygon(shape.coords, other).mean() > 0.5:
+                    parent = j
+            parents.append(parent)
+        
+        def depth(i):
+            return 0 if parents[i] is None else depth(parents[i]) + 1
+        
+        parts = {}
+        for i, points in enumerate(polygons):
+            if depth(i) % 2 == 0:
+                parts[i] = {'points': points, 'holes': []}
+        for i, points in enumerate(polygons):
+            if depth(i) % 2 == 1:
+                parts[parents[i]]['holes'].append(points)
+        
+        return list(parts.values())
+    
     @staticmethod
     def _extract_points_from_entity(entity):
         """Extract points from different DXF entity types"""
@@ -177,6 +225,11 @@ class DXFHandler:
                     part_coords,
                     dxfattribs={'layer': 'PARTS'}
                 )
+                
+                for hole_points in part.get('placed_holes', []):
+                    hole_coords = [(p['x'], p['y']) for p in hole_points]
+                    hole_coords.append(hole_coords[0])
+                    msp.add_lwpolyline(hole_coords, dxfattribs={'layer': 'PARTS'})
             
             # If multiple bins, offset them horizontally
             if bin_index < len(placement_data) - 1:
@@ -192,21 +245,25 @@ class DXFHandler:
         doc.saveas(file_path)
     
     @staticmethod
-    def read_multiple_dxf_files(file_paths):
+    def read_multiple_dxf_files(file_paths, group_holes=False):
         """
         Read multiple DXF files and return all polygons
         
         Args:
             file_paths (list): List of DXF file paths
+            group_holes (bool): If True, return parts with 'points' and
+                'holes', grouping the contours of each file with ``group_holes``
             
         Returns:
-            list: All polygons from all files
+            list: All polygons (or parts) from all files
         """
         all_polygons = []
         
         for file_path in file_paths:
             try:
                 polygons = DXFHandler.read_dxf(file_path)
+                if group_holes:
+                    polygons = DXFHandler.group_holes(polygons)
                 all_polygons.extend(polygons)
             except Exception as e:
                 print(f"Warning: Could not read {file_path}: {str(e)}")
@@ -0,0 +1,179 @@
+import math
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from .genetic_algorithm import GeneticAlgorithm
+from .placement_worker import PlacementWorker
+
+
+# Placement workers of the current pool process by fidelity, set up once by ``_init_process``
+_process_workers = {}
+
+
+def _init_process(container, problems, nfp_cache, config):
+    """Process pool initializer: receive the problem once per worker process"""
+    for coarse, (parts, atlas) in problems.items():
+        _process_workers[coarse] = PlacementWorker(container, parts, nfp_cache, config, atlas)
+
+
+def _place_in_process(task):
+    """
+    Process pool task: place one ``(coarse, (placement, rotation))`` genome
+
+    Returns the placement result and the changes to this process's NFP cache
+    counters, which the parent adds to its own cache.  Pool processes are not
+    shut down cleanly, so reads from the persistent NFP store are recorded
+    after every task.
+    """
+    coarse, (placement, rotation) = task
+    worker = _process_workers[coarse]
+    before = worker.nfp_cache.counters()
+    result = worker.place_parts({'placement': placement, 'rotation': rotation})
+    worker.nfp_cache.flush()
+    deltas = {name: value - before[name] for name, value in worker.nfp_cache.counters().items()}
+    return result, deltas
+
+
+class PopulationEvaluator:
+    """
+    Evaluate the fitness of GA individuals, optionally in parallel
+
+    The ``executor`` setting selects ``'process'`` (default), ``'thread'`` or
+    ``'serial'`` evaluation; with ``workers`` <= 1 evaluation is always serial.
+    The process pool is started on first use and kept for the lifetime of the
+    evaluator, so the container, parts, rotation atlas and NFP cache are
+    shipped to each worker process once rather than with every individual.
+    With ``shared_nfp`` (default) the NFP cache is published to shared memory
+    first, so the workers read one copy of the NFPs instead of their own.
+    Placement is deterministic, so results do not depend on the executor.
+
+    Coarse parts and atlas, if given, are shipped along with the exact ones,
+    so multi-fidelity runs place both kinds of individuals on one pool.
+    """
+
+    EXECUTORS = ('process', 'thread', 'serial')
+
+    def __init__(self, container, parts, nfp_cache, config, atlas=None, coarse_parts=None, coarse_atlas=None):
+        """
+        Args:
+            container: Container dict
+            parts: Parts in the order the GA indexes them
+            nfp_cache: NFPCache, ideally filled by precomputation
+            config: Nester configuration ('executor' and 'workers')
+            atlas: Optional RotationAtlas shared with the GA
+            coarse_parts: Optional coarse outlines of the parts, for ``evaluate(coarse=True)``
+            coarse_atlas: Optional RotationAtlas of the coarse parts
+        """
+        self.container = container
+        self.parts = parts
+        self.nfp_cache = nfp_cache
+        self.config = config
+        self.atlas = atlas
+        # (parts, atlas) placed for exact (False) and coarse (True) evaluation
+        self.problems = {False: (parts, atlas)}
+        if coarse_parts:
+            self.problems[True] = (coarse_parts, coarse_atlas)
+        self.kind = config.get('executor', 'process')
+        self.workers = max(1, int(config.get('workers', 1)))
+
+        if self.kind not in self.EXECUTORS:
+            raise ValueError(f"Unknown executor '{self.kind}', expected one of {self.EXECUTORS}")
+
+        if self.workers == 1:
+            self.kind = 'serial'
+
+        self._executor = None
+        self._shared = False
+        self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def evaluate(self, population, coarse=False):
+        """
+        Place every individual that has not been evaluated yet
+
+        Sets ``fitness`` and ``result`` on the individuals in place.
+
+        Args:
+            population: List of GA individuals
+            coarse: If True, place the coarse parts instead of the exact ones
+
+        Returns:
+            int: Number of distinct genomes placed
+        """
+        if coarse not in self.problems:
+            raise ValueError("No coarse parts to evaluate with")
+
+        # Clones within the population are placed once and share the result
+        pending = {}
+        for individual in population:
+            if individual['fitness'] == float('inf'):
+                pending.setdefault(GeneticAlgorithm.genome_key(individual), []).append(individual)
+        if not pending:
+            return 0
+
+        tasks = [(coarse, genome) for genome in pending]
+        for individuals, result in zip(pending.values(), self._map(tasks)):
+            for individual in individuals:
+                individual['fitness'] = result['fitness']
+                individual['result'] = result
+
+        return len(pending)
+
+    def _map(self, tasks):
+        """Place ``(coarse, genome)`` tasks on the configured executor, returning results in order"""
+        if self.kind == 'serial':
+            return [self._place_local(task) for task in tasks]
+
+        executor = self._get_executor()
+        if self.kind == 'thread':
+            return list(executor.map(self._place_local, tasks))
+
+        chunk_size = max(1, math.ceil(len(tasks) / (self.workers * 2)))
+        results = []
+        for result, deltas in executor.map(_place_in_process, tasks, chunksize=chunk_size):
+            # Lookups happen on the workers' copies of the cache; report them here
+            self.nfp_cache.add_counters(deltas)
+            results.append(result)
+        return results
+
+    def _place_local(self, task):
+        """Place a ``(coarse, genome)`` task with this thread's own placement worker"""
+        coarse, (placement, rotation) = task
+        workers = getattr(self._local, 'workers', None)
+        if workers is None:
+            workers = self._local.workers = {}
+        worker = workers.get(coarse)
+        if worker is None:
+            parts, atlas = self.problems[coarse]
+            worker = PlacementWorker(self.container, parts, self.nfp_cache, self.config, atlas)
+            workers[coarse] = worker
+        return worker.place_parts({'placement': placement, 'rotation': rotation})
+
+    def _get_executor(self):
+        """Start the pool on first use"""
+        if self._executor is None:
+            if self.kind == 'thread':
+                self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            else:
+                if self.config.get('shared_nfp', True):
+                    self.nfp_cache.share()
+                    self._shared = True
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_init_process,
+                    initargs=(self.container, self.problems, self.nfp_cache, self.config)
+                )
+        return self._executor
+
+    def close(self):
+        """Shut the pool down and free the shared NFP memory"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._shared:
+            self.nfp_cache.unshare()
+            self._shared = False
@@ -1,26 +1,37 @@
 import random
 import copy
-from .geometry_utils import GeometryUtils
+from collections import Counter, OrderedDict
+from .rotation_atlas import RotationAtlas
 
 
 class GeneticAlgorithm:
     """Genetic Algorithm for optimizing part placement"""
     
-    def __init__(self, parts, container, config):
+    def __init__(self, parts, container, config, atlas=None):
         self.parts = parts
         self.container = container
         self.config = config
+        self.atlas = atlas or RotationAtlas(parts, container, config['rotations'])
+        # Private generator so a seed reproduces the run regardless of other users of random
+        self.random = random.Random(config.get('seed'))
         self.population = []
         self.generation_count = 0
         
+        # Fitness and placement results of recently evaluated genomes, least recently used first
+        self.fitness_cache = OrderedDict()
+        self.fitness_cache_size = config.get('fitness_cache_size', 1000)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
         # Initialize population
         self._initialize_population()
     
     def _initialize_population(self):
         """Create initial population"""
-        # Create initial individual with parts in order
-        initial_placement = list(range(len(self.parts)))
-        initial_rotations = [self._random_angle(i) for i in range(len(self.parts))]
+        # Create initial individual with parts in order, each index repeated per copy
+        initial_placement = [index for index, part in enumerate(self.parts)
+                             for _ in range(part.get('quantity', 1))]
+        initial_rotations = [self._random_angle(i) for i in initial_placement]
         
         initial_individual = {
             'placement': initial_placement,
@@ -37,41 +48,33 @@ class GeneticAlgorithm:
     
     def _random_angle(self, part_index):
         """Generate a random valid rotation angle for a part"""
-        angles = []
-        for i in range(self.config['rotations']):
-            angle = i * (360 / self.config['rotations'])
-            angles.append(angle)
-        
-        # Filter angles that fit within container bounds
-        valid_angles = []
-        part = self.parts[part_index]
-        
-        for angle in angles:
-            rotated = GeometryUtils.rotate_polygon(part['points'], angle)
-            container_bounds = GeometryUtils.get_polygon_bounds(self.container['points'])
-            
-            if (rotated['width'] <= container_bounds['width'] and 
-                rotated['height'] <= container_bounds['height']):
-                valid_angles.append(angle)
-        
-        return random.choice(valid_angles) if valid_angles else 0
+        valid_angles = self.atlas.valid_angles(part_index)
+        return self.random.choice(valid_angles) if valid_angles else 0
     
     def _mutate(self, individual):
         """Mutate an individual"""
         mutant = copy.deepcopy(individual)
+        genome = self.genome_key(mutant)
         
         # Swap mutation - swap two parts in placement order
-        if random.random() < self.config['mutation_rate'] / 100.0:
+        if self.random.random() < self.config['mutation_rate'] / 100.0:
             if len(mutant['placement']) > 1:
-                i = random.randint(0, len(mutant['placement']) - 1)
-                j = random.randint(0, len(mutant['placement']) - 1)
+                i = self.random.randint(0, len(mutant['placement']) - 1)
+                j = self.random.randint(0, len(mutant['placement']) - 1)
                 mutant['placement'][i], mutant['placement'][j] = mutant['placement'][j], mutant['placement'][i]
+                # Rotations travel with their parts so every part keeps a valid angle
+                mutant['rotation'][i], mutant['rotation'][j] = mutant['rotation'][j], mutant['rotation'][i]
         
         # Rotation mutation - change rotation of a random part
-        if random.random() < self.config['mutation_rate'] / 100.0:
-            i = random.randint(0, len(mutant['rotation']) - 1)
+        if self.random.random() < self.config['mutation_rate'] / 100.0:
+            i = self.random.randint(0, len(mutant['rotation']) - 1)
             mutant['rotation'][i] = self._random_angle(mutant['placement'][i])
         
+        # A changed genome needs a new evaluation (possibly served by the fitness cache)
+        if self.genome_key(mutant) != genome:
+            mutant['fitness'] = float('inf')
+            mutant.pop('result', None)
+        
         return mutant
     
     def _crossover(self, parent1, parent2):
@@ -79,8 +82,8 @@ class GeneticAlgorithm:
         length = len(parent1['placement'])
         
         # Select crossover points
-        start = random.randint(0, length - 1)
-        end = random.randint(start, length - 1)
+        start = self.random.randint(0, length - 1)
+        end = self.random.randint(start, length - 1)
         
         # Create offspring
         offspring1 = {'placement': [-1] * length, 'rotation': [0] * length, 'fitness': float('inf')}
@@ -104,23 +107,25 @@ class GeneticAlgorithm:
     
     def _fill_offspring(self, offspring, parent, start, end):
         """Fill remaining positions in offspring from parent"""
-        used = set(offspring['placement'][start:end+1])
+        # Parts with a quantity appear several times, so count the copies still to place
+        remaining = Counter(parent['placement'])
+        remaining.subtract(offspring['placement'][start:end+1])
         
         parent_index = 0
         for i in range(len(offspring['placement'])):
             if offspring['placement'][i] == -1:
                 # Find next unused element from parent
-                while parent['placement'][parent_index] in used:
+                while remaining[parent['placement'][parent_index]] <= 0:
                     parent_index += 1
                 
                 offspring['placement'][i] = parent['placement'][parent_index]
                 offspring['rotation'][i] = parent['rotation'][parent_index]
-                used.add(parent['placement'][parent_index])
+                remaining[parent['placement'][parent_index]] -= 1
                 parent_index += 1
     
     def _tournament_selection(self, tournament_size=3):
         """Select individual using tournament selection"""
-        tournament = random.sample(self.population, min(tournament_size, len(self.population)))
+        tournament = self.random.sample(self.population, min(tournament_size, len(self.population)))
         return min(tournament, key=lambda x: x['fitness'])
     
     def evolve(self):
@@ -140,7 +145,7 @@ class GeneticAlgorithm:
             parent2 = self._tournament_selection()
             
             # Crossover
-            if random.random() < 0.8:  # Crossover probability
+            if self.random.random() < 0.8:  # Crossover probability
                 offspring1, offspring2 = self._crossover(parent1, parent2)
             else:
                 offspring1 = copy.deepcopy(parent1)
@@ -157,6 +162,61 @@ class GeneticAlgorithm:
         self.population = new_population
         self.generation_count += 1
     
+    @staticmethod
+    def genome_key(individual):
+        """Hashable (placement order, rotations) key identifying an individual's genome"""
+        return tuple(individual['placement']), tuple(individual['rotation'])
+    
+    def apply_cached_fitness(self):
+        """
+        Fill in the fitness of unevaluated individuals whose genome was seen before
+        
+        Clones within the current population count as hits too; they are
+        placed once by the evaluator and share the result.
+        
+        Returns:
+            int: Number of individuals served from the cache
+        """
+        served = 0
+        pending = set()
+        for individual in self.population:
+            if individual['fitness'] != float('inf'):
+                continue
+            
+            key = self.genome_key(individual)
+            cached = self.fitness_cache.get(key)
+            if cached is not None:
+                self.fitness_cache.move_to_end(key)
+                individual['fitness'], individual['result'] = cached
+                served += 1
+            elif key in pending:
+                served += 1
+            else:
+                pending.add(key)
+                self.cache_misses += 1
+        
+        self.cache_hits += served
+        return served
+    
+    def cache_fitness(self):
+        """Remember the fitness and result of every evaluated individual"""
+        for individual in self.population:
+            if individual['fitness'] == float('inf') or 'result' not in individual:
+                continue
+            key = self.genome_key(individual)
+            self.fitness_cache[key] = (individual['fitness'], individual['result'])
+            self.fitness_cache.move_to_end(key)
+        
+        while len(self.fitness_cache) > self.fitness_cache_size:
+            self.fitness_cache.popitem(last=False)
+    
+    def reset_fitness(self):
+        """Forget every fitness value, cached ones included, after the evaluation geometry changed"""
+        for individual in self.population:
+            individual['fitness'] = float('inf')
+            individual.pop('result', None)
+        self.fitness_cache.clear()
+    
     def get_best(self):
         """Get the best individual from current population"""
         return min(self.population, key=lambda x: x['fitness'])
@@ -164,9 +224,13 @@ class GeneticAlgorithm:
     def get_statistics(self):
         """Get statistics about current population"""
         fitnesses = [ind['fitness'] for ind in self.population]
+        lookups = self.cache_hits + self.cache_misses
         return {
             'generation': self.generation_count,
             'best_fitness': min(fitnesses),
             'worst_fitness': max(fitnesses),
-            'avg_fitness': sum(fitnesses) / len(fitnesses)
+            'avg_fitness': sum(fitnesses) / len(fitnesses),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'cache_hit_rate': self.cache_hits / lookups if lookups else 0.0
         }
\ No newline at end of file
@@ -1,11 +1,26 @@
 import math
-import copy
+import numpy as np
 import pyclipper
+from .polygon import Polygon
 
 TOL = 1e-7
 
 
 class GeometryUtils:
+    """
+    Polygon helpers
+
+    Every function accepts either a ``Polygon`` or the public list of
+    ``{'x', 'y'}`` dicts, and returns polygons in the same format it was given.
+    """
+
+    @staticmethod
+    def _like(polygon, template):
+        """Return ``polygon`` in the same format as ``template``"""
+        if isinstance(template, Polygon):
+            return polygon
+        return polygon.to_points()
+
     @staticmethod
     def almost_equal(a, b, tolerance=TOL):
         """Check if two values are approximately equal"""
@@ -14,13 +29,7 @@ class GeometryUtils:
     @staticmethod
     def polygon_area(polygon):
         """Calculate the area of a polygon using the shoelace formula"""
-        area = 0.0
-        n = len(polygon)
-        for i in range(n):
-            j = (i + 1) % n
-            area += polygon[i]['x'] * polygon[j]['y']
-            area -= polygon[j]['x'] * polygon[i]['y']
-        return area / 2.0
+        return Polygon.from_points(polygon).area
 
     @staticmethod
     def get_polygon_bounds(polygon):
@@ -28,51 +37,25 @@ class GeometryUtils:
         if not polygon:
             return None
         
-        min_x = max_x = polygon[0]['x']
-        min_y = max_y = polygon[0]['y']
-        
-        for point in polygon:
-            min_x = min(min_x, point['x'])
-            max_x = max(max_x, point['x'])
-            min_y = min(min_y, point['y'])
-            max_y = max(max_y, point['y'])
-        
-        return {
-            'x': min_x,
-            'y': min_y,
-            'width': max_x - min_x,
-            'height': max_y - min_y
-        }
+        return Polygon.from_points(polygon).bounds
 
     @staticmethod
     def rotate_polygon(polygon, angle_degrees):
         """Rotate a polygon by the given angle in degrees"""
-        angle_rad = math.radians(angle_degrees)
-        cos_a = math.cos(angle_rad)
-        sin_a = math.sin(angle_rad)
-        
-        rotated_points = []
-        for point in polygon:
-            x = point['x'] * cos_a - point['y'] * sin_a
-            y = point['x'] * sin_a + point['y'] * cos_a
-            rotated_points.append({'x': x, 'y': y})
+        rotated = Polygon.from_points(polygon).rotate(angle_degrees)
+        bounds = rotated.bounds
         
         return {
-            'points': rotated_points,
-            'width': GeometryUtils.get_polygon_bounds(rotated_points)['width'],
-            'height': GeometryUtils.get_polygon_bounds(rotated_points)['height']
+            'points': GeometryUtils._like(rotated, polygon),
+            'width': bounds['width'] if bounds else 0,
+            'height': bounds['height'] if bounds else 0
         }
 
     @staticmethod
     def translate_polygon(polygon, dx, dy):
         """Translate a polygon by the given offset"""
-        translated = []
-        for point in polygon:
-            translated.append({
-                'x': point['x'] + dx,
-                'y': point['y'] + dy
-            })
-        return translated
+        translated = Polygon.from_points(polygon).translate(dx, dy)
+        return GeometryUtils._like(translated, polygon)
 
     @staticmethod
     def normalize_polygon(polygon):
@@ -81,71 +64,417 @@ class GeometryUtils:
             return polygon
         
         # Move to origin
-        bounds = GeometryUtils.get_polygon_bounds(polygon)
-        normalized = []
-        for point in polygon:
-            normalized.append({
-                'x': point['x'] - bounds['x'],
-                'y': point['y'] - bounds['y']
-            })
+        source = Polygon.from_points(polygon)
+        min_x, min_y = source.bbox[:2]
+        normalized = source.translate(-min_x, -min_y)
         
         # Ensure counterclockwise orientation
-        area = GeometryUtils.polygon_area(normalized)
-        if area > 0:
-            normalized.reverse()
+        if normalized.area > 0:
+            normalized = normalized.reversed()
         
-        return normalized
+        return GeometryUtils._like(normalized, polygon)
 
     @staticmethod
-    def polygon_offset(polygon, offset, curve_tolerance=0.3):
-        """Offset a polygon by the given distance"""
+    def polygon_offset(polygon, offset, curve_tolerance=0.3, scale=Polygon.CLIPPER_SCALE):
+        """Offset a polygon by the given distance, computed in clipper units of ``1 / scale``"""
         if not polygon or offset == 0:
             return polygon
         
         # Convert to clipper format
-        clipper_polygon = [[int(p['x'] * 1000000), int(p['y'] * 1000000)] for p in polygon]
+        clipper_polygon = Polygon.from_points(polygon).to_clipper(scale)
         
-        # Use curve tolerance for offsetting (miter limit = 2 is standard)
+        # Use curve tolerance for offsetting (miter limit = 2 is standard);
+        # the arc tolerance is in clipper units, so it is scaled like the points
         miter_limit = 2
-        co = pyclipper.PyclipperOffset(miter_limit, curve_tolerance)
+        co = pyclipper.PyclipperOffset(miter_limit, curve_tolerance * scale)
         co.AddPath(clipper_polygon, pyclipper.JT_ROUND, pyclipper.ET_CLOSEDPOLYGON)
         
-        offset_clipper = int(offset * 1000000)
+        offset_clipper = round(offset * scale)
         result = co.Execute(offset_clipper)
         
         if not result:
-            return []
+            return GeometryUtils._like(Polygon([]), polygon)
         
         # Convert back
-        result_polygon = []
-        for point in result[0]:
-            result_polygon.append({
-                'x': point[0] / 1000000.0,
-                'y': point[1] / 1000000.0
-            })
-        
-        return result_polygon
+        result_polygon = Polygon.from_clipper(result[0], scale)
+        return GeometryUtils._like(result_polygon, polygon)
+
+    # Slack that keeps exact fits from collapsing into lines, which clipper drops
+    EXACT_FIT_MARGIN = 1e-5
+
+    @staticmethod
+    def exact_fit_margin(scale=Polygon.CLIPPER_SCALE):
+        """``EXACT_FIT_MARGIN`` in drawing units, at least two clipper units so coarse scales keep it"""
+        return max(GeometryUtils.EXACT_FIT_MARGIN, 2.0 / scale)
+
+    @staticmethod
+    def simplify_polygon(polygon, tolerance, outward=True, scale=Polygon.CLIPPER_SCALE):
+        """
+        Drop vertices within a tolerance without letting the shape shrink (or grow)
+
+        Douglas-Peucker with half the tolerance removes collinear and nearly
+        collinear vertices.  Each edge that replaced dropped vertices is then
+        moved out (for ``outward``, parts) or in (containers and holes) by the
+        largest distance of those vertices on that side, and adjacent edges
+        are mitered, or bevelled where a miter would reach further than half
+        the tolerance.  Edges that dropped nothing stay where they are, so
+        narrow slots and tabs elsewhere survive, and the boundary moves by at
+        most ``tolerance``.  The original is returned when nothing can be
+        dropped or the result would not be conservative.
+
+        Args:
+            polygon: Polygon to simplify
+            tolerance: Maximum distance the boundary may move
+            outward: True to cover the original, False to stay inside it
+            scale: Clipper units per drawing unit
+
+        Returns:
+            Simplified polygon, in the format it was given
+        """
+        source = Polygon.from_points(polygon)
+        if len(source) < 4 or tolerance <= 0:
+            return polygon
+
+        coords = source.coords
+        indices = GeometryUtils._douglas_peucker(coords, tolerance / 2)
+        count = len(indices)
+        if count == len(source) or count < 3:
+            return polygon
+
+        # Unit directions of the kept edges and their normals towards the side the shape may move to
+        kept = coords[indices]
+        directions = np.roll(kept, -1, axis=0) - kept
+        lengths = np.hypot(*directions.T)
+        if not lengths.all():
+            return polygon
+        directions /= lengths[:, None]
+        signed_area = float(np.sum(coords[:, 0] * np.roll(coords[:, 1], -1) - np.roll(coords[:, 0], -1) * coords[:, 1]))
+        side = (1.0 if signed_area > 0 else -1.0) * (1.0 if outward else -1.0)
+        normals = side * np.column_stack([directions[:, 1], -directions[:, 0]])
+
+        # How far each edge moves: the largest excursion of its dropped vertices, in whole clipper units
+        shifts = np.zeros(count)
+        for k in range(count):
+            start, end = indices[k], indices[(k + 1) % count]
+            span = coords[start + 1:end] if end > start else np.vstack([coords[start + 1:], coords[:end]])
+            if len(span):
+                excursion = float(np.max((span - kept[k]) @ normals[k]))
+                if excursion > 0:
+                    shifts[k] = math.ceil(excursion * scale) / scale
+
+        vertices = []
+        for k in range(count):
+            previous = k - 1
+            if not shifts[previous] and not shifts[k]:
+                vertices.append(kept[k])
+                continue
+            before = kept[k] + shifts[previous] * normals[previous]
+            after = kept[k] + shifts[k] * normals[k]
+            cross = directions[previous, 0] * directions[k, 1] - directions[previous, 1] * directions[k, 0]
+            if abs(cross) > 1e-9:
+                # Intersection of the two moved edge lines
+                t = ((after - before)[0] * directions[k, 1] - (after - before)[1] * directions[k, 0]) / cross
+                miter = before + t * directions[previous]
+                if np.hypot(*(miter - kept[k])) <= tolerance / 2:
+                    vertices.append(miter)
+                    continue
+            vertices.extend([before, after])
+
+        if len(vertices) >= len(source):
+            return polygon
+        result = np.round(np.array(vertices) * scale).astype(np.int64)
+        result = result[np.any(result != np.roll(result, 1, axis=0), axis=1)]
+
+        # The moved edges must not cross into swallowtails or turn the ring inside out...
+        if len(result) < 3 or not GeometryUtils._is_simple(result):
+            return polygon
+        if (pyclipper.Area(result) > 0) != (signed_area > 0):
+            return polygon
+
+        # ...and the result must cover the original (or lie within it), up to clipper rounding
+        original = source.to_clipper(scale)
+        pc = pyclipper.Pyclipper()
+        pc.AddPath(original if outward else result, pyclipper.PT_SUBJECT, True)
+        pc.AddPath(result if outward else original, pyclipper.PT_CLIP, True)
+        try:
+            outside = pc.Execute(pyclipper.CT_DIFFERENCE, pyclipper.PFT_NONZERO, pyclipper.PFT_NONZERO)
+        except pyclipper.ClipperException:
+            return polygon
+        # Rounding leaves slivers at most a clipper unit or so wide; anything wider is a real miss
+        if outside:
+            erode = pyclipper.PyclipperOffset()
+            erode.AddPaths(outside, pyclipper.JT_MITER, pyclipper.ET_CLOSEDPOLYGON)
+            if erode.Execute(-2):
+                return polygon
+
+        return GeometryUtils._like(Polygon.from_clipper(result, scale), polygon)
 
+    @staticmethod
+    def _is_simple(ring):
+        """
+        True if no two edges of a ring touch or cross, other than neighbours at their shared vertex
+
+        Every pair of edges is tested at once with orientation signs, so this
+        is meant for the small rings simplification produces.
+        """
+        start = np.asarray(ring, dtype=np.float64)
+        end = np.roll(start, -1, axis=0)
+        count = len(start)
+
+        def orientation(a, b, c):
+            # Sign of the turn a -> b -> c for every edge pair: a, b from edge i, c from edge j
+            return np.sign((b[:, None, 0] - a[:, None, 0]) * (c[None, :, 1] - a[:, None, 1]) -
+                           (b[:, None, 1] - a[:, None, 1]) * (c[None, :, 0] - a[:, None, 0]))
+
+        o1 = orientation(start, end, start)
+        o2 = orientation(start, end, end)
+        o3, o4 = o1.T, o2.T
+        low = np.minimum(start, end)
+        high = np.maximum(start, end)
+        boxes = ((low[:, None] <= high[None, :]) & (low[None, :] <= high[:, None])).all(axis=2)
+        touching = (o1 * o2 <= 0) & (o3 * o4 <= 0) & boxes
+
+        # Neighbouring edges share a vertex; they only count if they fold back onto each other
+        i, j = np.triu_indices(count, 1)
+        neighbours = (j == i + 1) | ((i == 0) & (j == count - 1))
+        folded = neighbours & (o1[i, j] == 0) & (o2[i, j] == 0) & (o1[j, i] == 0) & (o2[j, i] == 0)
+        crossing = touching[i, j] & ~neighbours
+        if crossing.any():
+            return False
+        # Collinear neighbours overlapping beyond their shared vertex
+        for a, b in zip(i[folded], j[folded]):
+            first, second = (a, b) if b == a + 1 else (b, a)
+            d1 = end[first] - start[first]
+            d2 = end[second] - start[second]
+            if d1 @ d2 < 0:
+                return False
+        return True
+
+    @staticmethod
+    def _douglas_peucker(coords, tolerance):
+        """
+        Ring vertices Douglas-Peucker keeps for a tolerance
+
+        The ring is split at its leftmost vertex and the vertex farthest from
+        it, and each chain is simplified against segment (not line) distances.
+
+        Returns:
+            numpy.ndarray: Sorted indices of the kept vertices
+        """
+        count = len(coords)
+        first = int(np.argmin(coords[:, 0]))
+        ring = np.roll(coords, -first, axis=0)
+        ring = np.vstack([ring, ring[:1]])
+        middle = int(np.argmax(np.hypot(*(ring[:-1] - ring[0]).T)))
+
+        keep = np.zeros(count + 1, dtype=bool)
+        keep[[0, middle, count]] = True
+        stack = [(0, middle), (middle, count)]
+        while stack:
+            start, end = stack.pop()
+            if end - start < 2:
+                continue
+            a, b = ring[start], ring[end]
+            inner = ring[start + 1:end]
+            ab = b - a
+            length_squared = float(ab @ ab)
+            t = np.clip((inner - a) @ ab / length_squared, 0, 1) if length_squared else np.zeros(len(inner))
+            distances = np.hypot(*(inner - a - t[:, None] * ab).T)
+            farthest = int(np.argmax(distances))
+            if distances[farthest] > tolerance:
+                split = start + 1 + farthest
+                keep[split] = True
+                stack += [(start, split), (split, end)]
+
+        return np.sort((np.flatnonzero(keep[:-1]) + first) % count)
+
+    @staticmethod
+    def polygon_difference(subjects, clips, clip_offsets=None, clip_rotations=None, clip_holes=None,
+                           scale=Polygon.CLIPPER_SCALE):
+        """
+        Subtract the union of the clip polygons from the subject polygons
+        
+        Subject rings are filled even-odd, so nested rings act as holes
+        whatever their orientation.  Clip rings are reoriented and filled
+        non-zero, so overlapping clips are unioned; hole rings are oriented
+        the other way, so they stay open unless another clip covers them.
+        
+        Args:
+            subjects: List of polygons
+            clips: List of polygons, or int64 arrays already in clipper
+                coordinates (e.g. rings of a ``PackedNFP``)
+            clip_offsets: Optional ``(dx, dy)`` per clip polygon, applied while
+                converting to clipper coordinates so shared polygons are not copied
+            clip_rotations: Optional angle in degrees per clip polygon, applied
+                about the origin before the offset
+            clip_holes: Optional flag per clip polygon, True for a hole of the
+                outer ring before it
+            scale: Clipper units per drawing unit, also the scale of int64 clips
+        
+        Returns:
+            List of Polygons (outer rings and holes) covering the difference
+        """
+        pc = pyclipper.Pyclipper()
+        for polygon in subjects:
+            path = Polygon.from_points(polygon).to_clipper(scale)
+            if len(path) >= 3:
+                pc.AddPath(path, pyclipper.PT_SUBJECT, True)
+        
+        for i, polygon in enumerate(clips):
+            if isinstance(polygon, np.ndarray) and polygon.dtype == np.int64:
+                # Clipper coordinates: unrotated rings are moved in integers, no float round trip
+                path = polygon
+                if clip_rotations is not None and clip_rotations[i]:
+                    path = np.round(path @ Polygon.rotation_matrix(clip_rotations[i])).astype(np.int64)
+                if clip_offsets is not None:
+                    path = path + np.round(np.multiply(clip_offsets[i], scale)).astype(np.int64)
+            else:
+                coords = Polygon.from_points(polygon).coords
+                if clip_rotations is not None and clip_rotations[i]:
+                    coords = coords @ Polygon.rotation_matrix(clip_rotations[i])
+                if clip_offsets is not None:
+                    coords = coords + clip_offsets[i]
+                path = np.round(coords * scale).astype(np.int64)
+            if len(path) < 3:
+                continue
+            hole = clip_holes is not None and clip_holes[i]
+            if pyclipper.Orientation(path) == hole:
+                path = path[::-1]
+            pc.AddPath(path, pyclipper.PT_CLIP, True)
+        
+        try:
+            solution = pc.Execute(pyclipper.CT_DIFFERENCE, pyclipper.PFT_EVENODD, pyclipper.PFT_NONZERO)
+        except pyclipper.ClipperException:
+            return []
+        
+        return [Polygon.from_clipper(path, scale) for path in solution]
+    
+    @staticmethod
+    def polygon_intersection(subjects, clips, scale=Polygon.CLIPPER_SCALE):
+        """
+        Intersect two sets of polygons, both filled even-odd
+        
+        Args:
+            subjects: List of polygons
+            clips: List of polygons
+            scale: Clipper units per drawing unit
+        
+        Returns:
+            List of Polygons (outer rings and holes) covering the intersection
+        """
+        pc = pyclipper.Pyclipper()
+        for polygons, kind in ((subjects, pyclipper.PT_SUBJECT), (clips, pyclipper.PT_CLIP)):
+            for polygon in polygons:
+                path = Polygon.from_points(polygon).to_clipper(scale)
+                if len(path) >= 3:
+                    pc.AddPath(path, kind, True)
+        
+        try:
+            solution = pc.Execute(pyclipper.CT_INTERSECTION, pyclipper.PFT_EVENODD, pyclipper.PFT_EVENODD)
+        except pyclipper.ClipperException:
+            return []
+        
+        return [Polygon.from_clipper(path, scale) for path in solution]
+    
     @staticmethod
     def point_in_polygon(point, polygon):
         """Check if a point is inside a polygon using ray casting"""
-        x, y = point['x'], point['y']
-        n = len(polygon)
-        inside = False
+        return bool(GeometryUtils.points_in_polygon([(point['x'], point['y'])], polygon)[0])
+
+    @staticmethod
+    def points_in_polygon(points, polygon):
+        """
+        Test many points against a polygon in one vectorized ray cast
+        
+        Args:
+            points: ``(m, 2)`` array-like, Polygon or list of point dicts
+            polygon: Polygon or list of point dicts with n edges
+        
+        Returns:
+            Boolean array of length m, True where the point is inside
+        """
+        return GeometryUtils.points_in_polygons(points, [polygon])
+
+    @staticmethod
+    def points_in_polygons(points, polygons):
+        """
+        Test many points against a region made of several rings, filled even-odd
+        
+        Args:
+            points: ``(m, 2)`` array-like, Polygon or list of point dicts
+            polygons: List of Polygons or lists of point dicts
+        
+        Returns:
+            Boolean array of length m, True where the point is inside
+        """
+        if isinstance(points, Polygon) or (len(points) and isinstance(points[0], dict)):
+            points = Polygon.from_points(points).coords
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        starts, ends = GeometryUtils._ring_edges(polygons)
+        
+        if not len(starts):
+            return np.zeros(len(points), dtype=bool)
+        
+        # Edges broadcast as (1, n)
+        p1x, p1y = starts[:, 0][None, :], starts[:, 1][None, :]
+        p2x, p2y = ends[:, 0][None, :], ends[:, 1][None, :]
+        x, y = points[:, 0][:, None], points[:, 1][:, None]
         
-        p1x, p1y = polygon[0]['x'], polygon[0]['y']
-        for i in range(1, n + 1):
-            p2x, p2y = polygon[i % n]['x'], polygon[i % n]['y']
-            if y > min(p1y, p2y):
-                if y <= max(p1y, p2y):
-                    if x <= max(p1x, p2x):
-                        if p1y != p2y:
-                            xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
-                        if p1x == p2x or x <= xinters:
-                            inside = not inside
-            p1x, p1y = p2x, p2y
+        # Crossing-number test, (m, n): a horizontal ray to the right crosses the edge
+        spans = (y > np.minimum(p1y, p2y)) & (y <= np.maximum(p1y, p2y)) & (x <= np.maximum(p1x, p2x))
+        dy = np.where(p1y != p2y, p2y - p1y, 1.0)
+        xinters = (y - p1y) * (p2x - p1x) / dy + p1x
+        crossings = spans & ((p1x == p2x) | (x <= xinters))
         
-        return inside
+        return np.count_nonzero(crossings, axis=1) % 2 == 1
+
+    @staticmethod
+    def nearest_boundary_points(points, polygons):
+        """
+        Closest points on the edges of several polygons, vectorized over points and edges
+        
+        Args:
+            points: ``(m, 2)`` array-like
+            polygons: List of Polygons or lists of point dicts
+        
+        Returns:
+            tuple: ``(nearest, distances)``, an ``(m, 2)`` array of the closest
+            boundary points and their distances from the points
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        starts, ends = GeometryUtils._ring_edges(polygons)
+        if not len(starts) or not len(points):
+            return points.copy(), np.full(len(points), np.inf)
+        
+        edges = ends - starts
+        lengths2 = np.maximum(np.einsum('ij,ij->i', edges, edges), TOL * TOL)
+        
+        # Parameter of the foot of the perpendicular on every edge, (m, n), clamped to the edge
+        relative = points[:, None, :] - starts[None, :, :]
+        t = np.clip(np.einsum('mnj,nj->mn', relative, edges) / lengths2, 0.0, 1.0)
+        feet = starts[None, :, :] + t[:, :, None] * edges[None, :, :]
+        distances2 = np.sum((feet - points[:, None, :]) ** 2, axis=2)
+        
+        closest = np.argmin(distances2, axis=1)
+        rows = np.arange(len(points))
+        return feet[rows, closest], np.sqrt(distances2[rows, closest])
+    
+    @staticmethod
+    def _ring_edges(polygons):
+        """Start and end points of the edges of every ring, as two ``(n, 2)`` arrays"""
+        rings = [Polygon.from_points(polygon).coords for polygon in polygons]
+        rings = [ring for ring in rings if len(ring)]
+        if not rings:
+            return np.empty((0, 2)), np.empty((0, 2))
+        starts = np.concatenate(rings)
+        ends = np.concatenate([np.roll(ring, -1, axis=0) for ring in rings])
+        return starts, ends
+    
+    @staticmethod
+    def is_simple(polygon):
+        """Check that no two edges of a polygon touch or cross"""
+        coords = Polygon.from_points(polygon).coords
+        return len(coords) >= 3 and GeometryUtils._is_simple(coords)
 
     @staticmethod
     def is_rectangle(polygon, tolerance=TOL):
@@ -153,15 +482,12 @@ class GeometryUtils:
         if len(polygon) != 4:
             return False
         
-        bounds = GeometryUtils.get_polygon_bounds(polygon)
+        polygon = Polygon.from_points(polygon)
+        min_x, min_y, max_x, max_y = polygon.bbox
+        x = polygon.coords[:, 0]
+        y = polygon.coords[:, 1]
         
-        for point in polygon:
-            x_on_edge = (GeometryUtils.almost_equal(point['x'], bounds['x'], tolerance) or 
-                        GeometryUtils.almost_equal(point['x'], bounds['x'] + bounds['width'], tolerance))
-            y_on_edge = (GeometryUtils.almost_equal(point['y'], bounds['y'], tolerance) or 
-                        GeometryUtils.almost_equal(point['y'], bounds['y'] + bounds['height'], tolerance))
-            
-            if not (x_on_edge and y_on_edge):
-                return False
+        x_on_edge = (np.abs(x - min_x) < tolerance) | (np.abs(x - max_x) < tolerance)
+        y_on_edge = (np.abs(y - min_y) < tolerance) | (np.abs(y - max_y) < tolerance)
         
-        return True
\ No newline at end of file
+        return bool(np.all(x_on_edge & y_on_edge))
@@ -1,8 +1,15 @@
 import copy
+import itertools
 import math
+import time
+from collections import OrderedDict
 from .geometry_utils import GeometryUtils
+from .polygon import Polygon
 from .genetic_algorithm import GeneticAlgorithm
-from .placement_worker import PlacementWorker
+from .evaluator import PopulationEvaluator
+from .rotation_atlas import RotationAtlas
+from .nfp_store import PersistentNFPStore
+from .nfp_cache import NFPCache
 
 
 class Nester:
@@ -18,22 +25,59 @@ class Nester:
         self.config = {
             'curve_tolerance': 0.3,    # Maximum error allowed for curve approximation
             'spacing': 0,              # Minimum space between parts (laser kerf, CNC offset etc.)
+            'clipper_scale': Polygon.CLIPPER_SCALE,  # Clipper integer units per drawing unit
             'rotations': 4,            # Number of rotation angles to evaluate for each part
             'population_size': 10,     # Population size for the Genetic Algorithm
             'mutation_rate': 10,       # Mutation rate percentage (1-50)
             'max_generations': 100,    # Maximum number of generations
             'use_holes': False,        # Enable part-in-part placement
-            'explore_concave': False   # Explore concave areas for better placement
+            'explore_concave': False,  # Explore concave areas for better placement
+            'simplify': False,         # Drop vertices within curve_tolerance before computing NFPs
+            'nfp_cache_path': None,    # SQLite file for an NFP cache shared across runs
+            'nfp_cache_max_mb': 512,   # Size cap of the on-disk NFP cache
+            'nfp_cache_memory_mb': 1024,  # Memory budget of the in-memory NFP cache (None: unbounded)
+            'precompute_nfp': True,    # Compute all needed NFPs before the GA starts
+            'workers': 1,              # Worker processes for parallel stages
+            'executor': 'process',     # Fitness evaluation: 'process', 'thread' or 'serial'
+            'shared_nfp': True,        # Process workers read NFPs from shared memory
+            'seed': None,              # Random seed for reproducible runs
+            'fitness_cache_size': 1000,  # Evaluated genomes remembered across generations
+            'prefix_checkpoint_interval': 10,  # Parts between layout snapshots (0 disables reuse)
+            'prefix_cache_size': 1000,  # Layout snapshots kept per placement worker
+            'coarse_generations': 0,   # Generations evaluated on coarse outlines first (0: none)
+            'coarse_seconds': None,    # Switch to exact outlines after this many seconds at the latest
+            'coarse_tolerance': None,  # How far coarse outlines may grow (None: 10 x curve_tolerance)
+            'coarse_refine': 1         # Best coarse individuals re-placed exactly every generation
         }
         
         if config:
             self.config.update(config)
         
+        scale = self.config['clipper_scale']
+        if int(scale) != scale or scale < 1:
+            raise ValueError("Clipper scale must be a positive integer")
+        self.config['clipper_scale'] = int(scale)
+        
         self.container = None
         self.parts = []
-        self.nfp_cache = {}
+        self.sorted_parts = []
+        self.nfp_store = None
+        if self.config['nfp_cache_path']:
+            self.nfp_store = PersistentNFPStore(
+                self.config['nfp_cache_path'],
+                int(self.config['nfp_cache_max_mb'] * 1024 * 1024)
+            )
+        self.nfp_cache = NFPCache(self.config, self.nfp_store)
+        # Vertex counts of the shapes before and after simplification
+        self.simplification = {'shapes': 0, 'vertices_before': 0, 'vertices_after': 0}
         self.best_result = None
         self.ga = None
+        self.atlas = None
+        # Parts with coarse outlines and their atlas, for multi-fidelity runs
+        self.coarse_parts = []
+        self.coarse_atlas = None
+        # Exact (fitness, result) of refined coarse individuals by genome
+        self.refined_fitness = OrderedDict()
     
     def add_container(self, points):
         """
@@ -47,13 +91,13 @@ class Nester:
             raise ValueError("Container must have at least 3 points")
         
         # Normalize and clean the container
-        normalized_points = GeometryUtils.normalize_polygon(points)
-        bounds = GeometryUtils.get_polygon_bounds(normalized_points)
+        normalized_points = GeometryUtils.normalize_polygon(Polygon.from_points(points))
+        bounds = normalized_points.bounds
         
         self.container = {
             'id': -1,
             'points': normalized_points,
-            'area': abs(GeometryUtils.polygon_area(normalized_points)),
+            'area': abs(normalized_points.area),
             'width': bounds['width'],
             'height': bounds['height']
         }
@@ -63,74 +107,294 @@ class Nester:
             offset_points = GeometryUtils.polygon_offset(
                 self.container['points'], 
                 -self.config['spacing'] / 2,
-                self.config['curve_tolerance']
+                self.config['curve_tolerance'],
+                self.config['clipper_scale']
             )
             if offset_points:
                 self.container['points'] = offset_points
-                new_bounds = GeometryUtils.get_polygon_bounds(offset_points)
+                new_bounds = offset_points.bounds
                 self.container['width'] = new_bounds['width']
                 self.container['height'] = new_bounds['height']
+        
+        # Simplify inward, so the container never grows
+        if self.config['simplify']:
+            self.container['points'] = self._simplify(self.container['points'], outward=False)
+            new_bounds = self.container['points'].bounds
+            self.container['width'] = new_bounds['width']
+            self.container['height'] = new_bounds['height']
     
-    def add_part(self, points, part_id=None):
+    def add_part(self, points, part_id=None, quantity=1, holes=None):
         """
         Add a part to be nested
         
         Args:
             points: List of points defining the part polygon
             part_id: Optional ID for the part
+            quantity: Number of copies to nest; the shape is processed once
+            holes: Optional list of point lists, holes cut out of the part that
+                   smaller parts can be placed in when 'use_holes' is set
         """
         if not points or len(points) < 3:
             raise ValueError("Part must have at least 3 points")
         
-        # Normalize the part
-        normalized_points = GeometryUtils.normalize_polygon(points)
+        if int(quantity) != quantity or quantity < 1:
+            raise ValueError("Part quantity must be a positive integer")
         
-        # Apply spacing offset
+        # Normalize the part, moving its holes along with it
+        source = Polygon.from_points(points)
+        normalized_points = GeometryUtils.normalize_polygon(source)
+        min_x, min_y = source.bbox[:2]
+        hole_polygons = [Polygon.from_points(hole).translate(-min_x, -min_y)
+                         for hole in holes or [] if len(hole) >= 3]
+        
+        # Apply spacing offset; holes shrink as the part grows
         if self.config['spacing'] > 0:
             offset_points = GeometryUtils.polygon_offset(
                 normalized_points, 
                 self.config['spacing'] / 2,
-                self.config['curve_tolerance']
+                self.config['curve_tolerance'],
+                self.config['clipper_scale']
             )
             if offset_points:
                 normalized_points = offset_points
+            
+            hole_polygons = [GeometryUtils.polygon_offset(hole, -self.config['spacing'] / 2,
+                                                          self.config['curve_tolerance'],
+                                                          self.config['clipper_scale'])
+                             for hole in hole_polygons]
+            hole_polygons = [hole for hole in hole_polygons if len(hole) >= 3]
+        
+        # Simplify the outline outward and the holes inward, so no part overlaps another
+        if self.config['simplify']:
+            normalized_points = self._simplify(normalized_points, outward=True)
+            hole_polygons = [self._simplify(hole, outward=False) for hole in hole_polygons]
         
         part = {
             'id': len(self.parts) if part_id is None else part_id,
             'points': normalized_points,
-            'area': abs(GeometryUtils.polygon_area(normalized_points))
+            'holes': hole_polygons,
+            'area': abs(normalized_points.area) - sum(abs(hole.area) for hole in hole_polygons),
+            'quantity': int(quantity)
         }
         
         self.parts.append(part)
     
+    def _simplify(self, polygon, outward):
+        """Simplify a shape within the curve tolerance and count its vertices"""
+        simplified = GeometryUtils.simplify_polygon(
+            polygon,
+            self.config['curve_tolerance'],
+            outward,
+            self.config['clipper_scale']
+        )
+        self.simplification['shapes'] += 1
+        self.simplification['vertices_before'] += len(polygon)
+        self.simplification['vertices_after'] += len(simplified)
+        return simplified
+    
     def add_parts(self, parts_list):
         """
         Add multiple parts at once
         
         Args:
             parts_list: List of point lists or dict with 'points' key
+                       and optional 'id', 'quantity' and 'holes' keys
         """
         for i, part_data in enumerate(parts_list):
+            quantity = 1
+            holes = None
             if isinstance(part_data, dict) and 'points' in part_data:
                 points = part_data['points']
                 part_id = part_data.get('id', len(self.parts))
+                quantity = part_data.get('quantity', 1)
+                holes = part_data.get('holes')
             else:
                 points = part_data
                 part_id = len(self.parts)
             
-            self.add_part(points, part_id)
+            self.add_part(points, part_id, quantity, holes)
+    
+    def total_quantity(self):
+        """Number of part instances to nest (sum of part quantities)"""
+        return sum(part['quantity'] for part in self.parts)
     
     def clear_parts(self):
         """Clear all parts"""
         self.parts = []
-        self.nfp_cache = {}
+        self.sorted_parts = []
+        self.nfp_cache.clear()
         self.best_result = None
         self.ga = None
+        self.atlas = None
+        self.coarse_parts = []
+        self.coarse_atlas = None
+    
+    def _prepare(self):
+        """Sort the parts and build the rotation atlas and GA, once per set of parts"""
+        if not self.ga:
+            # Sort parts by area (largest first); placements refer to this order
+            self.sorted_parts = sorted(self.parts, key=lambda p: p['area'], reverse=True)
+            
+            # Rotate every part once and share the result with the GA and the workers
+            self.atlas = RotationAtlas(self.sorted_parts, self.container, self.config['rotations'])
+            
+            # Coarse outlines in the same order, so genomes mean the same at both fidelities
+            if self._multi_fidelity():
+                tolerance = self.config['coarse_tolerance'] or 10 * self.config['curve_tolerance']
+                self.coarse_parts = [self._coarse_part(part, tolerance) for part in self.sorted_parts]
+                self.coarse_atlas = RotationAtlas(self.coarse_parts, self.container, self.config['rotations'])
+            
+            # Initialize genetic algorithm
+            self.ga = GeneticAlgorithm(self.sorted_parts, self.container, self.config, self.atlas)
+            self.refined_fitness = OrderedDict()
+        
+        return self.sorted_parts
+    
+    def _multi_fidelity(self):
+        """True if early generations are evaluated on coarse outlines"""
+        return bool(self.config['coarse_generations']) or self.config['coarse_seconds'] is not None
+    
+    def _coarse_part(self, part, tolerance):
+        """
+        Copy of a part with its outline simplified outward and its holes inward by a coarse tolerance
+        
+        A coarse shape that is not simple or has turned around is replaced by
+        the exact one, so the NFP code never sees it.
+        """
+        scale = self.config['clipper_scale']
+        
+        def coarse_shape(shape, outward):
+            simplified = GeometryUtils.simplify_polygon(shape, tolerance, outward, scale)
+            if not GeometryUtils.is_simple(simplified) or (simplified.area > 0) != (shape.area > 0):
+                return shape
+            return simplified
+        
+        coarse = dict(part)
+        coarse['points'] = coarse_shape(part['points'], True)
+        coarse['holes'] = [coarse_shape(hole, False) for hole in part.get('holes', [])]
+        return coarse
+    
+    def _in_coarse_phase(self, generation, elapsed):
+        """True while generations are still evaluated on coarse outlines"""
+        if not self._multi_fidelity():
+            return False
+        generations = self.config['coarse_generations']
+        if generations and generation >= generations:
+            return False
+        return self.config['coarse_seconds'] is None or elapsed < self.config['coarse_seconds']
+    
+    def _refine(self, evaluator):
+        """
+        Place the best individuals of a coarse generation with exact outlines
+        
+        Genomes refined in an earlier generation (e.g. the elite) are served
+        from ``refined_fitness`` instead of being placed again.
+        
+        Returns:
+            dict: The best refined individual, with exact fitness and result
+        """
+        refined = {}
+        for individual in sorted(self.ga.population, key=lambda x: x['fitness']):
+            if len(refined) >= max(1, self.config['coarse_refine']):
+                break
+            key = GeneticAlgorithm.genome_key(individual)
+            if key in refined:
+                continue
+            refined[key] = {
+                'placement': list(individual['placement']),
+                'rotation': list(individual['rotation']),
+                'fitness': float('inf')
+            }
+            cached = self.refined_fitness.get(key)
+            if cached is not None:
+                refined[key]['fitness'], refined[key]['result'] = cached
+        
+        evaluator.evaluate(list(refined.values()))
+        
+        for key, individual in refined.items():
+            self.refined_fitness[key] = (individual['fitness'], individual['result'])
+            self.refined_fitness.move_to_end(key)
+        while len(self.refined_fitness) > self.config['fitness_cache_size']:
+            self.refined_fitness.popitem(last=False)
+        
+        return min(refined.values(), key=lambda x: x['fitness'])
+    
+    def _nfp_pairs(self, atlas=None):
+        """Enumerate the NFPs the placement worker will ask for, for the given (or exact) atlas"""
+        atlas = atlas or self.atlas
+        part_angles = [atlas.valid_angles(part_index) or [0]
+                       for part_index in range(len(self.sorted_parts))]
+        
+        # Inner NFPs against the container
+        for part_index, angles in enumerate(part_angles):
+            for angle in angles:
+                yield self.container['points'], atlas.get(part_index, angle)['points'], True
+        
+        # Outer NFPs are stored for the unrotated placed part, once per relative rotation
+        for placed_index, placed_angles in enumerate(part_angles):
+            placed_points = atlas.get(placed_index, 0)['points']
+            for part_index, angles in enumerate(part_angles):
+                relative_angles = {RotationAtlas.relative_angle(angle, placed_angle)
+                                   for angle in angles for placed_angle in placed_angles}
+                for relative in sorted(relative_angles):
+                    yield placed_points, atlas.get(part_index, relative)['points'], False
+        
+        # Inner NFPs of the holes of every placed part and angle, against the parts that fit
+        if self.config['use_holes']:
+            for placed_index, placed_angles in enumerate(part_angles):
+                for placed_angle in placed_angles:
+                    for hole in atlas.get(placed_index, placed_angle)['holes']:
+                        for part_index, angles in enumerate(part_angles):
+                            for angle in angles:
+                                entry = atlas.get(part_index, angle)
+                                if RotationAtlas.fits(entry['bounds'], hole.bounds):
+                                    yield hole, entry['points'], True
+    
+    def precompute_nfps(self, progress_callback=None):
+        """
+        Compute every NFP the placement worker needs before evolution starts
+        
+        Runs on a process pool when the 'workers' setting is greater than 1.
+        Already cached NFPs are skipped, so calling this again is cheap.
+        With coarse generations configured, the NFPs of the coarse outlines
+        are computed too.
+        
+        Args:
+            progress_callback: Optional callback function for progress updates
+        
+        Returns:
+            int: Number of NFPs computed
+        """
+        if not self.container:
+            raise ValueError("No container defined")
+        
+        if not self.parts:
+            raise ValueError("No parts to nest")
+        
+        self._prepare()
+        pairs = self._nfp_pairs()
+        if self.coarse_atlas is not None:
+            pairs = itertools.chain(pairs, self._nfp_pairs(self.coarse_atlas))
+        computed = self.nfp_cache.precompute(
+            pairs,
+            workers=self.config['workers'],
+            progress_callback=progress_callback
+        )
+        self.nfp_cache.flush()
+        return computed
     
     def run(self, max_generations=None, progress_callback=None):
         """
         Run the nesting algorithm
         
+        With ``coarse_generations`` or ``coarse_seconds`` set, generations are
+        first evaluated with coarse outlines (simplified outward by
+        ``coarse_tolerance``), which makes the NFPs and placements cheaper; the
+        best ``coarse_refine`` individuals of each of these generations are
+        placed again with the exact outlines, so the best result is always an
+        exact layout.  Once either limit is reached the population is
+        re-evaluated with exact outlines and evolution continues on those.
+        
         Args:
             max_generations: Maximum number of generations to run
             progress_callback: Optional callback function for progress updates
@@ -146,45 +410,66 @@ class Nester:
         
         max_gen = max_generations or self.config['max_generations']
         
-        # Sort parts by area (largest first)
-        sorted_parts = sorted(self.parts, key=lambda p: p['area'], reverse=True)
+        sorted_parts = self._prepare()
+        total_parts = self.total_quantity()
         
-        # Initialize genetic algorithm
-        if not self.ga:
-            self.ga = GeneticAlgorithm(sorted_parts, self.container, self.config)
-        
-        # Run genetic algorithm
-        for generation in range(max_gen):
-            # Evaluate fitness for all individuals
-            for individual in self.ga.population:
-                if individual['fitness'] == float('inf'):
-                    worker = PlacementWorker(self.container, sorted_parts, self.nfp_cache, self.config)
-                    result = worker.place_parts(individual)
-                    individual['fitness'] = result['fitness']
-                    individual['result'] = result
-            
-            # Update best result
-            current_best = self.ga.get_best()
-            if self.best_result is None or current_best['fitness'] < self.best_result['fitness']:
-                self.best_result = copy.deepcopy(current_best)
-            
-            # Progress callback
-            if progress_callback:
-                stats = self.ga.get_statistics()
-                stats['best_placed'] = current_best.get('result', {}).get('placed_count', 0)
-                stats['total_parts'] = len(sorted_parts)
-                progress_callback(stats)
-            
-            # Evolve to next generation
-            if generation < max_gen - 1:
-                self.ga.evolve()
+        if self.config['precompute_nfp']:
+            self.precompute_nfps()
+        
+        start_time = time.perf_counter()
+        
+        # Ship the problem (with the precomputed NFPs) to the evaluation workers once
+        with PopulationEvaluator(self.container, sorted_parts, self.nfp_cache, self.config, self.atlas,
+                                 self.coarse_parts, self.coarse_atlas) as evaluator:
+            coarse_phase = self.coarse_atlas is not None
             
-            # Early termination if all parts are placed
-            if current_best.get('result', {}).get('placed_count', 0) == len(sorted_parts):
-                break
+            # Run genetic algorithm
+            for generation in range(max_gen):
+                coarse = coarse_phase and self._in_coarse_phase(generation, time.perf_counter() - start_time)
+                if coarse_phase and not coarse:
+                    # Switch-over: coarse fitness values do not compare with exact ones,
+                    # but the refined genomes already have exact results
+                    coarse_phase = False
+                    self.ga.reset_fitness()
+                    self.ga.fitness_cache.update(self.refined_fitness)
+                
+                # Evaluate fitness for all new individuals, reusing results of known genomes
+                self.ga.apply_cached_fitness()
+                evaluator.evaluate(self.ga.population, coarse)
+                self.ga.cache_fitness()
+                
+                # Update best result, from exact placements only
+                current_best = self._refine(evaluator) if coarse else self.ga.get_best()
+                if self.best_result is None or current_best['fitness'] < self.best_result['fitness']:
+                    self.best_result = copy.deepcopy(current_best)
+                
+                # Progress callback
+                if progress_callback:
+                    stats = self.ga.get_statistics()
+                    stats['best_placed'] = current_best.get('result', {}).get('placed_count', 0)
+                    stats['total_parts'] = total_parts
+                    stats['fidelity'] = 'coarse' if coarse else 'exact'
+                    stats['nfp_cache'] = self.nfp_cache.get_statistics()
+                    progress_callback(stats)
+                
+                # Evolve to next generation
+                if generation < max_gen - 1:
+                    self.ga.evolve()
+                
+                # Early termination if all parts are placed
+                if current_best.get('result', {}).get('placed_count', 0) == total_parts:
+                    break
+        
+        # Record the persistent store entries this run read, so eviction keeps them
+        self.nfp_cache.flush()
         
         return self.get_best_result()
     
+    def close(self):
+        """Write pending updates to the persistent NFP cache and close it"""
+        if self.nfp_store is not None:
+            self.nfp_store.close()
+    
     def get_best_result(self):
         """Get the best nesting result"""
         if not self.best_result:
@@ -196,12 +481,21 @@ class Nester:
             'fitness': self.best_result['fitness'],
             'placements': result.get('placements', []),
             'placed_count': result.get('placed_count', 0),
-            'total_parts': len(self.parts),
+            'total_parts': self.total_quantity(),
             'utilization': result.get('utilization', 0),
-            'container': self.container,
-            'parts': self.parts
+            'container': self._export_shape(self.container),
+            'parts': [self._export_shape(part) for part in self.parts]
         }
     
+    @staticmethod
+    def _export_shape(shape):
+        """Copy a container/part dict with its points (and holes) in the public list-of-dicts format"""
+        exported = dict(shape)
+        exported['points'] = shape['points'].to_points()
+        if 'holes' in shape:
+            exported['holes'] = [hole.to_points() for hole in shape['holes']]
+        return exported
+    
     def get_placement_data(self):
         """Get detailed placement data for visualization"""
         result = self.get_best_result()
@@ -212,28 +506,28 @@ class Nester:
         
         for bin_placements in result['placements']:
             bin_data = {
-                'container': self.container,
+                'container': self._export_shape(self.container),
                 'parts': []
             }
             
             for placement in bin_placements:
-                part_id = int(placement['p_id'])
-                part = self.parts[part_id]
+                part = self.sorted_parts[int(placement['p_id'])]
                 
                 # Get rotated and translated points
                 points = part['points']
+                holes = part.get('holes', [])
                 if placement['rotation'] != 0:
-                    rotated = GeometryUtils.rotate_polygon(points, placement['rotation'])
-                    points = rotated['points']
+                    points = points.rotate(placement['rotation'])
+                    holes = [hole.rotate(placement['rotation']) for hole in holes]
                 
-                translated_points = GeometryUtils.translate_polygon(
-                    points, placement['x'], placement['y']
-                )
+                translated_points = points.translate(placement['x'], placement['y'])
                 
                 bin_data['parts'].append({
-                    'id': part_id,
-                    'original_points': part['points'],
-                    'placed_points': translated_points,
+                    'id': part['id'],
+                    'original_points': part['points'].to_points(),
+                    'placed_points': translated_points.to_points(),
+                    'placed_holes': [hole.translate(placement['x'], placement['y']).to_points()
+                                     for hole in holes],
                     'x': placement['x'],
                     'y': placement['y'],
                     'rotation': placement['rotation']
@@ -0,0 +1,356 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from .nfp_calculator import NFPCalculator
+from .packed_nfp import PackedNFP
+from .polygon import Polygon
+from .shared_nfp_store import SharedNFPStore
+
+
+def _calculate_at_origin(polygon_a, polygon_b, inside, config):
+    """Calculate an NFP with both polygons moved to their fingerprint origins, packed"""
+    ax, ay = NFPCache._origin(polygon_a)
+    bx, by = NFPCache._origin(polygon_b)
+    scale = config.get('clipper_scale', Polygon.CLIPPER_SCALE)
+    return PackedNFP.from_polygons(NFPCalculator.calculate_nfp(
+        polygon_a.translate(-ax, -ay),
+        polygon_b.translate(-bx, -by),
+        inside,
+        config.get('explore_concave', False),
+        scale=scale
+    ), scale)
+
+
+def _calculate_chunk(chunk, config):
+    """
+    Process pool task: calculate a chunk of ``(key, polygon_a, polygon_b, inside)`` jobs
+
+    Returns ``(key, nfp, seconds)`` per job.
+    """
+    results = []
+    for key, polygon_a, polygon_b, inside in chunk:
+        start = time.perf_counter()
+        nfp = _calculate_at_origin(polygon_a, polygon_b, inside, config)
+        results.append((key, nfp, time.perf_counter() - start))
+    return results
+
+
+class NFPCache:
+    """
+    In-memory NFP cache keyed by geometry fingerprints
+
+    NFPs are computed and stored for both shapes moved to their fingerprint
+    origin, so every copy of a shape (e.g. 40 identical brackets read from a
+    DXF) shares one entry regardless of its part id or position.  Entries are
+    ``PackedNFP``s, one int64 buffer of clipper coordinates per NFP.  An
+    optional ``PersistentNFPStore`` is consulted on misses.
+
+    Memory is bounded by the ``nfp_cache_memory_mb`` setting: once the
+    stored coordinates exceed it, least recently used entries are evicted.
+    
+    For process pools, ``share`` publishes the entries to a
+    ``SharedNFPStore``; a pickled copy of the cache then carries only the
+    store's name and reads the NFPs from shared memory.
+    """
+
+    # Approximate per-entry overhead (PackedNFP object and array headers) in bytes
+    ENTRY_OVERHEAD = 200
+
+    # Lookup counters that worker processes report back with their results
+    COUNTERS = ('hits', 'misses', 'evictions', 'compute_seconds', 'seconds_saved')
+
+    def __init__(self, config=None, store=None):
+        """
+        Args:
+            config: Nester configuration (NFP options and memory budget)
+            store: Optional PersistentNFPStore backing the in-memory entries
+        """
+        self.config = config or {}
+        self.store = store
+        self.shared = None
+        self.scale = self.config.get('clipper_scale', Polygon.CLIPPER_SCALE)
+        memory_mb = self.config.get('nfp_cache_memory_mb')
+        self.max_bytes = int(memory_mb * 1024 * 1024) if memory_mb else None
+        self._lock = threading.Lock()
+        self.clear()
+
+    def __getstate__(self):
+        # Locks cannot be pickled; process pool workers get a fresh one
+        state = self.__dict__.copy()
+        del state['_lock']
+        if self.shared is not None:
+            # Shared entries are read from shared memory rather than copied
+            state['_entries'] = OrderedDict()
+            state['bytes'] = 0
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def clear(self):
+        """Drop all in-memory entries and reset the counters"""
+        # key -> (nfp, size in bytes, seconds it took to compute), least recently used first
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.precomputed = 0
+        self.evictions = 0
+        self.compute_seconds = 0.0
+        self.seconds_saved = 0.0
+
+    def key(self, polygon_a, polygon_b, inside):
+        """Geometry key of an NFP under this cache's NFP options"""
+        return NFPCalculator.geometry_key(
+            polygon_a, polygon_b, inside,
+            self.config.get('explore_concave', False),
+            self.scale
+        )
+
+    def get(self, polygon_a, polygon_b, inside):
+        """
+        Get the NFP of polygon B against polygon A, computing it on a miss
+
+        Args:
+            polygon_a: Stationary Polygon (container or placed part)
+            polygon_b: Moving Polygon
+            inside: If True, inner NFP, otherwise outer NFP
+
+        Returns:
+            NFP Polygons for the polygons at their current positions (a list,
+            or the cached PackedNFP if no translation is needed)
+        """
+        nfp, (dx, dy) = self.get_with_offset(polygon_a, polygon_b, inside)
+        if dx == 0 and dy == 0:
+            return nfp
+        return [polygon.translate(dx, dy) for polygon in nfp]
+
+    def get_with_offset(self, polygon_a, polygon_b, inside):
+        """
+        Get the cached NFP and the translation that places it, without copying
+
+        The cached NFP is shared and must not be modified; add the offset
+        when the coordinates are consumed (e.g. passed to clipper).
+
+        Returns:
+            tuple: ``(nfp, (dx, dy))``, the PackedNFP for both shapes at their
+            fingerprint origins and ``origin(A) - origin(B)``
+        """
+        key = self.key(polygon_a, polygon_b, inside)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                nfp, _, seconds = entry
+                self.hits += 1
+                self.seconds_saved += seconds
+
+        if entry is None:
+            nfp = self.shared.get(key) if self.shared is not None else None
+            if nfp is not None:
+                with self._lock:
+                    self.hits += 1
+            else:
+                seconds = 0.0
+                nfp = self._load(key)
+                if nfp is None:
+                    start = time.perf_counter()
+                    nfp = _calculate_at_origin(polygon_a, polygon_b, inside, self.config)
+                    seconds = time.perf_counter() - start
+                    self._save(key, nfp)
+                with self._lock:
+                    self.misses += 1
+                    self.compute_seconds += seconds
+                self._insert(key, nfp, seconds)
+
+        # Move the cached NFP from the fingerprint origins to the actual positions
+        ax, ay = self._origin(polygon_a)
+        bx, by = self._origin(polygon_b)
+        return nfp, (ax - bx, ay - by)
+
+    def get_relative(self, polygon_a, rotation_a, polygon_b):
+        """
+        Get the outer NFP of a rotated stationary polygon from its unrotated entry
+
+        Minkowski sums commute with rotation, so
+        ``NFP(rot(A, a), rot(B, b)) = rot(NFP(A, rot(B, b - a)), a)``: one
+        entry per relative rotation serves every pair of absolute rotations.
+
+        Args:
+            polygon_a: Unrotated stationary Polygon
+            rotation_a: Rotation of the stationary polygon in degrees
+            polygon_b: Moving Polygon rotated by the relative angle ``b - a``
+
+        Returns:
+            tuple: ``(nfp, (dx, dy), rotation)``; the shared cached NFP is
+            rotated by ``rotation`` about the origin and then moved by the offset
+            to give the NFP against ``rot(A, a)``
+        """
+        nfp, offset = self.get_with_offset(polygon_a, polygon_b, False)
+        if rotation_a:
+            offset = tuple((np.array(offset) @ Polygon.rotation_matrix(rotation_a)).tolist())
+        return nfp, offset, rotation_a
+
+    def precompute(self, pairs, workers=1, chunk_size=None, progress_callback=None):
+        """
+        Fill the cache for many polygon pairs up front
+
+        Pairs are deduplicated by geometry key and already cached entries are
+        skipped; the rest are calculated in chunks, on a process pool when
+        ``workers`` is greater than 1.
+
+        Args:
+            pairs: Iterable of ``(polygon_a, polygon_b, inside)`` tuples
+            workers: Number of worker processes
+            chunk_size: Jobs per task, by default about four tasks per worker
+            progress_callback: Optional callback receiving
+                ``{'stage': 'nfp_precompute', 'done': int, 'total': int, 'nfp_cache': dict}``
+
+        Returns:
+            int: Number of NFPs calculated
+        """
+        pending = {}
+        for polygon_a, polygon_b, inside in pairs:
+            key = self.key(polygon_a, polygon_b, inside)
+            if key in self._entries or key in pending:
+                continue
+            nfp = self._load(key)
+            if nfp is not None:
+                self._insert(key, nfp, 0.0)
+                continue
+            pending[key] = (key, polygon_a, polygon_b, inside)
+
+        jobs = list(pending.values())
+        total = len(jobs)
+        if not total:
+            return 0
+
+        chunk_size = chunk_size or max(1, math.ceil(total / (max(workers, 1) * 4)))
+        chunks = [jobs[i:i + chunk_size] for i in range(0, total, chunk_size)]
+        done = 0
+
+        def collect(results):
+            nonlocal done
+            for key, nfp, seconds in results:
+                self._insert(key, nfp, seconds)
+                self._save(key, nfp)
+                self.compute_seconds += seconds
+            done += len(results)
+            self.precomputed += len(results)
+            if progress_callback:
+                progress_callback({'stage': 'nfp_precompute', 'done': done, 'total': total,
+                                   'nfp_cache': self.get_statistics()})
+
+        if workers <= 1:
+            for chunk in chunks:
+                collect(_calculate_chunk(chunk, self.config))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_calculate_chunk, chunk, self.config) for chunk in chunks]
+                for future in as_completed(futures):
+                    collect(future.result())
+
+        return total
+
+    def share(self):
+        """
+        Publish the in-memory entries to shared memory for worker processes
+        
+        Entries already shared are skipped, so this can be called again to add
+        NFPs computed since.
+        
+        Returns:
+            int: Number of entries added to the shared store
+        """
+        if self.shared is None:
+            self.shared = SharedNFPStore(self.scale)
+        with self._lock:
+            entries = [(key, nfp) for key, (nfp, _, _) in self._entries.items()]
+        return self.shared.add(entries)
+    
+    def unshare(self):
+        """Free the shared memory store"""
+        if self.shared is not None:
+            self.shared.close()
+            self.shared = None
+    
+    def _insert(self, key, nfp, seconds):
+        """Add an entry and evict least recently used ones while over the memory budget"""
+        size = nfp.nbytes + self.ENTRY_OVERHEAD
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+
+            self._entries[key] = (nfp, size, seconds)
+            self.bytes += size
+
+            # The newest entry is always kept, even if it alone exceeds the budget
+            while self.max_bytes is not None and self.bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def _load(self, key):
+        """Read an NFP from the persistent store, if there is one"""
+        if self.store is None:
+            return None
+        nfp = self.store.get(self.store.make_key(key, self.config))
+        return PackedNFP.from_polygons(nfp, self.scale) if nfp is not None else None
+
+    def _save(self, key, nfp):
+        """Write an NFP to the persistent store, if there is one"""
+        if self.store is not None:
+            self.store.put(self.store.make_key(key, self.config), nfp)
+
+    def flush(self):
+        """Write pending last-use times of the persistent store, if there is one"""
+        if self.store is not None:
+            self.store.flush()
+
+    @staticmethod
+    def _origin(polygon):
+        """Lower-left bounding box corner, the origin the fingerprint is taken from"""
+        bbox = polygon.bbox
+        return (bbox[0], bbox[1]) if bbox else (0.0, 0.0)
+
+    def counters(self):
+        """Current values of the lookup counters in ``COUNTERS``"""
+        with self._lock:
+            return {name: getattr(self, name) for name in self.COUNTERS}
+
+    def add_counters(self, deltas):
+        """Add lookup counter changes made by another copy of the cache (e.g. in a worker process)"""
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def get_statistics(self):
+        """Get hit/miss counters, memory use and compute time saved by hits"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'precomputed': self.precomputed,
+            'evictions': self.evictions,
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'shared_entries': len(self.shared) if self.shared is not None else 0,
+            'shared_bytes': self.shared.nbytes if self.shared is not None else 0,
+            'compute_seconds': self.compute_seconds,
+            'seconds_saved': self.seconds_saved,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
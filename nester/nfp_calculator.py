@@ -1,14 +1,16 @@
-import math
-import copy
+import numpy as np
 import pyclipper
-from .geometry_utils import GeometryUtils
+from .geometry_utils import GeometryUtils, TOL
+from .orbital_nfp import orbital_nfp
+from .polygon import Polygon
 
 
 class NFPCalculator:
     """No Fit Polygon calculator using Minkowski difference and other methods"""
     
     @staticmethod
-    def calculate_nfp(polygon_a, polygon_b, inside=False, explore_concave=False, use_holes=False):
+    def calculate_nfp(polygon_a, polygon_b, inside=False, explore_concave=False, use_holes=False,
+                      scale=Polygon.CLIPPER_SCALE):
         """
         Calculate No Fit Polygon between two polygons
         
@@ -18,26 +20,38 @@ class NFPCalculator:
             inside: If True, calculate inner NFP, otherwise outer NFP
             explore_concave: If True, explore concave areas for better placement
             use_holes: If True, consider holes in polygons
+            scale: Clipper units per drawing unit for the clipper-based methods
         
         Returns:
-            List of NFP polygons
+            List of NFP polygons, expressed as translations to apply to polygon B.
+            An outer NFP is a counterclockwise boundary, followed by clockwise
+            holes where B interlocks into A when ``explore_concave`` is set.
         """
+        polygon_a = Polygon.from_points(polygon_a)
+        polygon_b = Polygon.from_points(polygon_b)
+        
         if inside:
             # For inner NFP (polygon B inside polygon A)
             if GeometryUtils.is_rectangle(polygon_a):
-                return NFPCalculator._nfp_rectangle(polygon_a, polygon_b)
+                return NFPCalculator._nfp_rectangle(polygon_a, polygon_b, scale)
             else:
-                return NFPCalculator._nfp_polygon_inside(polygon_a, polygon_b, explore_concave)
+                return NFPCalculator._nfp_polygon_inside(polygon_a, polygon_b, explore_concave, scale)
         else:
-            # For outer NFP (polygon B outside polygon A)
+            # For outer NFP (polygon B outside polygon A); convex pairs have closed forms
+            kinds = {polygon_a.shape_class, polygon_b.shape_class}
+            if kinds == {'rectangle'}:
+                return NFPCalculator._nfp_rectangles(polygon_a, polygon_b)
+            if 'general' not in kinds:
+                return NFPCalculator._nfp_convex(polygon_a, polygon_b)
+            
             if explore_concave:
                 # Use more advanced NFP calculation for concave exploration
-                return NFPCalculator._nfp_polygon_orbital(polygon_a, polygon_b)
+                return NFPCalculator._nfp_polygon_orbital(polygon_a, polygon_b, scale)
             else:
-                return NFPCalculator._minkowski_difference(polygon_a, polygon_b)
+                return NFPCalculator._minkowski_difference(polygon_a, polygon_b, scale)
 
     @staticmethod
-    def _nfp_rectangle(rect_polygon, polygon):
+    def _nfp_rectangle(rect_polygon, polygon, scale=Polygon.CLIPPER_SCALE):
         """Calculate NFP for rectangle container"""
         bounds_rect = GeometryUtils.get_polygon_bounds(rect_polygon)
         bounds_poly = GeometryUtils.get_polygon_bounds(polygon)
@@ -46,209 +60,255 @@ class NFPCalculator:
         nfp_width = bounds_rect['width'] - bounds_poly['width']
         nfp_height = bounds_rect['height'] - bounds_poly['height']
         
-        if nfp_width <= 0 or nfp_height <= 0:
+        if nfp_width < -TOL or nfp_height < -TOL:
             return []
         
-        # Create the NFP rectangle
-        nfp = [
-            {'x': bounds_rect['x'], 'y': bounds_rect['y']},
-            {'x': bounds_rect['x'] + nfp_width, 'y': bounds_rect['y']},
-            {'x': bounds_rect['x'] + nfp_width, 'y': bounds_rect['y'] + nfp_height},
-            {'x': bounds_rect['x'], 'y': bounds_rect['y'] + nfp_height}
-        ]
+        # Where the polygon fits exactly the region is a line, which clipper drops; grown
+        # across by the exact-fit margin, as for irregular containers, it stays a sliver
+        margin = GeometryUtils.exact_fit_margin(scale)
+        pad_x = margin if nfp_width < margin else 0.0
+        pad_y = margin if nfp_height < margin else 0.0
+        nfp_width = max(nfp_width, 0.0) + 2 * pad_x
+        nfp_height = max(nfp_height, 0.0) + 2 * pad_y
+        
+        # Create the NFP rectangle, as translations of the polygon from where it is now
+        x = bounds_rect['x'] - bounds_poly['x'] - pad_x
+        y = bounds_rect['y'] - bounds_poly['y'] - pad_y
+        nfp = Polygon([
+            (x, y),
+            (x + nfp_width, y),
+            (x + nfp_width, y + nfp_height),
+            (x, y + nfp_height)
+        ])
         
         return [nfp]
 
     @staticmethod
-    def _nfp_polygon_inside(polygon_a, polygon_b, explore_concave=False):
-        """Calculate NFP for irregular polygon container (inner NFP)"""
+    def _nfp_rectangles(rect_a, rect_b):
+        """Outer NFP of two axis-aligned rectangles, in O(1)"""
+        min_xa, min_ya, max_xa, max_ya = rect_a.bbox
+        min_xb, min_yb, max_xb, max_yb = rect_b.bbox
+        
+        # B + v overlaps A exactly when v lies strictly inside this rectangle
+        x0, x1 = min_xa - max_xb, max_xa - min_xb
+        y0, y1 = min_ya - max_yb, max_ya - min_yb
+        return [Polygon([(x0, y0), (x1, y0), (x1, y1), (x0, y1)])]
+    
+    @staticmethod
+    def _nfp_convex(polygon_a, polygon_b):
+        """
+        Outer NFP of two convex polygons, in O(n + m)
+        
+        The Minkowski sum of A and -B, built by merging the edges of both
+        counterclockwise rings in order of their direction.
+        """
+        rings = []
+        for coords in (polygon_a.coords, -polygon_b.coords):
+            ring = Polygon(coords)
+            if ring.area < 0:
+                coords = coords[::-1]
+            
+            # Start at the lowest (then leftmost) vertex, so edge angles increase from 0 to 2 pi
+            start = np.lexsort((coords[:, 0], coords[:, 1]))[0]
+            coords = np.roll(coords, -start, axis=0)
+            edges = np.roll(coords, -1, axis=0) - coords
+            edges = edges[np.any(edges != 0, axis=1)]
+            rings.append((coords[0], edges))
+        
+        (start_a, edges_a), (start_b, edges_b) = rings
+        edges = np.concatenate([edges_a, edges_b])
+        angles = np.arctan2(edges[:, 1], edges[:, 0]) % (2 * np.pi)
+        order = np.argsort(angles, kind='stable')
+        
+        vertices = start_a + start_b + np.cumsum(edges[order], axis=0)
+        return [Polygon(np.roll(vertices, 1, axis=0))]
+    
+    @staticmethod
+    def _nfp_polygon_inside(polygon_a, polygon_b, explore_concave=False, scale=Polygon.CLIPPER_SCALE):
+        """
+        Calculate the inner-fit polygon of B in an irregular container A
+        
+        B + v lies inside A exactly when a vertex of B does and the boundary of
+        B + v crosses no edge of A.  The region is therefore A, moved back by
+        that vertex, minus the Minkowski sum of A's boundary with -B; every
+        point in it is a valid position.
+        """
         if explore_concave:
             # Use more sophisticated orbital method for concave exploration
-            return NFPCalculator._nfp_polygon_orbital_inside(polygon_a, polygon_b)
+            return NFPCalculator._nfp_polygon_orbital_inside(polygon_a, polygon_b, scale)
         
-        # Simplified implementation using Minkowski sum
-        clipper_a = NFPCalculator._to_clipper_coords(polygon_a)
-        clipper_b = NFPCalculator._to_clipper_coords(polygon_b)
+        clipper_a = NFPCalculator._to_clipper_coords(polygon_a, scale)
+        clipper_b = NFPCalculator._to_clipper_coords(polygon_b, scale)
+        if len(clipper_a) < 3 or len(clipper_b) < 3:
+            return []
         
-        # Reverse polygon B for Minkowski sum
-        clipper_b_reversed = [[-p[0], -p[1]] for p in reversed(clipper_b)]
+        def fit_region(part):
+            # Translations where the boundary of the part touches or crosses the boundary of A
+            crossing = pyclipper.MinkowskiSum(-part, clipper_a, True)
+            pc = pyclipper.Pyclipper()
+            pc.AddPath(clipper_a - part[0], pyclipper.PT_SUBJECT, True)
+            pc.AddPaths(crossing, pyclipper.PT_CLIP, True)
+            return pc.Execute(pyclipper.CT_DIFFERENCE, pyclipper.PFT_NONZERO, pyclipper.PFT_NONZERO)
         
         try:
-            # Use Minkowski sum to approximate inner NFP
-            pc = pyclipper.Pyclipper()
-            pc.AddPath(clipper_a, pyclipper.PT_SUBJECT, True)
-            pc.AddPath(clipper_b_reversed, pyclipper.PT_CLIP, True)
-            
-            solution = pc.Execute(pyclipper.CT_DIFFERENCE, pyclipper.PFT_NONZERO, pyclipper.PFT_NONZERO)
+            solution = fit_region(clipper_b)
             
-            if solution:
-                result = []
-                for poly in solution:
-                    result.append(NFPCalculator._from_clipper_coords(poly))
-                return result
-            
-        except Exception:
-            pass
+            # Where B fits exactly the region is a line, which clipper drops; B shrunk by
+            # the exact-fit margin keeps it as a sliver (thin parts too narrow to shrink are kept)
+            offset = pyclipper.PyclipperOffset()
+            offset.AddPath(clipper_b, pyclipper.JT_MITER, pyclipper.ET_CLOSEDPOLYGON)
+            shrunk = offset.Execute(-round(GeometryUtils.exact_fit_margin(scale) * scale))
+            padded = fit_region(np.array(shrunk[0], dtype=np.int64)) if len(shrunk) == 1 else []
+        except pyclipper.ClipperException:
+            return []
+        
+        # The shrunk part may overhang A's edges by the margin, so its region only adds
+        # the slivers of exact fits, away from where B fits with room to spare
+        if padded:
+            try:
+                grown = pyclipper.PyclipperOffset(miter_limit=10)
+                grown.AddPaths(solution, pyclipper.JT_MITER, pyclipper.ET_CLOSEDPOLYGON)
+                pc = pyclipper.Pyclipper()
+                pc.AddPaths(padded, pyclipper.PT_SUBJECT, True)
+                if solution:
+                    pc.AddPaths(grown.Execute(2 * round(GeometryUtils.exact_fit_margin(scale) * scale)),
+                                pyclipper.PT_CLIP, True)
+                solution += pc.Execute(pyclipper.CT_DIFFERENCE, pyclipper.PFT_NONZERO, pyclipper.PFT_NONZERO)
+            except pyclipper.ClipperException:
+                pass
         
-        return []
+        return [NFPCalculator._from_clipper_coords(poly, scale) for poly in solution]
 
     @staticmethod
-    def _minkowski_difference(polygon_a, polygon_b):
+    def _minkowski_difference(polygon_a, polygon_b, scale=Polygon.CLIPPER_SCALE):
         """Calculate Minkowski difference for outer NFP"""
+        solution = NFPCalculator._minkowski_paths(polygon_a, polygon_b, scale)
+        if not solution:
+            return []
+        
+        # The largest area polygon is the main NFP; the sum is already in translation
+        # space: B + v touches A for v on the boundary
+        largest_poly = max(solution, key=lambda poly: abs(pyclipper.Area(poly)))
+        return [NFPCalculator._from_clipper_coords(largest_poly, scale)]
+
+    @staticmethod
+    def _minkowski_paths(polygon_a, polygon_b, scale=Polygon.CLIPPER_SCALE):
+        """
+        Clipper paths of the Minkowski sum of A and -B: the outer boundary, and
+        a hole for every pocket B can interlock into
+        """
         # Convert to clipper coordinates
-        clipper_a = NFPCalculator._to_clipper_coords(polygon_a)
-        clipper_b = NFPCalculator._to_clipper_coords(polygon_b)
+        clipper_a = NFPCalculator._to_clipper_coords(polygon_a, scale)
+        clipper_b = NFPCalculator._to_clipper_coords(polygon_b, scale)
         
         # Reverse and negate polygon B for Minkowski difference
-        clipper_b_neg = [[-p[0], -p[1]] for p in reversed(clipper_b)]
+        clipper_b_neg = -clipper_b[::-1]
         
         try:
-            # Calculate Minkowski sum (which gives us the difference when B is negated)
-            solution = pyclipper.MinkowskiSum(clipper_a, clipper_b_neg, True)
-            
-            if not solution:
-                return []
-            
-            # Find the largest area polygon (the main NFP)
-            largest_area = 0
-            largest_poly = None
-            
-            for poly in solution:
-                area = abs(pyclipper.Area(poly))
-                if area > largest_area:
-                    largest_area = area
-                    largest_poly = poly
-            
-            if largest_poly:
-                # Translate by the first point of the original polygon B
-                if polygon_b:
-                    dx = polygon_b[0]['x']
-                    dy = polygon_b[0]['y']
-                    
-                    translated = []
-                    for point in largest_poly:
-                        translated.append([
-                            point[0] + int(dx * 1000000),
-                            point[1] + int(dy * 1000000)
-                        ])
-                    
-                    return [NFPCalculator._from_clipper_coords(translated)]
-            
+            return [poly for poly in pyclipper.MinkowskiSum(clipper_a, clipper_b_neg, True)
+                    if pyclipper.Area(poly)]
         except Exception:
-            pass
-        
-        return []
+            return []
 
     @staticmethod
-    def _to_clipper_coords(polygon):
+    def _to_clipper_coords(polygon, scale=Polygon.CLIPPER_SCALE):
         """Convert polygon to clipper integer coordinates"""
-        return [[int(p['x'] * 1000000), int(p['y'] * 1000000)] for p in polygon]
+        return Polygon.from_points(polygon).to_clipper(scale)
 
     @staticmethod
-    def _from_clipper_coords(clipper_polygon):
+    def _from_clipper_coords(clipper_polygon, scale=Polygon.CLIPPER_SCALE):
         """Convert clipper coordinates back to float"""
-        return [{'x': p[0] / 1000000.0, 'y': p[1] / 1000000.0} for p in clipper_polygon]
+        return Polygon.from_clipper(clipper_polygon, scale)
 
     @staticmethod
-    def _nfp_polygon_orbital(polygon_a, polygon_b):
-        """Calculate NFP using orbital method for better concave area exploration"""
-        # Simplified orbital calculation that tries to slide polygon B around polygon A
-        nfp_points = []
-        
-        # Get vertices and edge midpoints for better coverage
-        slide_points = list(polygon_a)  # All vertices
-        
-        # Add edge midpoints
-        for i in range(len(polygon_a)):
-            p1 = polygon_a[i]
-            p2 = polygon_a[(i + 1) % len(polygon_a)]
-            mid_x = (p1['x'] + p2['x']) / 2
-            mid_y = (p1['y'] + p2['y']) / 2
-            slide_points.append({'x': mid_x, 'y': mid_y})
-        
-        # Calculate NFP points by trying to place polygon B at each slide point
-        bounds_b = GeometryUtils.get_polygon_bounds(polygon_b)
-        
-        for slide_point in slide_points:
-            # Approximate NFP point (simplified calculation)
-            nfp_point = {
-                'x': slide_point['x'] - bounds_b['width'] / 2,
-                'y': slide_point['y'] - bounds_b['height'] / 2
-            }
-            
-            # Check if this point is not already in the list
-            is_duplicate = False
-            for existing_point in nfp_points:
-                if (abs(existing_point['x'] - nfp_point['x']) < 0.001 and 
-                    abs(existing_point['y'] - nfp_point['y']) < 0.001):
-                    is_duplicate = True
-                    break
-            
-            if not is_duplicate:
-                nfp_points.append(nfp_point)
+    def _nfp_polygon_orbital(polygon_a, polygon_b, scale=Polygon.CLIPPER_SCALE):
+        """
+        Outer NFP by sliding B around A, including pockets B can interlock into
         
-        # Sort points to form a proper polygon (clockwise)
-        if len(nfp_points) > 2:
-            nfp_points = NFPCalculator._sort_points_clockwise(nfp_points)
-            return [nfp_points]
+        Returns the counterclockwise outer boundary followed by the pockets as
+        clockwise holes.  Orbiting is slow, so it is only done when the
+        Minkowski sum shows there are pockets; otherwise, and if the orbit
+        does not close, the Minkowski difference is returned.
+        """
+        if not NFPCalculator._has_pockets(polygon_a, polygon_b, scale):
+            return NFPCalculator._minkowski_difference(polygon_a, polygon_b, scale)
         
-        return []
+        loops = orbital_nfp(NFPCalculator._counterclockwise(polygon_a),
+                            NFPCalculator._counterclockwise(polygon_b),
+                            inside=False, search_edges=True, scale=scale)
+        
+        # The outer boundary of a sane NFP encloses at least the area of A
+        if not loops or abs(Polygon(loops[0]).area) < abs(polygon_a.area):
+            return NFPCalculator._minkowski_difference(polygon_a, polygon_b, scale)
+        
+        nfp = []
+        for index, loop in enumerate(loops):
+            ring = Polygon(loop)
+            nfp.append(ring if (ring.area > 0) == (index == 0) else ring.reversed())
+        return nfp
     
     @staticmethod
-    def _nfp_polygon_orbital_inside(polygon_a, polygon_b):
-        """Calculate inner NFP using orbital method for concave exploration"""
-        nfp_points = []
-        
-        # For each edge of polygon A, calculate possible positions
-        for i in range(len(polygon_a)):
-            p1 = polygon_a[i]
-            p2 = polygon_a[(i + 1) % len(polygon_a)]
-            
-            # Calculate edge vector and normal
-            edge_dx = p2['x'] - p1['x']
-            edge_dy = p2['y'] - p1['y']
-            edge_length = math.sqrt(edge_dx * edge_dx + edge_dy * edge_dy)
-            
-            if edge_length > 0:
-                # Normalize edge vector
-                edge_dx /= edge_length
-                edge_dy /= edge_length
-                
-                # Calculate inward normal (perpendicular to edge)
-                normal_x = -edge_dy
-                normal_y = edge_dx
-                
-                # Calculate offset distance based on polygon B bounds
-                bounds_b = GeometryUtils.get_polygon_bounds(polygon_b)
-                max_extent = max(bounds_b['width'], bounds_b['height']) / 2
-                
-                # Calculate NFP point
-                nfp_x = p1['x'] + normal_x * max_extent
-                nfp_y = p1['y'] + normal_y * max_extent
-                nfp_points.append({'x': nfp_x, 'y': nfp_y})
-        
-        if len(nfp_points) > 2:
-            return [nfp_points]
-        
-        return []
+    def _has_pockets(polygon_a, polygon_b, scale=Polygon.CLIPPER_SCALE):
+        """True if the Minkowski sum of A and -B has a hole wider than the exact-fit margin"""
+        paths = NFPCalculator._minkowski_paths(polygon_a, polygon_b, scale)
+        if len(paths) < 2:
+            return False
+        
+        # Rounding leaves hairline holes where the sum folds onto itself; they hold no positions
+        outer = max(paths, key=lambda poly: abs(pyclipper.Area(poly)))
+        holes = [poly for poly in paths if (pyclipper.Area(poly) > 0) != (pyclipper.Area(outer) > 0)]
+        offset = pyclipper.PyclipperOffset()
+        offset.AddPaths(holes, pyclipper.JT_MITER, pyclipper.ET_CLOSEDPOLYGON)
+        return bool(offset.Execute(-round(GeometryUtils.exact_fit_margin(scale) * scale)))
     
     @staticmethod
-    def _sort_points_clockwise(points):
-        """Sort points in clockwise order around their centroid"""
-        if len(points) < 3:
-            return points
-        
-        # Calculate centroid
-        cx = sum(p['x'] for p in points) / len(points)
-        cy = sum(p['y'] for p in points) / len(points)
+    def _nfp_polygon_orbital_inside(polygon_a, polygon_b, scale=Polygon.CLIPPER_SCALE):
+        """
+        Inner NFP by sliding B around the inside of A
         
-        # Sort by angle from centroid
-        def angle_from_centroid(point):
-            return math.atan2(point['y'] - cy, point['x'] - cx)
+        Returns one counterclockwise polygon per separate region B fits in.
+        Falls back to the Minkowski approximation if the orbit does not close.
+        """
+        loops = orbital_nfp(NFPCalculator._counterclockwise(polygon_a),
+                            NFPCalculator._counterclockwise(polygon_b),
+                            inside=True, search_edges=True, scale=scale)
+        if loops is None:
+            return NFPCalculator._nfp_polygon_inside(polygon_a, polygon_b, scale=scale)
         
-        return sorted(points, key=angle_from_centroid, reverse=True)  # Clockwise
+        nfp = [Polygon(loop) for loop in loops]
+        return [ring if ring.area > 0 else ring.reversed() for ring in nfp]
+    
+    @staticmethod
+    def _counterclockwise(polygon):
+        """Vertices of a polygon as a counterclockwise list of ``(x, y)``"""
+        coords = polygon.coords if polygon.area >= 0 else polygon.coords[::-1]
+        return coords.tolist()
     
     @staticmethod
     def cache_key(polygon_a_id, polygon_b_id, inside, rotation_a=0, rotation_b=0):
-        """Generate cache key for NFP calculation"""
-        return f"{polygon_a_id}_{polygon_b_id}_{inside}_{rotation_a}_{rotation_b}"
\ No newline at end of file
+        """
+        Generate an id-based cache key for NFP calculation
+        
+        Not used by the nester any more, which keys NFPs by geometry with
+        ``geometry_key``; kept only for API compatibility.
+        """
+        return f"{polygon_a_id}_{polygon_b_id}_{inside}_{rotation_a}_{rotation_b}"
+
+    @staticmethod
+    def geometry_key(polygon_a, polygon_b, inside, explore_concave=False, scale=Polygon.CLIPPER_SCALE):
+        """
+        Generate a content-addressed cache key for NFP calculation
+        
+        The key is built from the translation-invariant fingerprints of both
+        polygons, so identical shapes share a key whatever their part ids or
+        positions.  NFPs are translation space results, so an NFP cached for
+        the shapes at their fingerprint origins is moved by
+        ``origin(A) - origin(B)`` to serve any translated copy.  The clipper
+        scale is part of the key, as it sets the precision of the result.
+        Part holes are not (``use_holes`` only affects placement), so the
+        same NFPs serve runs with and without part-in-part placement.
+        """
+        polygon_a = Polygon.from_points(polygon_a)
+        polygon_b = Polygon.from_points(polygon_b)
+        return (polygon_a.fingerprint, polygon_b.fingerprint, bool(inside),
+                bool(explore_concave), int(scale))
\ No newline at end of file
@@ -0,0 +1,189 @@
+import contextlib
+import hashlib
+import os
+import sqlite3
+import time
+import numpy as np
+from .polygon import Polygon
+
+
+class PersistentNFPStore:
+    """
+    On-disk NFP cache shared across runs and processes
+
+    NFPs are stored in a SQLite database in WAL mode, so any number of
+    nesting processes can read concurrently while one writes.  Entries are
+    keyed by a hash of both polygons' geometry fingerprints and the settings
+    that affect the result, and the least recently used entries are evicted
+    once the stored data exceeds ``max_bytes``.
+
+    Reads do not write: last-use times of read entries are kept in memory
+    and written in one batch with the next ``put``, on ``flush`` or on
+    ``close``.  The stored size is tracked as a running total per
+    connection and only recounted when it suggests the cap has been
+    exceeded.
+    """
+
+    # Read entries whose last-use times are written out at once, at most
+    TOUCH_BATCH = 1000
+
+    def __init__(self, path, max_bytes=512 * 1024 * 1024):
+        """
+        Args:
+            path: SQLite database file, created if missing
+            max_bytes: Size cap for stored NFP data
+        """
+        self.path = os.fspath(path)
+        self.max_bytes = max_bytes
+        self._connection = None
+        self._total = 0
+        self._touched = {}
+
+    def __getstate__(self):
+        # Connections cannot be shared between processes; reopen lazily
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        state['_touched'] = {}
+        return state
+
+    def _connect(self):
+        """Open the database on first use"""
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS nfp ('
+                'key TEXT PRIMARY KEY, data BLOB NOT NULL, '
+                'size INTEGER NOT NULL, last_used REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS nfp_last_used ON nfp (last_used)')
+            self._total = self._stored_bytes(connection)
+            self._connection = connection
+        return self._connection
+
+    @staticmethod
+    def make_key(geometry_key, config):
+        """
+        Build a store key from a geometry key and the settings that shape the parts
+
+        Args:
+            geometry_key: Key from ``NFPCalculator.geometry_key`` (fingerprints of
+                both polygons, inside flag and NFP options)
+            config: Nester configuration (spacing and curve tolerance)
+        """
+        settings = (
+            tuple(geometry_key),
+            float(config.get('spacing', 0)),
+            float(config.get('curve_tolerance', 0.3))
+        )
+        return hashlib.sha1(repr(settings).encode()).hexdigest()
+
+    @staticmethod
+    def _encode(nfp):
+        """Pack a list of polygons as ring lengths followed by their coordinates"""
+        lengths = np.array([len(polygon) for polygon in nfp], dtype=np.int64)
+        coords = [polygon.coords for polygon in nfp]
+        header = np.array([len(nfp)], dtype=np.int64)
+        body = np.concatenate(coords) if coords else np.empty((0, 2))
+        return header.tobytes() + lengths.tobytes() + np.ascontiguousarray(body, dtype=np.float64).tobytes()
+
+    @staticmethod
+    def _decode(data):
+        """Unpack the format written by ``_encode``"""
+        count = int(np.frombuffer(data, dtype=np.int64, count=1)[0])
+        lengths = np.frombuffer(data, dtype=np.int64, count=count, offset=8)
+        coords = np.frombuffer(data, dtype=np.float64, offset=8 * (count + 1)).reshape(-1, 2)
+        nfp = []
+        start = 0
+        for length in lengths.tolist():
+            nfp.append(Polygon(coords[start:start + length]))
+            start += length
+        return nfp
+
+    def get(self, key):
+        """Return the stored NFP for a key, or None"""
+        connection = self._connect()
+        row = connection.execute('SELECT data FROM nfp WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        self._touched[key] = time.time()
+        if len(self._touched) >= self.TOUCH_BATCH:
+            with self._transaction(connection):
+                self._flush(connection)
+        return self._decode(row[0])
+
+    def put(self, key, nfp):
+        """Store an NFP and evict old entries if the store is over its size cap"""
+        data = self._encode(nfp)
+        connection = self._connect()
+        with self._transaction(connection):
+            self._flush(connection)
+            row = connection.execute('SELECT size FROM nfp WHERE key = ?', (key,)).fetchone()
+            connection.execute(
+                'INSERT OR REPLACE INTO nfp (key, data, size, last_used) VALUES (?, ?, ?, ?)',
+                (key, data, len(data), time.time())
+            )
+            self._total += len(data) - (row[0] if row else 0)
+            if self._total > self.max_bytes:
+                self._evict(connection)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _transaction(connection):
+        """Run statements in one write transaction, committed at the end"""
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def _flush(self, connection):
+        """Write the last-use times of entries read since the last flush"""
+        if self._touched:
+            connection.executemany('UPDATE nfp SET last_used = ? WHERE key = ?',
+                                   [(used, key) for key, used in self._touched.items()])
+            self._touched = {}
+
+    @staticmethod
+    def _stored_bytes(connection):
+        """Total size of the stored NFP data"""
+        return connection.execute('SELECT COALESCE(SUM(size), 0) FROM nfp').fetchone()[0]
+
+    def _evict(self, connection):
+        """Delete least recently used entries until the store fits in ``max_bytes``"""
+        # Other processes may have written or evicted since the total was loaded
+        total = self._stored_bytes(connection)
+        stale = []
+        if total > self.max_bytes:
+            for key, size in connection.execute('SELECT key, size FROM nfp ORDER BY last_used'):
+                if total <= self.max_bytes:
+                    break
+                stale.append((key,))
+                total -= size
+            connection.executemany('DELETE FROM nfp WHERE key = ?', stale)
+        self._total = total
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM nfp').fetchone()[0]
+
+    def clear(self):
+        """Remove all stored NFPs"""
+        self._connect().execute('DELETE FROM nfp')
+        self._total = 0
+        self._touched = {}
+
+    def flush(self):
+        """Write the last-use times of entries read since the last write"""
+        if self._connection is not None and self._touched:
+            with self._transaction(self._connection):
+                self._flush(self._connection)
+
+    def close(self):
+        """Write pending last-use times and close the database connection"""
+        if self._connection is not None:
+            self.flush()
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,543 @@
+"""
+Orbiting (sliding) no-fit polygon
+
+Port of the orbital NFP from SVGnest/deepnest: polygon B is slid around
+(or, for inner NFPs, inside) polygon A, always along an edge of a touching
+vertex pair, by the largest distance that does not make the polygons
+overlap.  The path traced by B's translation is the NFP.  With
+``search_edges`` the vertices of A that the orbit never touched are tried
+as further start points, which finds the pockets B can interlock into.
+
+Both polygons are lists of ``(x, y)`` tuples with counterclockwise
+orientation.  The NFP is expressed as translations to apply to B.
+"""
+import math
+import warnings
+import numpy as np
+import pyclipper
+from .geometry_utils import GeometryUtils, TOL
+from .polygon import Polygon
+
+_almost_equal = GeometryUtils.almost_equal
+
+
+def _on_segment(ax, ay, bx, by, px, py):
+    """True if p lies strictly inside segment AB (endpoints excluded)"""
+    # Vertical line
+    if _almost_equal(ax, bx) and _almost_equal(px, ax):
+        return (not _almost_equal(py, by) and not _almost_equal(py, ay) and
+                min(ay, by) < py < max(ay, by))
+
+    # Horizontal line
+    if _almost_equal(ay, by) and _almost_equal(py, ay):
+        return (not _almost_equal(px, bx) and not _almost_equal(px, ax) and
+                min(ax, bx) < px < max(ax, bx))
+
+    # Range check
+    if ((px < ax and px < bx) or (px > ax and px > bx) or
+            (py < ay and py < by) or (py > ay and py > by)):
+        return False
+
+    # Exclude end points
+    if ((_almost_equal(px, ax) and _almost_equal(py, ay)) or
+            (_almost_equal(px, bx) and _almost_equal(py, by))):
+        return False
+
+    cross = (py - ay) * (bx - ax) - (px - ax) * (by - ay)
+    if abs(cross) > TOL:
+        return False
+
+    dot = (px - ax) * (bx - ax) + (py - ay) * (by - ay)
+    if dot < 0 or _almost_equal(dot, 0):
+        return False
+
+    length2 = (bx - ax) ** 2 + (by - ay) ** 2
+    if dot > length2 or _almost_equal(dot, length2):
+        return False
+
+    return True
+
+
+def _point_distances(p, s1, s2, direction, infinite=False):
+    """
+    Distances points p travel along the unit direction until they hit segments s1-s2
+
+    Arrays of points and segments are paired row by row; NaN where a point
+    misses its segment (or only meets one of its vertices).
+    """
+    dx, dy = direction
+    px, py = p[:, 0], p[:, 1]
+    pdot = px * dy - py * dx
+    s1dot = s1[:, 0] * dy - s1[:, 1] * dx
+    s2dot = s2[:, 0] * dy - s2[:, 1] * dx
+    pdotnorm = px * dx + py * dy
+    s1dotnorm = s1[:, 0] * dx + s1[:, 1] * dy
+    s2dotnorm = s2[:, 0] * dx + s2[:, 1] * dy
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        distance = -(pdotnorm - s1dotnorm + (s1dotnorm - s2dotnorm) * (s1dot - pdot) / (s1dot - s2dot))
+    if not infinite:
+        low = np.minimum(s1dot, s2dot)
+        high = np.maximum(s1dot, s2dot)
+        inside = (pdot > low) & (pdot < high) & ~_close(pdot, low) & ~_close(pdot, high)
+        distance = np.where(inside, distance, np.nan)
+    return distance
+
+
+def _close(a, b):
+    """Element-wise ``GeometryUtils.almost_equal``"""
+    return np.abs(a - b) < TOL
+
+
+def _segment_distances(a, b, e, f, direction):
+    """
+    Distances segments EF travel along the unit direction until they hit segments AB
+
+    Arrays of segments are paired row by row; NaN where a pair never collides.
+    """
+    dx, dy = direction
+    nx, ny = dy, -dx
+    reverse = (-dx, -dy)
+
+    def dot(p):
+        return p[:, 0] * nx + p[:, 1] * ny
+
+    def cross(p):
+        return p[:, 0] * dx + p[:, 1] * dy
+
+    dot_a, dot_b, dot_e, dot_f = dot(a), dot(b), dot(e), dot(f)
+    cross_a, cross_b, cross_e, cross_f = cross(a), cross(b), cross(e), cross(f)
+    ab_min, ab_max = np.minimum(dot_a, dot_b), np.maximum(dot_a, dot_b)
+    ef_min, ef_max = np.minimum(dot_e, dot_f), np.maximum(dot_e, dot_f)
+
+    # Segments that merely touch at one point, or miss each other completely
+    hit = ~(_close(ab_max, ef_min) | _close(ab_min, ef_max)) & ~((ab_max < ef_min) | (ab_min > ef_max))
+
+    contained = ((ab_max > ef_max) & (ab_min < ef_min)) | ((ef_max > ab_max) & (ef_min < ab_min))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        overlap = np.where(contained, 1.0,
+                           (np.minimum(ab_max, ef_max) - np.maximum(ab_min, ef_min)) /
+                           (np.maximum(ab_max, ef_max) - np.minimum(ab_min, ef_min)))
+
+    ab = b - a
+    cross_abe = (e[:, 1] - a[:, 1]) * ab[:, 0] - (e[:, 0] - a[:, 0]) * ab[:, 1]
+    cross_abf = (f[:, 1] - a[:, 1]) * ab[:, 0] - (f[:, 0] - a[:, 0]) * ab[:, 1]
+    collinear = _close(cross_abe, 0) & _close(cross_abf, 0)
+
+    # Collinear segments collide at once if their normals are opposed and AB's faces the travel
+    ab_normal = np.column_stack([ab[:, 1], -ab[:, 0]])
+    ab_normal /= np.hypot(*ab_normal.T)[:, None]
+    ef = f - e
+    ef_normal = np.column_stack([ef[:, 1], -ef[:, 0]])
+    ef_normal /= np.hypot(*ef_normal.T)[:, None]
+    opposed = ((np.abs(ab_normal[:, 1] * ef_normal[:, 0] - ab_normal[:, 0] * ef_normal[:, 1]) < TOL) &
+               (ab_normal[:, 1] * ef_normal[:, 1] + ab_normal[:, 0] * ef_normal[:, 0] < 0))
+    normdot = ab_normal[:, 1] * dy + ab_normal[:, 0] * dx
+    collinear_distance = np.where(opposed & ~_close(normdot, 0) & (normdot < 0), 0.0, np.nan)
+
+    def touching_check(distance, q, s1, s2, travel):
+        # A point touching the other segment, while its own segment moves away from it, does not count
+        touching = _close(distance, 0)
+        if touching.any():
+            other = _point_distances(q, s1, s2, travel, infinite=True)
+            away = (other < 0) | _close(other * overlap, 0)
+            distance = np.where(touching & away, np.nan, distance)
+        return distance
+
+    candidates = []
+    # Coincident points, or the endpoints of AB hit by EF
+    for p, dot_p, cross_p, q in ((a, dot_a, cross_a, b), (b, dot_b, cross_b, a)):
+        on_e = _close(dot_p, dot_e)
+        on_f = ~on_e & _close(dot_p, dot_f)
+        between = ~on_e & ~on_f & (ef_min < dot_p) & (dot_p < ef_max)
+        projected = touching_check(_point_distances(p, e, f, reverse), q, e, f, reverse)
+        candidates.append(np.where(on_e, cross_p - cross_e,
+                                   np.where(on_f, cross_p - cross_f,
+                                            np.where(between, projected, np.nan))))
+
+    # The endpoints of EF hitting AB
+    for p, dot_p, q in ((e, dot_e, f), (f, dot_f, e)):
+        between = (ab_min < dot_p) & (dot_p < ab_max)
+        projected = touching_check(_point_distances(p, a, b, direction), q, a, b, direction)
+        candidates.append(np.where(between, projected, np.nan))
+
+    with np.errstate(all='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        distance = np.nanmin(np.column_stack(candidates), axis=1) if len(a) else np.empty(0)
+    distance = np.where(collinear, collinear_distance, distance)
+    return np.where(hit, distance, np.nan)
+
+
+def _polygon_slide_distance(a, b, ox, oy, vx, vy):
+    """How far B (offset by o) can slide along v before hitting A; None if never"""
+    length = math.hypot(vx, vy)
+    dx, dy = vx / length, vy / length
+
+    # Only edge pairs whose spans across the direction overlap, and where A's
+    # edge is not entirely behind B's, can collide
+    a_start = np.asarray(a)
+    a_end = np.roll(a_start, -1, axis=0)
+    b_start = np.asarray(b) + (ox, oy)
+    b_end = np.roll(b_start, -1, axis=0)
+
+    def spans(start, end):
+        across = (start[:, 0] * dy - start[:, 1] * dx, end[:, 0] * dy - end[:, 1] * dx)
+        along = (start[:, 0] * dx + start[:, 1] * dy, end[:, 0] * dx + end[:, 1] * dy)
+        # Ignore extremely short edges
+        short = (np.abs(start - end) < TOL).all(axis=1)
+        return np.minimum(*across), np.maximum(*across), np.minimum(*along), np.maximum(*along), short
+
+    a_min, a_max, a_back, a_front, a_short = spans(a_start, a_end)
+    b_min, b_max, b_back, b_front, b_short = spans(b_start, b_end)
+    pairs = ((a_max[None, :] > b_min[:, None]) & (a_min[None, :] < b_max[:, None]) &
+             (a_front[None, :] > b_back[:, None] - TOL) &
+             ~b_short[:, None] & ~a_short[None, :])
+
+    i, j = np.nonzero(pairs)
+    distances = _segment_distances(a_start[j], a_end[j], b_start[i], b_end[i], (dx, dy))
+    distances = distances[(distances > 0) | _close(distances, 0)]
+    return float(distances.min()) if distances.size else None
+
+
+def _polygon_projection_distance(a, a_offset, b, b_offset, vx, vy):
+    """Largest of the shortest distances B's vertices project onto A's edges along v"""
+    length = math.hypot(vx, vy)
+    direction = (vx / length, vy / length)
+    s1 = np.asarray(a) + a_offset
+    s2 = np.roll(s1, -1, axis=0)
+    points = np.asarray(b) + b_offset
+
+    # Edges parallel to v are never hit
+    edges = s2 - s1
+    crossing = np.abs(edges[:, 1] * vx - edges[:, 0] * vy) >= TOL
+    s1, s2 = s1[crossing], s2[crossing]
+    if not len(s1) or not len(points):
+        return None
+
+    # Project every point onto every edge, ignoring edge boundaries
+    count = len(s1)
+    distances = _point_distances(np.repeat(points, count, axis=0), np.tile(s1, (len(points), 1)),
+                                 np.tile(s2, (len(points), 1)), direction).reshape(len(points), count)
+    hit = ~np.isnan(distances).all(axis=1)
+    if not hit.any():
+        return None
+    return float(np.nanmin(distances[hit], axis=1).max())
+
+
+def _scaled(polygon, scale, ox=0.0, oy=0.0):
+    return [(round((x + ox) * scale), round((y + oy) * scale)) for x, y in polygon]
+
+
+def _fits(a, b, ox, oy, inside, scale):
+    """
+    True if B (offset by o) lies outside A, or inside it for inner NFPs
+
+    Touching is allowed, as is a sliver a couple of clipper units wide along
+    B's perimeter from rounding.
+    """
+    clipper = pyclipper.Pyclipper()
+    clipper.AddPath(_scaled(b, scale, ox, oy), pyclipper.PT_SUBJECT, True)
+    clipper.AddPath(_scaled(a, scale), pyclipper.PT_CLIP, True)
+    operation = pyclipper.CT_DIFFERENCE if inside else pyclipper.CT_INTERSECTION
+    try:
+        paths = clipper.Execute(operation, pyclipper.PFT_NONZERO, pyclipper.PFT_NONZERO)
+    except pyclipper.ClipperException:
+        return False
+
+    perimeter = sum(math.hypot(q[0] - p[0], q[1] - p[1]) for p, q in zip(b, b[1:] + b[:1]))
+    overlap = sum(abs(pyclipper.Area(path)) for path in paths) / scale ** 2
+    return overlap <= 2 * perimeter / scale
+
+
+def _interior_point(loop, scale):
+    """A point well inside a loop, or None if the loop has no interior (a slit)"""
+    area = abs(pyclipper.Area(_scaled(loop, scale))) / scale ** 2
+    delta = 0.1 * math.sqrt(area)
+    while delta * scale >= 10:
+        offset = pyclipper.PyclipperOffset()
+        offset.AddPath(_scaled(loop, scale), pyclipper.JT_MITER, pyclipper.ET_CLOSEDPOLYGON)
+        paths = offset.Execute(-delta * scale)
+        if paths:
+            x, y = paths[0][0]
+            return x / scale, y / scale
+        delta /= 2
+    return None
+
+
+def _search_start_point(a, b, inside, loops, marked, scale):
+    """
+    Find a start position for another orbit, with a vertex of B on a vertex of A
+
+    Start points on a traced loop are skipped.  For vertices of A no orbit
+    has touched yet, B is also slid along the following edge of A.
+    """
+    def in_loops(x, y):
+        # On a traced loop (vertex or edge), so orbiting from there would retrace it
+        for loop in loops:
+            for (px, py), (qx, qy) in zip(loop, loop[1:] + loop[:1]):
+                if (_almost_equal(x, px) and _almost_equal(y, py)) or _on_segment(px, py, qx, qy, x, y):
+                    return True
+        return False
+
+    na = len(a)
+    for i in range(na):
+        slide = i not in marked
+        marked.add(i)
+
+        for bx, by in b:
+            ox = a[i][0] - bx
+            oy = a[i][1] - by
+
+            if _fits(a, b, ox, oy, inside, scale) and not in_loops(ox, oy):
+                return ox, oy
+            if not slide:
+                continue
+
+            # Slide B along the edge of A, until it no longer overlaps
+            vx = a[(i + 1) % na][0] - a[i][0]
+            vy = a[(i + 1) % na][1] - a[i][1]
+            d1 = _polygon_projection_distance(a, (0, 0), b, (ox, oy), vx, vy)
+            d2 = _polygon_projection_distance(b, (ox, oy), a, (0, 0), -vx, -vy)
+            candidates = [d for d in (d1, d2) if d is not None]
+            d = min(candidates) if candidates else None
+
+            if d is None or _almost_equal(d, 0) or d < 0:
+                continue
+
+            length2 = vx * vx + vy * vy
+            if d * d < length2 and not _almost_equal(d * d, length2):
+                length = math.sqrt(length2)
+                vx *= d / length
+                vy *= d / length
+
+            ox += vx
+            oy += vy
+
+            if _fits(a, b, ox, oy, inside, scale) and not in_loops(ox, oy):
+                return ox, oy
+
+    return None
+
+
+def _loop_fits(a, b, loop, inside, scale):
+    """
+    True if the positions enclosed by a loop found from a searched start are feasible
+
+    Rejects zero-width slits and loops that retrace an earlier boundary from
+    an exact-fit position on it.
+    """
+    point = _interior_point(loop, scale)
+    return point is not None and _fits(a, b, point[0], point[1], inside, scale)
+
+
+def _turn(previous, vx, vy):
+    """Signed angle from the previous direction to v; None if v points straight back"""
+    if previous is None:
+        return 0.0
+    angle = math.atan2(previous[0] * vy - previous[1] * vx, previous[0] * vx + previous[1] * vy)
+    if abs(angle) > math.pi - 0.0001:
+        return None
+    return angle
+
+
+def _orbit(a, b, start, inside, marked, scale):
+    """Slide B around A from a touching start translation; returns the loop or None"""
+    na = len(a)
+    nb = len(b)
+    a_array = np.asarray(a)
+    b_array = np.asarray(b)
+    a_low = np.minimum(a_array, np.roll(a_array, -1, axis=0)) - TOL
+    a_high = np.maximum(a_array, np.roll(a_array, -1, axis=0)) + TOL
+
+    ox, oy = start
+    loop = [(ox, oy)]
+    previous = None
+    # +1 if A is on the left of the path, -1 if on the right
+    sense = None
+
+    for _ in range(10 * (na + nb) + 2 * na * nb):
+        # Find touching vertex/vertex and vertex/edge pairs, among the vertices
+        # that lie in the bounding box of an edge of the other polygon
+        b_offset = b_array + (ox, oy)
+        b_low = np.minimum(b_offset, np.roll(b_offset, -1, axis=0)) - TOL
+        b_high = np.maximum(b_offset, np.roll(b_offset, -1, axis=0)) + TOL
+        near = (((b_offset[None, :] >= a_low[:, None]) & (b_offset[None, :] <= a_high[:, None])).all(axis=2) |
+                ((a_array[:, None] >= b_low[None, :]) & (a_array[:, None] <= b_high[None, :])).all(axis=2))
+
+        touching = []
+        for i, j in zip(*np.nonzero(near)):
+            ax, ay = a[i]
+            nax, nay = a[(i + 1) % na]
+            bx, by = b[j][0] + ox, b[j][1] + oy
+            if _almost_equal(ax, bx) and _almost_equal(ay, by):
+                touching.append((0, i, j))
+            elif _on_segment(ax, ay, nax, nay, bx, by):
+                touching.append((1, (i + 1) % na, j))
+            else:
+                nbx, nby = b[(j + 1) % nb][0] + ox, b[(j + 1) % nb][1] + oy
+                if _on_segment(bx, by, nbx, nby, ax, ay):
+                    touching.append((2, i, (j + 1) % nb))
+
+        # Translation vectors along the touching edges, with the A vertices they start or end at
+        vectors = []
+        for kind, i, j in touching:
+            marked.add(i)
+            vertex_a = a[i]
+            prev_a = a[(i - 1) % na]
+            next_a = a[(i + 1) % na]
+            vertex_b = (b[j][0] + ox, b[j][1] + oy)
+            prev_b = (b[(j - 1) % nb][0] + ox, b[(j - 1) % nb][1] + oy)
+            next_b = (b[(j + 1) % nb][0] + ox, b[(j + 1) % nb][1] + oy)
+
+            if kind == 0:
+                vectors.append((prev_a[0] - vertex_a[0], prev_a[1] - vertex_a[1], (i, (i - 1) % na)))
+                vectors.append((next_a[0] - vertex_a[0], next_a[1] - vertex_a[1], (i, (i + 1) % na)))
+                # B's vectors are inverted
+                vectors.append((vertex_b[0] - prev_b[0], vertex_b[1] - prev_b[1], ()))
+                vectors.append((vertex_b[0] - next_b[0], vertex_b[1] - next_b[1], ()))
+            elif kind == 1:
+                vectors.append((vertex_a[0] - vertex_b[0], vertex_a[1] - vertex_b[1], ((i - 1) % na, i)))
+                vectors.append((prev_a[0] - vertex_b[0], prev_a[1] - vertex_b[1], (i, (i - 1) % na)))
+            else:
+                vectors.append((vertex_a[0] - vertex_b[0], vertex_a[1] - vertex_b[1], ()))
+                vectors.append((vertex_a[0] - prev_b[0], vertex_a[1] - prev_b[1], ()))
+
+        # Feasible vectors, with how far each can slide without overlapping
+        candidates = []
+        for vx, vy, a_vertices in vectors:
+            if vx == 0 and vy == 0:
+                continue
+            d = _polygon_slide_distance(a, b, ox, oy, vx, vy)
+            length = math.hypot(vx, vy)
+            if d is None or d > length:
+                d = length
+            if not _almost_equal(d, 0):
+                candidates.append((d, vx, vy, a_vertices))
+
+        if sense is None:
+            # Until we know which side A is on, slide furthest (and not straight back)
+            def priority(candidate):
+                d, vx, vy, _ = candidate
+                return (_turn(previous, vx, vy) is not None, d)
+        else:
+            # Hug A: turn towards it as far as possible; straight back only out of dead ends
+            def priority(candidate):
+                turn = _turn(previous, candidate[1], candidate[2])
+                return (turn is not None, sense * turn if turn is not None else 0)
+
+        chosen = None
+        for d, vx, vy, a_vertices in sorted(candidates, key=priority, reverse=True):
+            # Stop at the next vertex pair coming into line, where the boundary may branch
+            gaps = a_array[:, None] - b_offset[None, :]
+            length = math.hypot(vx, vy)
+            ux, uy = vx / length, vy / length
+            step = min(d, length)
+            along = gaps[:, :, 0] * ux + gaps[:, :, 1] * uy
+            across = gaps[:, :, 0] * uy - gaps[:, :, 1] * ux
+            ahead = along[(along > TOL) & (along < step) & (np.abs(across) < TOL)]
+            if ahead.size:
+                step = float(ahead.min())
+
+            # Slide distances miss vertices passing exactly through vertices, so check the fit
+            if _fits(a, b, ox + ux * step / 2, oy + uy * step / 2, inside, scale):
+                chosen = a_vertices
+                break
+
+        if chosen is None:
+            # Stuck: the orbit cannot close
+            return None
+        marked.update(chosen)
+
+        if sense is None:
+            # A blocks one side of the path, halfway along the step
+            mx, my = ox + ux * step / 2, oy + uy * step / 2
+            left = _polygon_slide_distance(a, b, mx, my, -uy, ux)
+            right = _polygon_slide_distance(a, b, mx, my, uy, -ux)
+            left_blocked = left is not None and _almost_equal(left, 0)
+            right_blocked = right is not None and _almost_equal(right, 0)
+            if left_blocked != right_blocked:
+                sense = 1 if left_blocked else -1
+
+        previous = (ux, uy)
+        px, py = ox, oy
+        ox += ux * step
+        oy += uy * step
+
+        # Back at (or passing) the start
+        sx, sy = loop[0]
+        if (_almost_equal(ox, sx) and _almost_equal(oy, sy)) or _on_segment(px, py, ox, oy, sx, sy):
+            return loop
+
+        loop.append((ox, oy))
+
+    return None
+
+
+def _drop_collinear(loop):
+    """Remove vertices in the middle of straight runs and the tips of zero-width spikes"""
+    loop = list(loop)
+    changed = True
+    while changed and len(loop) >= 3:
+        changed = False
+        for i in range(len(loop)):
+            (px, py), (qx, qy), (rx, ry) = loop[i - 1], loop[i], loop[(i + 1) % len(loop)]
+            if abs((qx - px) * (ry - qy) - (qy - py) * (rx - qx)) < TOL:
+                del loop[i]
+                changed = True
+                break
+    return loop
+
+
+def orbital_nfp(polygon_a, polygon_b, inside=False, search_edges=False, scale=Polygon.CLIPPER_SCALE):
+    """
+    Calculate the NFP of B against A by orbiting
+
+    Args:
+        polygon_a: Stationary polygon, counterclockwise list of ``(x, y)``
+        polygon_b: Moving polygon, counterclockwise list of ``(x, y)``
+        inside: If True, slide B inside A (inner NFP)
+        search_edges: If True, also trace loops from start points the first
+            orbit missed (interlocking pockets for outer NFPs, separate
+            regions for inner NFPs)
+        scale: Clipper units per drawing unit for the overlap checks
+
+    Returns:
+        List of loops (lists of ``(x, y)`` translations of B), the first being
+        the outer boundary for outer NFPs; empty if B fits nowhere inside A,
+        None if the orbit failed
+    """
+    a = [tuple(map(float, p)) for p in polygon_a]
+    b = [tuple(map(float, p)) for p in polygon_b]
+    if len(a) < 3 or len(b) < 3:
+        return None
+
+    marked = set()
+    if inside:
+        start = _search_start_point(a, b, True, [], marked, scale)
+    else:
+        # Put B's highest vertex on A's lowest vertex: they touch without overlapping
+        low_a = min(a, key=lambda p: p[1])
+        high_b = max(b, key=lambda p: p[1])
+        start = (low_a[0] - high_b[0], low_a[1] - high_b[1])
+
+    loops = []
+    # Every loop tried, including rejected ones, so no start is searched out twice
+    traced = []
+    while start is not None:
+        loop = _orbit(a, b, start, inside, marked, scale)
+        if loop is None and not loops:
+            return None
+
+        if loop is not None:
+            traced.append(loop)
+            loop = _drop_collinear(loop)
+            if len(loop) >= 3 and (not loops and not inside or _loop_fits(a, b, loop, inside, scale)):
+                loops.append(loop)
+        else:
+            traced.append([start])
+
+        if not search_edges:
+            break
+        start = _search_start_point(a, b, inside, traced, marked, scale)
+
+    return loops
@@ -0,0 +1,75 @@
+import numpy as np
+from .polygon import Polygon
+
+
+class PackedNFP:
+    """
+    NFP rings packed into one int64 buffer of clipper coordinates
+
+    The vertices of all rings are stored back to back in a single ``(n, 2)``
+    array with the start of every ring in ``ring_starts`` (CSR layout), so a
+    cached NFP is two arrays however many rings it has.  Rings go to
+    pyclipper as they are, without a float round trip; indexing or iterating
+    converts a ring to a float Polygon on demand, so the packed NFP can be
+    used wherever a list of Polygons is expected.
+    """
+
+    __slots__ = ('vertices', 'ring_starts', 'scale')
+
+    def __init__(self, vertices, ring_starts, scale=Polygon.CLIPPER_SCALE):
+        """
+        Args:
+            vertices: ``(n, 2)`` int64 clipper coordinates of all rings
+            ring_starts: int64 array of ring count + 1 offsets into ``vertices``
+            scale: Clipper units per drawing unit
+        """
+        self.vertices = vertices
+        self.ring_starts = ring_starts
+        self.scale = scale
+
+    @classmethod
+    def from_polygons(cls, polygons, scale=Polygon.CLIPPER_SCALE):
+        """Pack a list of Polygons (or return a PackedNFP as-is)"""
+        if isinstance(polygons, PackedNFP):
+            return polygons
+        rings = [Polygon.from_points(polygon).to_clipper(scale) for polygon in polygons]
+        ring_starts = np.zeros(len(rings) + 1, dtype=np.int64)
+        np.cumsum([len(ring) for ring in rings], out=ring_starts[1:])
+        vertices = np.concatenate(rings) if rings else np.empty((0, 2), dtype=np.int64)
+        return cls(vertices, ring_starts, scale)
+
+    def __len__(self):
+        return len(self.ring_starts) - 1
+
+    def __getitem__(self, index):
+        return Polygon.from_clipper(self.ring(index), self.scale)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self):
+        return f"PackedNFP({len(self)} rings, {len(self.vertices)} points)"
+
+    def ring(self, index):
+        """Clipper coordinates of one ring, a view into ``vertices``"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ring index out of range")
+        return self.vertices[self.ring_starts[index]:self.ring_starts[index + 1]]
+
+    def rings(self):
+        """Clipper coordinates of every ring"""
+        return [self.ring(index) for index in range(len(self))]
+
+    @property
+    def nbytes(self):
+        """Bytes held by the coordinate and offset arrays"""
+        return self.vertices.nbytes + self.ring_starts.nbytes
+
+    def __getstate__(self):
+        return (self.vertices, self.ring_starts, self.scale)
+
+    def __setstate__(self, state):
+        self.vertices, self.ring_starts, self.scale = state
@@ -1,18 +1,34 @@
-import copy
-import math
+import numpy as np
 from .geometry_utils import GeometryUtils
-from .nfp_calculator import NFPCalculator
+from .polygon import Polygon
+from .rotation_atlas import RotationAtlas
+from .prefix_trie import PrefixTrie
 
 
 class PlacementWorker:
     """Calculate optimal placement positions using NFP data"""
     
-    def __init__(self, container, parts, nfp_cache, config):
+    def __init__(self, container, parts, nfp_cache, config, atlas=None):
         self.container = container
         self.parts = parts
         self.nfp_cache = nfp_cache
         self.config = config
+        self.atlas = atlas or RotationAtlas(parts, container, config.get('rotations', 4))
         self.placed_parts = []
+        self.container_bbox = Polygon.from_points(container['points']).bbox
+        
+        # Layout snapshots of placed prefixes, reused by later individuals sharing the prefix
+        self.checkpoint_interval = config.get('prefix_checkpoint_interval', 10)
+        self.prefix_trie = PrefixTrie(config.get('prefix_cache_size', 1000))
+        self.resumed_parts = 0
+        
+        # Part-in-part placement into the holes of placed parts
+        self.use_holes = config.get('use_holes', False)
+        
+        # Clipper precision, matching the NFP cache; the inner NFP is grown by the
+        # exact-fit margin so exact-fit positions stay in the feasible region
+        self.scale = config.get('clipper_scale', Polygon.CLIPPER_SCALE)
+        self.exact_fit_margin = GeometryUtils.exact_fit_margin(self.scale)
     
     def place_parts(self, individual):
         """
@@ -21,18 +37,32 @@ class PlacementWorker:
         Returns:
             dict: Result containing fitness and placement data
         """
-        self.placed_parts = []
-        total_area = 0
-        placements = []
+        sequence = list(zip(individual['placement'], individual['rotation']))
+        
+        # Resume from the longest prefix placed before
+        start, node, snapshot = 0, None, None
+        if self.checkpoint_interval:
+            start, node, snapshot = self.prefix_trie.longest(sequence)
+        
+        if snapshot is None:
+            self.placed_parts = []
+            placements = []
+            total_area = 0
+        else:
+            placed_parts, placements, total_area = snapshot
+            self.placed_parts = list(placed_parts)
+            placements = list(placements)
+            self.resumed_parts += start
+        
+        checkpoint = start
         
         # Place parts one by one according to the individual's order
-        for i, part_index in enumerate(individual['placement']):
-            part = copy.deepcopy(self.parts[part_index])
-            rotation = individual['rotation'][i]
+        for i in range(start, len(sequence)):
+            part_index, rotation = sequence[i]
             
-            # Rotate the part
-            if rotation != 0:
-                part['points'] = GeometryUtils.rotate_polygon(part['points'], rotation)['points']
+            # Look up the rotated part
+            part = dict(self.parts[part_index])
+            part['points'] = self.atlas.get(part_index, rotation)['points']
             
             # Find best position for this part
             position = self._find_best_position(part, part_index, rotation)
@@ -44,7 +74,7 @@ class PlacementWorker:
                     'x': position['x'],
                     'y': position['y'],
                     'rotation': rotation,
-                    'points': GeometryUtils.translate_polygon(part['points'], position['x'], position['y'])
+                    'points': part['points'].translate(position['x'], position['y'])
                 }
                 
                 self.placed_parts.append(placed_part)
@@ -55,15 +85,24 @@ class PlacementWorker:
                     'rotation': rotation
                 })
                 
-                total_area += part.get('area', GeometryUtils.polygon_area(part['points']))
+                total_area += part.get('area', abs(part['points'].area))
+            
+            # Snapshot the layout every few parts (placed parts are never modified)
+            if self.checkpoint_interval and (i + 1) % self.checkpoint_interval == 0:
+                node = self.prefix_trie.insert(
+                    node or self.prefix_trie.root,
+                    sequence[checkpoint:i + 1],
+                    (tuple(self.placed_parts), tuple(placements), total_area)
+                )
+                checkpoint = i + 1
         
         # Calculate fitness
-        container_area = abs(GeometryUtils.polygon_area(self.container['points']))
+        container_area = abs(self.container['points'].area)
         utilization = total_area / container_area if container_area > 0 else 0
         
         # Fitness is based on: number of placed parts (higher is better) and utilization
         placed_count = len(self.placed_parts)
-        total_parts = len(self.parts)
+        total_parts = len(individual['placement'])
         
         # Minimize fitness: lower is better
         # Prioritize placing more parts, then maximize utilization
@@ -77,122 +116,194 @@ class PlacementWorker:
         }
     
     def _find_best_position(self, part, part_id, rotation):
-        """Find the best position to place a part"""
-        best_position = None
-        best_fitness = float('inf')
+        """
+        Find the best position to place a part
+        
+        The feasible region is the container inner NFP minus the union of the
+        outer NFPs of all placed parts against this part; its vertices are
+        the positions where the part touches the container or placed parts.
+        Both kinds of NFP are exact, so the candidates need no further checks.
+        With ``use_holes`` the holes of placed parts are tried first, the same
+        way with the inner NFP of the hole, before the container.
+        """
+        placed_nfps = self._placed_part_nfps(part_id, rotation)
+        
+        if self.use_holes:
+            position = self._find_position_in_holes(part, placed_nfps)
+            if position is not None:
+                return position
         
         # Get NFP with container
-        container_nfp = self._get_nfp(self.container, part, -1, part_id, True, 0, rotation)
+        container_nfp = self._get_nfp(self.container, part, True)
         
         if not container_nfp:
             return None
         
-        # Try positions along the NFP boundary
-        for nfp_polygon in container_nfp:
-            positions = self._generate_candidate_positions(nfp_polygon)
-            
-            for pos in positions:
-                if self._is_valid_position(part, pos, part_id, rotation):
-                    fitness = self._evaluate_position(pos)
-                    if fitness < best_fitness:
-                        best_fitness = fitness
-                        best_position = pos
+        return self._best_position(container_nfp, self.container_bbox, part, placed_nfps)[0]
+    
+    def _find_position_in_holes(self, part, placed_nfps):
+        """Find the best position inside a hole of a placed part, or None"""
+        best_position = None
+        best_fitness = float('inf')
+        part_bounds = part['points'].bounds
+        
+        for index, placed_part in enumerate(self.placed_parts):
+            for hole in self.atlas.get(placed_part['id'], placed_part['rotation'])['holes']:
+                if not RotationAtlas.fits(part_bounds, hole.bounds):
+                    continue
+                
+                hole = hole.translate(placed_part['x'], placed_part['y'])
+                hole_nfp = self.nfp_cache.get(hole, part['points'], True)
+                if not hole_nfp:
+                    continue
+                
+                # Inside the hole the part cannot overlap the part the hole is cut from
+                position, fitness = self._best_position(hole_nfp, hole.bbox, part, placed_nfps, skip=index)
+                if fitness < best_fitness:
+                    best_fitness = fitness
+                    best_position = position
         
         return best_position
     
-    def _generate_candidate_positions(self, nfp_polygon):
-        """Generate candidate positions along NFP boundary"""
-        positions = []
-        
-        # Add all vertices of the NFP
-        for point in nfp_polygon:
-            positions.append({'x': point['x'], 'y': point['y']})
-        
-        # Add points along edges for better coverage
-        for i in range(len(nfp_polygon)):
-            p1 = nfp_polygon[i]
-            p2 = nfp_polygon[(i + 1) % len(nfp_polygon)]
-            
-            # Add midpoint
-            mid_x = (p1['x'] + p2['x']) / 2
-            mid_y = (p1['y'] + p2['y']) / 2
-            positions.append({'x': mid_x, 'y': mid_y})
+    def _placed_part_nfps(self, part_id, rotation):
+        """
+        Outer NFPs of every placed part against a part
         
-        return positions
-    
-    def _is_valid_position(self, part, position, part_id, rotation):
-        """Check if a position is valid (no overlaps)"""
-        # Translate part to the position
-        translated_part = GeometryUtils.translate_polygon(part['points'], position['x'], position['y'])
+        The NFPs are shared ``PackedNFP`` cache entries per relative rotation,
+        whose clipper rings are rotated and moved while building the clip paths.
+        An outer NFP spans the placed part's box less the part's box, which
+        gives its placed bounding box without touching the rings.
         
-        # Check overlap with already placed parts
+        Returns:
+            list: ``(nfp, (dx, dy), rotation, bbox)`` per placed part
+        """
+        part_bbox = self.atlas.get(part_id, rotation)['points'].bbox
+        placed_nfps = []
         for placed_part in self.placed_parts:
-            if self._polygons_overlap(translated_part, placed_part['points']):
-                return False
+            relative = RotationAtlas.relative_angle(rotation, placed_part['rotation'])
+            nfp, (dx, dy), placed_rotation = self.nfp_cache.get_relative(
+                self.atlas.get(placed_part['id'], 0)['points'],
+                placed_part['rotation'],
+                self.atlas.get(part_id, relative)['points']
+            )
+            placed_bbox = placed_part['points'].bbox
+            bbox = (placed_bbox[0] - part_bbox[2], placed_bbox[1] - part_bbox[3],
+                    placed_bbox[2] - part_bbox[0], placed_bbox[3] - part_bbox[1])
+            placed_nfps.append((nfp, (dx + placed_part['x'], dy + placed_part['y']), placed_rotation, bbox))
+        return placed_nfps
+    
+    def _best_position(self, inner_nfp, region_bbox, part, placed_nfps, skip=None):
+        """
+        Best vertex of an inner NFP minus the placed parts' outer NFPs
         
-        # Check if part is within container bounds
-        if not self._part_in_container(translated_part):
-            return False
+        Args:
+            inner_nfp: Inner NFP of the region (container or hole) against the part
+            region_bbox: Bounding box of the region, candidates are clamped into it
+            part: Part dict with rotated 'points'
+            placed_nfps: Outer NFPs of the placed parts, from ``_placed_part_nfps``
+            skip: Optional index of a placed part whose outer NFP is left out
         
-        return True
-    
-    def _polygons_overlap(self, poly1, poly2):
-        """Check if two polygons overlap (simplified SAT algorithm)"""
-        # Simple bounding box check first
-        bounds1 = GeometryUtils.get_polygon_bounds(poly1)
-        bounds2 = GeometryUtils.get_polygon_bounds(poly2)
-        
-        if (bounds1['x'] + bounds1['width'] < bounds2['x'] or
-            bounds2['x'] + bounds2['width'] < bounds1['x'] or
-            bounds1['y'] + bounds1['height'] < bounds2['y'] or
-            bounds2['y'] + bounds2['height'] < bounds1['y']):
-            return False
-        
-        # Check if any vertex of poly1 is inside poly2
-        for point in poly1:
-            if GeometryUtils.point_in_polygon(point, poly2):
-                return True
-        
-        # Check if any vertex of poly2 is inside poly1
-        for point in poly2:
-            if GeometryUtils.point_in_polygon(point, poly1):
-                return True
-        
-        return False
+        Returns:
+            tuple: ``(position, fitness)``, ``(None, inf)`` if nothing fits
+        """
+        best_position = None
+        best_fitness = float('inf')
+        
+        inner_bboxes = [polygon.bbox for polygon in inner_nfp if len(polygon)]
+        if not inner_bboxes:
+            return best_position, best_fitness
+        
+        # Outer NFPs whose boxes miss the grown inner NFP cannot cut into it and are not clipped
+        margin = self.exact_fit_margin
+        min_x = min(bbox[0] for bbox in inner_bboxes) - margin
+        min_y = min(bbox[1] for bbox in inner_bboxes) - margin
+        max_x = max(bbox[2] for bbox in inner_bboxes) + margin
+        max_y = max(bbox[3] for bbox in inner_bboxes) + margin
+        
+        # Cut out every position that would overlap an already placed part
+        outer_nfps = []
+        offsets = []
+        rotations = []
+        holes = []
+        for index, (nfp, offset, placed_rotation, nfp_bbox) in enumerate(placed_nfps):
+            if index == skip or not len(nfp):
+                continue
+            if nfp_bbox[0] > max_x or nfp_bbox[2] < min_x or nfp_bbox[1] > max_y or nfp_bbox[3] < min_y:
+                continue
+            outer_nfps.extend(nfp.rings())
+            offsets.extend([offset] * len(nfp))
+            rotations.extend([placed_rotation] * len(nfp))
+            # Rings after the outer boundary are pockets the part can interlock into
+            holes.extend(ring > 0 for ring in range(len(nfp)))
+        
+        feasible_region = inner_nfp
+        if outer_nfps:
+            # Exact fits leave zero-width strips that clipper drops, so the inner NFP is
+            # grown slightly before the placed parts are cut out
+            grown = [GeometryUtils.polygon_offset(nfp, self.exact_fit_margin, self.exact_fit_margin, self.scale)
+                     for nfp in inner_nfp]
+            grown_region = GeometryUtils.polygon_difference(grown, outer_nfps, offsets, rotations, holes,
+                                                            self.scale)
+            # Grown, the region reaches past sloped edges of the inner NFP, so it is cut back;
+            # the exact-fit strips vanish in the cut and are snapped onto the inner NFP instead
+            feasible_region = GeometryUtils.polygon_intersection(grown_region, inner_nfp, self.scale)
+        
+        rings = [nfp_polygon.coords for nfp_polygon in feasible_region if len(nfp_polygon)]
+        if outer_nfps:
+            rings.append(self._exact_fit_positions(grown_region, rings, inner_nfp))
+        if not any(len(ring) for ring in rings):
+            return best_position, best_fitness
+        
+        # Translations keeping the part within the region's bounding box
+        part_bbox = part['points'].bbox
+        lower = (region_bbox[0] - part_bbox[0], region_bbox[1] - part_bbox[1])
+        upper = (region_bbox[2] - part_bbox[2], region_bbox[3] - part_bbox[3])
+        candidates = np.minimum(np.maximum(np.concatenate(rings), lower), upper)
+        
+        # Every candidate is valid by construction, so the best score wins outright;
+        # argmin takes the first of equal scores, as a scan would
+        scores = self._evaluate_positions(candidates)
+        best = int(np.argmin(scores))
+        x, y = candidates[best].tolist()
+        return {'x': x, 'y': y}, float(scores[best])
     
-    def _part_in_container(self, part_points):
-        """Check if all points of the part are within the container"""
-        for point in part_points:
-            if not GeometryUtils.point_in_polygon(point, self.container['points']):
-                return False
-        return True
+    def _exact_fit_positions(self, grown_region, rings, inner_nfp):
+        """
+        Vertices of the grown feasible region outside the inner NFP, snapped onto it
+        
+        Where the part fits exactly against the region's boundary, the grown
+        region is a strip outside the inner NFP that cutting it back leaves
+        nothing of.  Its vertices are moved onto the inner NFP and kept where
+        that does not take them into the outer NFP of a placed part.
+        
+        Args:
+            grown_region: Grown inner NFP minus the outer NFPs
+            rings: Vertex arrays of the grown region cut back to the inner NFP;
+                vertices of the grown region not among them lie outside it
+            inner_nfp: Inner NFP of the region against the part
+        """
+        kept = {tuple(vertex) for ring in rings for vertex in ring.tolist()}
+        outside = [vertex for polygon in grown_region for vertex in polygon.coords.tolist()
+                   if tuple(vertex) not in kept]
+        if not outside:
+            return np.empty((0, 2))
+        
+        snapped = GeometryUtils.nearest_boundary_points(outside, inner_nfp)[0]
+        
+        # Positions on the boundary of the grown region are valid, up to a clipper unit of rounding
+        clearance = GeometryUtils.nearest_boundary_points(snapped, grown_region)[1]
+        keep = GeometryUtils.points_in_polygons(snapped, grown_region) | (clearance <= 1.0 / self.scale)
+        return snapped[keep]
     
     def _evaluate_position(self, position):
         """Evaluate the quality of a position (lower is better)"""
+        return float(self._evaluate_positions(np.array([[position['x'], position['y']]]))[0])
+    
+    def _evaluate_positions(self, positions):
+        """Evaluate an ``(n, 2)`` array of positions at once (lower is better)"""
         # Simple evaluation: prefer bottom-left positions
-        return position['x'] + position['y']
+        return positions[:, 0] + positions[:, 1]
     
-    def _get_nfp(self, polygon_a, polygon_b, id_a, id_b, inside, rotation_a, rotation_b):
+    def _get_nfp(self, polygon_a, polygon_b, inside):
         """Get NFP from cache or calculate it"""
-        cache_key = NFPCalculator.cache_key(id_a, id_b, inside, rotation_a, rotation_b)
-        
-        if cache_key in self.nfp_cache:
-            return self.nfp_cache[cache_key]
-        
-        # Get configuration parameters
-        explore_concave = self.config.get('explore_concave', False)
-        use_holes = self.config.get('use_holes', False)
-        
-        # Calculate NFP with proper configuration
-        nfp = NFPCalculator.calculate_nfp(
-            polygon_a['points'], 
-            polygon_b['points'], 
-            inside, 
-            explore_concave,
-            use_holes
-        )
-        
-        # Cache the result
-        self.nfp_cache[cache_key] = nfp
-        
-        return nfp
\ No newline at end of file
+        return self.nfp_cache.get(polygon_a['points'], polygon_b['points'], inside)
@@ -0,0 +1,191 @@
+import hashlib
+import math
+import numpy as np
+
+
+class Polygon:
+    """
+    Compact polygon backed by a contiguous ``(n, 2)`` float64 array
+
+    This is the internal representation used throughout the nester.  Area,
+    bounds and orientation are computed lazily and cached.  Indexing or
+    iterating yields ``{'x': .., 'y': ..}`` dicts so code written against
+    the public list-of-dicts format keeps working; use ``to_points`` to
+    convert explicitly at the API boundary.
+    """
+
+    __slots__ = ('coords', '_area', '_bbox', '_fingerprint', '_shape_class')
+
+    # Default clipper integer units per drawing unit (the 'clipper_scale' setting)
+    CLIPPER_SCALE = 1000000
+
+    def __init__(self, coords):
+        self.coords = np.ascontiguousarray(coords, dtype=np.float64).reshape(-1, 2)
+        self._area = None
+        self._bbox = None
+        self._fingerprint = None
+        self._shape_class = None
+
+    @classmethod
+    def from_points(cls, points):
+        """Build a polygon from a list of ``{'x', 'y'}`` dicts (or return a Polygon as-is)"""
+        if isinstance(points, Polygon):
+            return points
+        if not points:
+            return cls(np.empty((0, 2)))
+        return cls([(p['x'], p['y']) for p in points])
+
+    def to_points(self):
+        """Convert to the public list-of-dicts format"""
+        return [{'x': x, 'y': y} for x, y in self.coords.tolist()]
+
+    def to_clipper(self, scale=CLIPPER_SCALE):
+        """Vertices as int64 clipper coordinates, rounded to the nearest unit"""
+        return np.round(self.coords * scale).astype(np.int64)
+
+    @classmethod
+    def from_clipper(cls, path, scale=CLIPPER_SCALE):
+        """Build a polygon from clipper coordinates"""
+        return cls(np.asarray(path, dtype=np.float64) / scale)
+
+    def __len__(self):
+        return self.coords.shape[0]
+
+    def __getitem__(self, index):
+        x, y = self.coords[index].tolist()
+        return {'x': x, 'y': y}
+
+    def __iter__(self):
+        for x, y in self.coords.tolist():
+            yield {'x': x, 'y': y}
+
+    def __repr__(self):
+        return f"Polygon({len(self)} points)"
+
+    @property
+    def area(self):
+        """Signed area (shoelace formula)"""
+        if self._area is None:
+            if len(self) < 3:
+                self._area = 0.0
+            else:
+                x = self.coords[:, 0]
+                y = self.coords[:, 1]
+                self._area = float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y)) / 2.0
+        return self._area
+
+    @property
+    def orientation(self):
+        """1 for positive signed area, -1 for negative, 0 for degenerate polygons"""
+        area = self.area
+        return (area > 0) - (area < 0)
+
+    @property
+    def bbox(self):
+        """Bounding box as a ``(min_x, min_y, max_x, max_y)`` tuple, or None if empty"""
+        if self._bbox is None and len(self):
+            min_x, min_y = self.coords.min(axis=0).tolist()
+            max_x, max_y = self.coords.max(axis=0).tolist()
+            self._bbox = (min_x, min_y, max_x, max_y)
+        return self._bbox
+
+    @property
+    def bounds(self):
+        """Bounding box in the ``{'x', 'y', 'width', 'height'}`` format"""
+        bbox = self.bbox
+        if bbox is None:
+            return None
+        return {
+            'x': bbox[0],
+            'y': bbox[1],
+            'width': bbox[2] - bbox[0],
+            'height': bbox[3] - bbox[1]
+        }
+
+    @property
+    def fingerprint(self):
+        """
+        Translation-invariant hash of the shape
+
+        Vertices are moved so the bounding box starts at the origin, quantized
+        to the default clipper scale and rotated to start at the lowest (x, y) vertex,
+        so identical shapes share a fingerprint wherever they are placed.
+        """
+        if self._fingerprint is None:
+            quantized = np.empty((0, 2), dtype=np.int64)
+            if len(self):
+                origin = self.coords.min(axis=0)
+                quantized = np.round((self.coords - origin) * self.CLIPPER_SCALE).astype(np.int64)
+                start = np.lexsort((quantized[:, 1], quantized[:, 0]))[0]
+                quantized = np.roll(quantized, -start, axis=0)
+            self._fingerprint = hashlib.blake2b(quantized.tobytes(), digest_size=16).hexdigest()
+        return self._fingerprint
+
+    @property
+    def shape_class(self):
+        """
+        ``'rectangle'`` (axis-aligned), ``'convex'`` or ``'general'``
+
+        Selects the NFP kernel; computed once and carried over by ``translate``.
+        """
+        if self._shape_class is None:
+            self._shape_class = self._classify()
+        return self._shape_class
+
+    def _classify(self, tolerance=1e-7):
+        """Classify the shape for ``shape_class``"""
+        if len(self) < 3:
+            return 'general'
+
+        edges = np.roll(self.coords, -1, axis=0) - self.coords
+        edges = edges[np.hypot(edges[:, 0], edges[:, 1]) > tolerance]
+        if len(edges) < 3:
+            return 'general'
+
+        # Turn angle at every vertex; a convex ring turns one way only, exactly once around
+        following = np.roll(edges, -1, axis=0)
+        cross = edges[:, 0] * following[:, 1] - edges[:, 1] * following[:, 0]
+        dot = (edges * following).sum(axis=1)
+        turns = np.arctan2(cross, dot)
+        if not (np.all(turns >= -tolerance) or np.all(turns <= tolerance)):
+            return 'general'
+        if abs(abs(turns.sum()) - 2 * math.pi) > 1e-6:
+            return 'general'
+
+        # Convex with only axis-parallel edges: an axis-aligned rectangle
+        if np.all((np.abs(edges[:, 0]) <= tolerance) | (np.abs(edges[:, 1]) <= tolerance)):
+            return 'rectangle'
+        return 'convex'
+
+    def translate(self, dx, dy):
+        """Return a translated copy, carrying the cached area, bounds, fingerprint and class over"""
+        result = Polygon(self.coords + (dx, dy))
+        result._area = self._area
+        result._fingerprint = self._fingerprint
+        result._shape_class = self._shape_class
+        if self._bbox is not None:
+            min_x, min_y, max_x, max_y = self._bbox
+            result._bbox = (min_x + dx, min_y + dy, max_x + dx, max_y + dy)
+        return result
+
+    @staticmethod
+    def rotation_matrix(angle_degrees):
+        """Matrix rotating row vectors (``coords @ matrix``) counterclockwise about the origin"""
+        angle_rad = math.radians(angle_degrees)
+        cos_a = math.cos(angle_rad)
+        sin_a = math.sin(angle_rad)
+        return np.array([[cos_a, sin_a], [-sin_a, cos_a]])
+
+    def rotate(self, angle_degrees):
+        """Return a copy rotated about the origin by the given angle in degrees"""
+        result = Polygon(self.coords @ self.rotation_matrix(angle_degrees))
+        result._area = self._area
+        return result
+
+    def reversed(self):
+        """Return a copy with the vertex order reversed"""
+        result = Polygon(self.coords[::-1])
+        if self._area is not None:
+            result._area = -self._area
+        result._bbox = self._bbox
+        return result
@@ -0,0 +1,107 @@
+from collections import OrderedDict
+
+
+class _Node:
+    """Trie node for one ``(part, rotation)`` step of a placement sequence"""
+
+    __slots__ = ('key', 'parent', 'children', 'snapshot')
+
+    def __init__(self, key=None, parent=None):
+        self.key = key
+        self.parent = parent
+        self.children = {}
+        self.snapshot = None
+
+
+class PrefixTrie:
+    """
+    Bounded trie of placement snapshots keyed by ``(part, rotation)`` sequences
+
+    Placement is deterministic, so two sequences sharing a prefix produce the
+    same layout for that prefix.  Snapshots of the layout are stored at
+    checkpoint nodes; a new sequence looks up its longest snapshotted prefix
+    and only places the remaining parts.  At most ``max_snapshots`` snapshots
+    are kept, evicting the least recently used and pruning empty branches.
+    """
+
+    def __init__(self, max_snapshots=1000):
+        """
+        Args:
+            max_snapshots: Number of snapshots to keep
+        """
+        self.max_snapshots = max_snapshots
+        self.root = _Node()
+        self._snapshots = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def longest(self, sequence):
+        """
+        Find the longest prefix of a sequence that has a snapshot
+
+        Args:
+            sequence: List of ``(part, rotation)`` tuples
+
+        Returns:
+            tuple: ``(length, node, snapshot)``; ``(0, root, None)`` if no prefix is stored
+        """
+        node = self.root
+        best = (0, self.root, None)
+        for depth, key in enumerate(sequence, 1):
+            node = node.children.get(key)
+            if node is None:
+                break
+            if node.snapshot is not None:
+                best = (depth, node, node.snapshot)
+
+        if best[2] is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._snapshots.move_to_end(id(best[1]))
+        return best
+
+    def insert(self, node, keys, snapshot):
+        """
+        Store a snapshot below a node
+
+        Args:
+            node: Node the keys continue from (the root or a node from ``longest``/``insert``)
+            keys: ``(part, rotation)`` steps from that node to the checkpoint
+            snapshot: Placement state after the last step
+
+        Returns:
+            _Node: The checkpoint node, to continue inserting from
+        """
+        for key in keys:
+            child = node.children.get(key)
+            if child is None:
+                child = node.children[key] = _Node(key, node)
+            node = child
+
+        if node.snapshot is None:
+            self._snapshots[id(node)] = node
+        else:
+            self._snapshots.move_to_end(id(node))
+        node.snapshot = snapshot
+
+        while len(self._snapshots) > self.max_snapshots:
+            self._evict()
+
+        return node
+
+    def _evict(self):
+        """Drop the least recently used snapshot and prune branches left empty"""
+        _, node = self._snapshots.popitem(last=False)
+        node.snapshot = None
+        while node.parent is not None and not node.children and node.snapshot is None:
+            del node.parent.children[node.key]
+            node = node.parent
+
+    def clear(self):
+        """Remove all snapshots"""
+        self.root = _Node()
+        self._snapshots = OrderedDict()
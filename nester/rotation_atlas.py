@@ -0,0 +1,69 @@
+from .polygon import Polygon
+
+
+class RotationAtlas:
+    """
+    Rotated geometry for every part at every allowed angle
+
+    Built once per run and shared by the genetic algorithm (to pick valid
+    angles) and the placement worker (to fetch rotated points), so no part
+    is rotated more than once per angle.
+    """
+
+    def __init__(self, parts, container, rotations):
+        """
+        Args:
+            parts: List of part dicts with 'points' and optional 'holes'
+            container: Container dict with 'points'
+            rotations: Number of rotation angles (360 / rotations apart), 0 for no rotation
+        """
+        rotations = max(rotations, 1)
+        self.angles = [i * (360 / rotations) for i in range(rotations)]
+        self.container_bounds = Polygon.from_points(container['points']).bounds
+        self.parts = parts
+        self._entries = []
+        self._valid_angles = []
+
+        for part_index in range(len(parts)):
+            entries = {angle: self._build_entry(part_index, angle) for angle in self.angles}
+            self._entries.append(entries)
+            self._valid_angles.append([angle for angle, entry in entries.items() if entry['fits']])
+
+    def _build_entry(self, part_index, angle):
+        """Rotate a part (and its holes) and record its bounds, area and fit against the container"""
+        part = self.parts[part_index]
+        points = Polygon.from_points(part['points'])
+        rotated = points.rotate(angle) if angle != 0 else points
+        holes = [Polygon.from_points(hole) for hole in part.get('holes', [])]
+        bounds = rotated.bounds
+
+        return {
+            'points': rotated,
+            'holes': [hole.rotate(angle) for hole in holes] if angle != 0 else holes,
+            'bounds': bounds,
+            'area': abs(rotated.area),
+            'fits': self.fits(bounds, self.container_bounds)
+        }
+
+    def get(self, part_index, angle):
+        """Get the atlas entry for a part at an angle, adding it if the angle is new"""
+        entries = self._entries[part_index]
+        entry = entries.get(angle)
+        if entry is None:
+            entry = self._build_entry(part_index, angle)
+            entries[angle] = entry
+        return entry
+
+    @staticmethod
+    def fits(bounds, region_bounds):
+        """Whether a bounding box fits inside another one (both in the ``bounds`` format)"""
+        return bounds['width'] <= region_bounds['width'] and bounds['height'] <= region_bounds['height']
+
+    @staticmethod
+    def relative_angle(angle, base_angle):
+        """Rotation taking ``base_angle`` to ``angle``, normalized to [0, 360)"""
+        return round((angle - base_angle) % 360, 9) % 360
+
+    def valid_angles(self, part_index):
+        """Angles at which the part's bounding box fits inside the container's"""
+        return self._valid_angles[part_index]
@@ -0,0 +1,201 @@
+import hashlib
+from multiprocessing import shared_memory
+import numpy as np
+from .packed_nfp import PackedNFP
+from .polygon import Polygon
+
+
+# Segments of closed stores that NFPs handed out still view; detached by a later close
+_unreleased = []
+
+
+class SharedNFPStore:
+    """
+    Append-only NFP store in shared memory, read zero-copy by worker processes
+
+    The coordinator process adds NFPs in batches and every batch becomes one
+    shared memory segment of flat arrays: the sorted key hashes, the first
+    ring of every entry, the first vertex of every ring and the int64
+    clipper coordinates, so an entry is read back as a ``PackedNFP``.
+    A small manifest segment lists the segment names.  Pickling the store
+    sends only the manifest name, so worker processes attach to the same
+    memory instead of each receiving a copy of every NFP, and memory stays
+    flat however many workers there are.  Only the creating process writes.
+    """
+
+    # Segments the manifest can list, and the bytes reserved per segment name
+    MAX_SEGMENTS = 256
+    NAME_BYTES = 64
+
+    def __init__(self, scale=Polygon.CLIPPER_SCALE):
+        """
+        Create an empty store owned by this process
+
+        Args:
+            scale: Clipper units per drawing unit of the stored NFPs
+        """
+        self.scale = scale
+        self._owner = True
+        self._manifest = shared_memory.SharedMemory(create=True, size=8 + self.MAX_SEGMENTS * self.NAME_BYTES)
+        self._manifest.buf[:8] = bytes(8)
+        self.manifest_name = self._manifest.name
+        self._segments = []
+
+    def __getstate__(self):
+        # Readers attach to the manifest by name in the receiving process
+        return {'manifest_name': self.manifest_name, 'scale': self.scale}
+
+    def __setstate__(self, state):
+        self.manifest_name = state['manifest_name']
+        self.scale = state['scale']
+        self._owner = False
+        self._manifest = None
+        self._segments = []
+
+    @staticmethod
+    def key_hash(key):
+        """64-bit hash of an NFP cache key, as stored in the segments"""
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=8).digest()
+        return int.from_bytes(digest, 'little', signed=True)
+
+    def add(self, entries):
+        """
+        Append NFPs as a new segment
+
+        Args:
+            entries: Iterable of ``(key, nfp)`` pairs, nfp being a PackedNFP
+                or a list of Polygons; keys already stored are skipped
+
+        Returns:
+            int: Number of entries added
+        """
+        if not self._owner:
+            raise RuntimeError("Only the process that created the store can add to it")
+
+        pending = {}
+        for key, nfp in entries:
+            key_hash = self.key_hash(key)
+            if key_hash not in pending and self._find(key_hash) is None:
+                pending[key_hash] = PackedNFP.from_polygons(nfp, self.scale)
+        if not pending:
+            return 0
+        if len(self._segments) >= self.MAX_SEGMENTS:
+            raise RuntimeError("Shared NFP store is out of segments")
+
+        hashes = np.array(sorted(pending), dtype=np.int64)
+        nfps = [pending[key_hash] for key_hash in hashes.tolist()]
+        entry_rings = np.concatenate([[0], np.cumsum([len(nfp) for nfp in nfps])]).astype(np.int64)
+        # Ring offsets of every entry, moved to where its vertices start in the segment
+        vertex_starts = np.concatenate([[0], np.cumsum([len(nfp.vertices) for nfp in nfps])])
+        ring_starts = np.concatenate([[0]] + [nfp.ring_starts[1:] + start for nfp, start in zip(nfps, vertex_starts)])
+        vertices = np.concatenate([nfp.vertices for nfp in nfps])
+
+        # Header (entry, ring and vertex counts) followed by the arrays, all 8-byte aligned
+        header = np.array([len(hashes), entry_rings[-1], len(vertices)], dtype=np.int64)
+        arrays = [header, hashes, entry_rings, ring_starts.astype(np.int64), np.ascontiguousarray(vertices)]
+        segment = shared_memory.SharedMemory(create=True, size=sum(array.nbytes for array in arrays))
+        offset = 0
+        for array in arrays:
+            segment.buf[offset:offset + array.nbytes] = array.tobytes()
+            offset += array.nbytes
+
+        # The count is written last, so readers never see a half-listed segment
+        index = len(self._segments)
+        name = segment.name.encode()
+        start = 8 + index * self.NAME_BYTES
+        self._manifest.buf[start:start + self.NAME_BYTES] = name.ljust(self.NAME_BYTES, b'\0')
+        self._manifest.buf[:8] = np.int64(index + 1).tobytes()
+        self._segments.append(self._view(segment))
+        return len(hashes)
+
+    def get(self, key):
+        """Return the stored NFP for a key as a PackedNFP viewing the shared memory, or None"""
+        found = self._find(self.key_hash(key))
+        if found is None:
+            return None
+
+        (_, _, entry_rings, ring_starts, vertices), index = found
+        starts = ring_starts[entry_rings[index]:entry_rings[index + 1] + 1]
+        return PackedNFP(vertices[starts[0]:starts[-1]], starts - starts[0], self.scale)
+
+    def __contains__(self, key):
+        return self._find(self.key_hash(key)) is not None
+
+    def __len__(self):
+        self._refresh()
+        return sum(len(segment[1]) for segment in self._segments)
+
+    @property
+    def nbytes(self):
+        """Shared memory used by the segments"""
+        self._refresh()
+        return sum(segment[0].size for segment in self._segments)
+
+    def _find(self, key_hash):
+        """Locate a key hash, returning ``(segment, entry index)`` or None"""
+        self._refresh()
+        for segment in self._segments:
+            hashes = segment[1]
+            index = int(np.searchsorted(hashes, key_hash))
+            if index < len(hashes) and hashes[index] == key_hash:
+                return segment, index
+        return None
+
+    def _refresh(self):
+        """Attach to segments the owner added since the last look at the manifest"""
+        if self._owner:
+            return
+        if self._manifest is None:
+            self._manifest = shared_memory.SharedMemory(name=self.manifest_name)
+        count = int(np.frombuffer(self._manifest.buf, dtype=np.int64, count=1)[0])
+        for index in range(len(self._segments), count):
+            start = 8 + index * self.NAME_BYTES
+            name = bytes(self._manifest.buf[start:start + self.NAME_BYTES]).rstrip(b'\0').decode()
+            self._segments.append(self._view(shared_memory.SharedMemory(name=name)))
+
+    @staticmethod
+    def _view(segment):
+        """Read-only array views of a segment: ``(memory, hashes, entry_rings, ring_starts, vertices)``"""
+        entries, rings, vertex_count = np.frombuffer(segment.buf, dtype=np.int64, count=3).tolist()
+        offset = 24
+        views = []
+        for count in (entries, entries + 1, rings + 1):
+            views.append(np.frombuffer(segment.buf, dtype=np.int64, count=count, offset=offset))
+            offset += 8 * count
+        vertices = np.frombuffer(segment.buf, dtype=np.int64, count=2 * vertex_count, offset=offset)
+        views.append(vertices.reshape(-1, 2))
+        for view in views:
+            view.flags.writeable = False
+        return (segment, *views)
+
+    def close(self):
+        """
+        Detach from the shared memory; the owner also frees it
+
+        NFPs returned by ``get`` view the memory.  Memory still viewed when the
+        store is closed stays mapped until they are gone and is detached by a
+        later ``close``; the owner frees it right away all the same.
+        """
+        memories = [segment[0] for segment in self._segments]
+        if self._manifest is not None:
+            memories.append(self._manifest)
+        # Dropping the store's own array views releases its exports of the buffers
+        self._segments = []
+        self._manifest = None
+
+        if self._owner:
+            for memory in memories:
+                memory.unlink()
+        _unreleased.extend(memories)
+        self._release()
+
+    @staticmethod
+    def _release():
+        """Detach from closed stores' memory that nothing views any more"""
+        viewed = []
+        for memory in _unreleased:
+            try:
+                memory.close()
+            except BufferError:
+                viewed.append(memory)
+        _unreleased[:] = viewed
@@ -115,6 +115,22 @@ class TestDXFHandler(unittest.TestCase):
         self.assertAlmostEqual(last_point['x'], 0, places=5)
         self.assertAlmostEqual(last_point['y'], radius, places=5)
     
+    def test_group_holes(self):
+        """Test grouping contours into outlines with holes"""
+        def square(x, y, size):
+            return [{'x': x, 'y': y}, {'x': x + size, 'y': y},
+                    {'x': x + size, 'y': y + size}, {'x': x, 'y': y + size}]
+        
+        # A plate with two holes, an island in one of them, and a separate part
+        plate, hole, island, other_hole = square(0, 0, 20), square(2, 2, 10), square(4, 4, 4), square(14, 14, 4)
+        separate = square(30, 0, 5)
+        parts = DXFHandler.group_holes([hole, plate, island, separate, other_hole])
+        
+        self.assertEqual([part['points'] for part in parts], [plate, island, separate])
+        self.assertEqual(parts[0]['holes'], [hole, other_hole])
+        self.assertEqual(parts[1]['holes'], [])
+        self.assertEqual(parts[2]['holes'], [])
+    
     @patch('ezdxf.readfile')
     def test_read_dxf_basic(self, mock_readfile):
         """Test basic DXF reading functionality"""
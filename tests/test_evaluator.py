@@ -0,0 +1,124 @@
+import unittest
+from nester import Nester
+from nester.evaluator import PopulationEvaluator
+from nester.genetic_algorithm import GeneticAlgorithm
+from nester.nfp_cache import NFPCache
+from nester.polygon import Polygon
+from nester.rotation_atlas import RotationAtlas
+
+
+class TestPopulationEvaluator(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.container = {'points': Polygon([(0, 0), (20, 0), (20, 15), (0, 15)])}
+        self.parts = [
+            {'id': 0, 'points': Polygon([(0, 0), (6, 0), (6, 2), (2, 2), (2, 5), (0, 5)]), 'area': 18},
+            {'id': 1, 'points': Polygon([(0, 0), (5, 0), (5, 3), (0, 3)]), 'area': 15, 'quantity': 3},
+            {'id': 2, 'points': Polygon([(0, 0), (4, 0), (4, 4), (0, 4)]), 'area': 16}
+        ]
+        self.config = {
+            'rotations': 4,
+            'population_size': 6,
+            'mutation_rate': 30,
+            'seed': 3
+        }
+        self.atlas = RotationAtlas(self.parts, self.container, self.config['rotations'])
+    
+    def evaluate(self, **settings):
+        config = dict(self.config, **settings)
+        ga = GeneticAlgorithm(self.parts, self.container, config, self.atlas)
+        with PopulationEvaluator(self.container, self.parts, NFPCache(config),
+                                 config, self.atlas) as evaluator:
+            genomes = {GeneticAlgorithm.genome_key(individual) for individual in ga.population}
+            self.assertEqual(evaluator.evaluate(ga.population), len(genomes))
+        return [(individual['fitness'], individual['result']['placements']) for individual in ga.population]
+    
+    def test_executors_agree(self):
+        """Test that every executor gives the serial results"""
+        serial = self.evaluate(executor='serial')
+        
+        self.assertEqual(self.evaluate(executor='thread', workers=3), serial)
+        self.assertEqual(self.evaluate(executor='process', workers=2), serial)
+    
+    def test_cache_counters_reach_parent(self):
+        """Test that NFP lookups made in pool workers are counted in the parent's cache"""
+        config = dict(self.config, prefix_checkpoint_interval=0)
+        lookups = []
+        for settings in ({'executor': 'serial'}, {'executor': 'thread', 'workers': 3},
+                         {'executor': 'process', 'workers': 2}):
+            nfp_cache = NFPCache(config)
+            ga = GeneticAlgorithm(self.parts, self.container, config, self.atlas)
+            with PopulationEvaluator(self.container, self.parts, nfp_cache,
+                                     dict(config, **settings), self.atlas) as evaluator:
+                evaluator.evaluate(ga.population)
+            statistics = nfp_cache.get_statistics()
+            self.assertGreater(statistics['misses'], 0)
+            lookups.append(statistics['hits'] + statistics['misses'])
+        
+        self.assertEqual(len(set(lookups)), 1)
+    
+    def test_coarse_parts_share_the_pool(self):
+        """Test that one evaluator places exact and coarse parts, on every executor"""
+        coarse_parts = [dict(part, points=Polygon(part['points'].coords * 1.1)) for part in self.parts]
+        coarse_atlas = RotationAtlas(coarse_parts, self.container, self.config['rotations'])
+        ga = GeneticAlgorithm(self.parts, self.container, self.config, self.atlas)
+        
+        results = []
+        for settings in ({'executor': 'serial'}, {'executor': 'process', 'workers': 2}):
+            config = dict(self.config, **settings)
+            with PopulationEvaluator(self.container, self.parts, NFPCache(config), config, self.atlas,
+                                     coarse_parts, coarse_atlas) as evaluator:
+                placements = []
+                for coarse in (True, False):
+                    population = [dict(individual, fitness=float('inf')) for individual in ga.population]
+                    evaluator.evaluate(population, coarse)
+                    placements.append([individual['result']['placements'] for individual in population])
+            results.append(placements)
+        
+        self.assertEqual(results[0], results[1])
+        self.assertNotEqual(results[0][0], results[0][1])
+        
+        with self.assertRaises(ValueError):
+            PopulationEvaluator(self.container, self.parts, NFPCache(), self.config).evaluate(ga.population, True)
+    
+    def test_single_worker_is_serial(self):
+        """Test that one worker never starts a pool"""
+        evaluator = PopulationEvaluator(self.container, self.parts, NFPCache(),
+                                        dict(self.config, executor='process', workers=1))
+        self.assertEqual(evaluator.kind, 'serial')
+    
+    def test_skips_evaluated_individuals(self):
+        """Test that only individuals without a fitness are placed"""
+        ga = GeneticAlgorithm(self.parts, self.container, self.config, self.atlas)
+        evaluator = PopulationEvaluator(self.container, self.parts, NFPCache(), self.config, self.atlas)
+        
+        genomes = {GeneticAlgorithm.genome_key(individual) for individual in ga.population}
+        self.assertEqual(evaluator.evaluate(ga.population), len(genomes))
+        self.assertEqual(evaluator.evaluate(ga.population), 0)
+        
+        ga.population[0]['fitness'] = float('inf')
+        self.assertEqual(evaluator.evaluate(ga.population), 1)
+    
+    def test_unknown_executor(self):
+        """Test that an unknown executor name is rejected"""
+        with self.assertRaises(ValueError):
+            PopulationEvaluator(self.container, self.parts, NFPCache(), dict(self.config, executor='gpu'))
+    
+    def test_seeded_runs_are_reproducible(self):
+        """Test that a seed gives the same nesting serially and in parallel"""
+        results = []
+        for workers in (1, 2):
+            nester = Nester({'rotations': 4, 'population_size': 6, 'max_generations': 3,
+                             'seed': 11, 'workers': workers})
+            nester.add_container(self.container['points'])
+            for part in self.parts:
+                nester.add_part(part['points'], quantity=part.get('quantity', 1))
+            result = nester.run()
+            results.append((result['fitness'], result['placements']))
+        
+        self.assertEqual(results[0], results[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
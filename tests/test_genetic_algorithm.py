@@ -145,6 +145,24 @@ class TestGeneticAlgorithm(unittest.TestCase):
             expected_ids = set(range(len(self.parts)))
             self.assertEqual(placement_ids, expected_ids)
     
+    def test_quantities(self):
+        """Test that genomes repeat part indices by quantity"""
+        parts = [dict(part) for part in self.parts]
+        parts[0]['quantity'] = 3
+        parts[2]['quantity'] = 2
+        expected = [0, 0, 0, 1, 2, 2]
+        
+        ga = GeneticAlgorithm(parts, self.container, self.config)
+        for individual in ga.population:
+            self.assertEqual(sorted(individual['placement']), expected)
+            self.assertEqual(len(individual['rotation']), len(expected))
+        
+        # Crossover must keep the multiset of parts intact
+        for _ in range(20):
+            offspring1, offspring2 = ga._crossover(ga.population[0], ga._mutate(ga.population[1]))
+            self.assertEqual(sorted(offspring1['placement']), expected)
+            self.assertEqual(sorted(offspring2['placement']), expected)
+    
     def test_tournament_selection(self):
         """Test tournament selection"""
         ga = GeneticAlgorithm(self.parts, self.container, self.config)
@@ -204,6 +222,21 @@ class TestGeneticAlgorithm(unittest.TestCase):
         best = ga.get_best()
         self.assertEqual(best['fitness'], 10)  # Lowest fitness
     
+    def test_reset_fitness(self):
+        """Test forgetting fitness values when the evaluation geometry changes"""
+        ga = GeneticAlgorithm(self.parts, self.container, self.config)
+        for individual in ga.population:
+            individual['fitness'] = 10
+            individual['result'] = {'placed_count': 3}
+        ga.cache_fitness()
+        self.assertGreater(len(ga.fitness_cache), 0)
+        
+        ga.reset_fitness()
+        self.assertEqual(len(ga.fitness_cache), 0)
+        for individual in ga.population:
+            self.assertEqual(individual['fitness'], float('inf'))
+            self.assertNotIn('result', individual)
+    
     def test_get_statistics(self):
         """Test statistics generation"""
         ga = GeneticAlgorithm(self.parts, self.container, self.config)
@@ -1,6 +1,9 @@
 import unittest
 import math
+import numpy as np
+from shapely.geometry import Polygon as ShapelyPolygon
 from nester.geometry_utils import GeometryUtils
+from nester.polygon import Polygon
 
 
 class TestGeometryUtils(unittest.TestCase):
@@ -110,6 +113,90 @@ class TestGeometryUtils(unittest.TestCase):
         result = GeometryUtils.point_in_polygon(edge_point, self.rectangle)
         self.assertIsInstance(result, bool)
     
+    def test_points_in_polygon_batch(self):
+        """Test batched point in polygon detection"""
+        # Grid of points strictly off the L-shape edges
+        xs, ys = np.meshgrid(np.arange(-0.5, 11, 1.0), np.arange(-0.5, 9, 1.0))
+        points = np.column_stack([xs.ravel(), ys.ravel()])
+        
+        result = GeometryUtils.points_in_polygon(points, self.l_shape)
+        
+        self.assertEqual(result.shape, (len(points),))
+        self.assertEqual(result.dtype, bool)
+        
+        for (x, y), inside in zip(points, result):
+            in_foot = 0 < x < 10 and 0 < y < 3
+            in_stem = 0 < x < 3 and 0 < y < 8
+            self.assertEqual(inside, in_foot or in_stem, (x, y))
+            self.assertEqual(inside, GeometryUtils.point_in_polygon({'x': x, 'y': y}, self.l_shape))
+        
+        # Dict points are accepted too
+        dict_result = GeometryUtils.points_in_polygon([{'x': 5, 'y': 2.5}, {'x': 15, 'y': 2.5}], self.rectangle)
+        self.assertEqual(dict_result.tolist(), [True, False])
+        
+        # Empty input
+        self.assertEqual(len(GeometryUtils.points_in_polygon(np.empty((0, 2)), self.rectangle)), 0)
+        
+        # Several rings fill even-odd, so a ring inside another is a hole
+        hole = [{'x': 2, 'y': 1}, {'x': 4, 'y': 1}, {'x': 4, 'y': 4}, {'x': 2, 'y': 4}]
+        result = GeometryUtils.points_in_polygons([(1, 2), (3, 2), (11, 2)], [self.rectangle, hole])
+        self.assertEqual(result.tolist(), [True, False, False])
+        self.assertFalse(GeometryUtils.points_in_polygons([(1, 2)], []).any())
+    
+    def test_polygon_difference(self):
+        """Test subtracting overlapping clip polygons"""
+        square = [{'x': 0, 'y': 0}, {'x': 10, 'y': 0}, {'x': 10, 'y': 10}, {'x': 0, 'y': 10}]
+        # Overlapping clips of opposite orientation are still unioned
+        clip_ccw = [{'x': 2, 'y': 2}, {'x': 5, 'y': 2}, {'x': 5, 'y': 5}, {'x': 2, 'y': 5}]
+        clip_cw = [{'x': 4, 'y': 4}, {'x': 4, 'y': 7}, {'x': 7, 'y': 7}, {'x': 7, 'y': 4}]
+        
+        result = GeometryUtils.polygon_difference([square], [clip_ccw, clip_cw])
+        
+        # The remaining area is the square minus the union of the clips (9 + 9 - 1)
+        area = sum(polygon.area for polygon in result)
+        self.assertAlmostEqual(abs(area), 100 - 17)
+        
+        # Clips covering everything leave nothing
+        self.assertEqual(GeometryUtils.polygon_difference([clip_ccw], [square]), [])
+        
+        # Offsets move the clips without changing them
+        moved = GeometryUtils.polygon_difference([square], [clip_ccw], [(6, 6)])
+        # The 3x3 clip moved to (8, 8) only covers a 2x2 corner
+        self.assertAlmostEqual(abs(sum(polygon.area for polygon in moved)), 100 - 4)
+        self.assertEqual(clip_ccw[0], {'x': 2, 'y': 2})
+        
+        # A hole ring leaves its part of the outer ring open, unless another clip covers it
+        outer = [{'x': 1, 'y': 1}, {'x': 9, 'y': 1}, {'x': 9, 'y': 9}, {'x': 1, 'y': 9}]
+        hole = [{'x': 3, 'y': 3}, {'x': 7, 'y': 3}, {'x': 7, 'y': 7}, {'x': 3, 'y': 7}]
+        result = GeometryUtils.polygon_difference([square], [outer, hole], clip_holes=[False, True])
+        self.assertAlmostEqual(sum(polygon.area for polygon in result), 100 - 64 + 16)
+        
+        result = GeometryUtils.polygon_difference([square], [outer, hole, clip_ccw], clip_holes=[False, True, False])
+        self.assertAlmostEqual(sum(polygon.area for polygon in result), 100 - 64 + 16 - 4)
+    
+    def test_polygon_intersection(self):
+        """Test intersecting polygons, holes included"""
+        square = Polygon([(0, 0), (10, 0), (10, 10), (0, 10)])
+        hole = Polygon([(2, 2), (4, 2), (4, 4), (2, 4)])
+        moved = square.translate(3, 3)
+        
+        result = GeometryUtils.polygon_intersection([square, hole], [moved])
+        self.assertAlmostEqual(sum(polygon.area for polygon in result), 49 - 1)
+        self.assertEqual(GeometryUtils.polygon_intersection([square], [square.translate(20, 0)]), [])
+    
+    def test_nearest_boundary_points(self):
+        """Test projecting points onto the closest edge of several rings"""
+        square = Polygon([(0, 0), (10, 0), (10, 10), (0, 10)])
+        hole = Polygon([(4, 4), (6, 4), (6, 6), (4, 6)])
+        
+        nearest, distances = GeometryUtils.nearest_boundary_points([(5, -2), (12, 13), (5, 4.5), (1, 5)],
+                                                                   [square, hole])
+        np.testing.assert_allclose(nearest, [(5, 0), (10, 10), (5, 4), (0, 5)])
+        np.testing.assert_allclose(distances, [2, math.hypot(2, 3), 0.5, 1])
+        
+        nearest, distances = GeometryUtils.nearest_boundary_points([(1, 1)], [])
+        self.assertEqual(distances.tolist(), [float('inf')])
+    
     def test_is_rectangle(self):
         """Test rectangle detection"""
         self.assertTrue(GeometryUtils.is_rectangle(self.rectangle))
@@ -133,6 +220,95 @@ class TestGeometryUtils(unittest.TestCase):
             original_bounds = GeometryUtils.get_polygon_bounds(self.rectangle)
             self.assertLess(offset_bounds['width'], original_bounds['width'])
             self.assertLess(offset_bounds['height'], original_bounds['height'])
+    
+    def test_polygon_offset_curve_tolerance(self):
+        """Test that round joins respect the curve tolerance in model units"""
+        coarse = GeometryUtils.polygon_offset(self.rectangle, 1, curve_tolerance=0.3)
+        fine = GeometryUtils.polygon_offset(self.rectangle, 1, curve_tolerance=0.01)
+        
+        # A 1-unit radius corner needs only a handful of segments at 0.3 tolerance
+        self.assertLess(len(coarse), 40)
+        self.assertGreater(len(fine), len(coarse))
+    
+    def test_simplify_polygon_stays_simple(self):
+        """Test that simplified noisy outlines never self-intersect or flip orientation"""
+        for seed in range(50):
+            rng = np.random.default_rng(seed)
+            angles = np.sort(rng.uniform(0, 2 * np.pi, 40))
+            radii = 5 + rng.normal(0, 0.3, 40)
+            outline = Polygon(np.column_stack([radii * np.cos(angles), radii * np.sin(angles)]))
+            original = ShapelyPolygon(outline.coords)
+            
+            for outward in (True, False):
+                with self.subTest(seed=seed, outward=outward):
+                    simplified = GeometryUtils.simplify_polygon(outline, 0.3, outward=outward)
+                    shape = ShapelyPolygon(simplified.coords)
+                    self.assertTrue(shape.is_valid)
+                    self.assertEqual(simplified.area > 0, outline.area > 0)
+                    if outward:
+                        self.assertTrue(shape.buffer(1e-6).contains(original))
+                    else:
+                        self.assertTrue(original.buffer(1e-6).contains(shape))
+    
+    def test_exact_fit_margin(self):
+        """Test that the exact-fit margin is at least two clipper units"""
+        self.assertEqual(GeometryUtils.exact_fit_margin(), GeometryUtils.EXACT_FIT_MARGIN)
+        self.assertEqual(GeometryUtils.exact_fit_margin(1000), 0.002)
+    
+    def test_simplify_polygon(self):
+        """Test that simplification drops vertices without crossing the original outline"""
+        # Densely sampled ellipse
+        ellipse = [{'x': 10 * math.cos(2 * math.pi * i / 200), 'y': 6 * math.sin(2 * math.pi * i / 200)}
+                   for i in range(200)]
+        original = ShapelyPolygon([(p['x'], p['y']) for p in ellipse])
+        
+        grown = GeometryUtils.simplify_polygon(ellipse, 0.3, outward=True)
+        shrunk = GeometryUtils.simplify_polygon(ellipse, 0.3, outward=False)
+        self.assertLess(len(grown), 50)
+        self.assertLess(len(shrunk), 50)
+        
+        grown_shape = ShapelyPolygon([(p['x'], p['y']) for p in grown])
+        shrunk_shape = ShapelyPolygon([(p['x'], p['y']) for p in shrunk])
+        self.assertTrue(grown_shape.buffer(1e-6).contains(original))
+        self.assertTrue(original.buffer(1e-6).contains(shrunk_shape))
+        self.assertLessEqual(original.hausdorff_distance(grown_shape), 0.3)
+        self.assertLessEqual(original.hausdorff_distance(shrunk_shape), 0.3)
+        
+        # Collinear vertices are dropped without moving the outline
+        square = [{'x': x, 'y': y} for x, y in [(0, 0), (1, 0), (2, 0), (2, 1), (2, 2), (1, 2), (0, 2), (0, 1)]]
+        simplified = GeometryUtils.simplify_polygon(square, 0.3)
+        self.assertEqual(len(simplified), 4)
+        self.assertEqual(GeometryUtils.get_polygon_bounds(simplified),
+                         {'x': 0, 'y': 0, 'width': 2, 'height': 2})
+        self.assertGreater(GeometryUtils.polygon_area(simplified) * GeometryUtils.polygon_area(square), 0)
+        
+        # Nothing to drop
+        self.assertIs(GeometryUtils.simplify_polygon(self.l_shape, 0.3), self.l_shape)
+    
+    def test_simplify_polygon_keeps_narrow_features(self):
+        """Test that a narrow tab and slot survive simplifying a jagged edge elsewhere"""
+        # 20x10 plates with a lightly jagged top edge and a 0.5 wide, 3 deep tab or slot at the bottom
+        top = [(20 - i, 10.3 if i % 2 else 10) for i in range(1, 20)]
+        plates = {
+            'tab': [(0, 0), (9.75, 0), (9.75, -3), (10.25, -3), (10.25, 0), (20, 0), (20, 10)] + top + [(0, 10)],
+            'slot': [(0, 0), (9.75, 0), (9.75, 3), (10.25, 3), (10.25, 0), (20, 0), (20, 10)] + top + [(0, 10)]
+        }
+        
+        for name, coords in plates.items():
+            original = ShapelyPolygon(coords)
+            for outward in (True, False):
+                with self.subTest(plate=name, outward=outward):
+                    simplified = GeometryUtils.simplify_polygon([{'x': x, 'y': y} for x, y in coords],
+                                                                1.0, outward=outward)
+                    shape = ShapelyPolygon([(p['x'], p['y']) for p in simplified])
+                    self.assertLess(len(simplified), len(coords))
+                    # Closing the slot or cutting off the tab would move the outline by 3
+                    self.assertLessEqual(original.hausdorff_distance(shape), 1.0)
+                    self.assertLess(abs(shape.area - original.area), 0.05 * original.area)
+                    if outward:
+                        self.assertTrue(shape.buffer(1e-6).contains(original))
+                    else:
+                        self.assertTrue(original.buffer(1e-6).contains(shape))
 
 
 if __name__ == '__main__':
@@ -1,5 +1,9 @@
 import unittest
-from nester import Nester
+import math
+from shapely.geometry import Polygon as ShapelyPolygon
+from nester import Nester, GeometryUtils
+from nester.evaluator import PopulationEvaluator
+from nester.placement_worker import PlacementWorker
 
 
 class TestNester(unittest.TestCase):
@@ -126,6 +130,216 @@ class TestNester(unittest.TestCase):
         self.assertEqual(nester.parts[0]['id'], 'part1')
         self.assertEqual(nester.parts[1]['id'], 'part2')
     
+    def test_add_parts_with_quantity(self):
+        """Test adding parts with a quantity"""
+        nester = Nester(self.config)
+        
+        nester.add_part(self.parts_data[0], quantity=4)
+        nester.add_parts([{'points': self.parts_data[1], 'id': 'bracket', 'quantity': 3}])
+        
+        # One entry per unique shape
+        self.assertEqual(len(nester.parts), 2)
+        self.assertEqual(nester.parts[0]['quantity'], 4)
+        self.assertEqual(nester.parts[1]['quantity'], 3)
+        self.assertEqual(nester.total_quantity(), 7)
+        
+        with self.assertRaises(ValueError):
+            nester.add_part(self.parts_data[0], quantity=0)
+        with self.assertRaises(ValueError):
+            nester.add_part(self.parts_data[0], quantity=1.5)
+    
+    def test_run_with_quantities(self):
+        """Test that part instances are nested and reported individually"""
+        nester = Nester(self.config)
+        nester.add_container(self.container_points)
+        nester.add_parts([
+            {'points': self.parts_data[0], 'id': 'a', 'quantity': 3},
+            {'points': self.parts_data[2], 'id': 'b', 'quantity': 2}
+        ])
+        
+        result = nester.run(max_generations=3)
+        self.assertEqual(result['total_parts'], 5)
+        self.assertEqual(len(nester.ga.population[0]['placement']), 5)
+        
+        placement_data = nester.get_placement_data()
+        placed = [part['id'] for part in placement_data[0]['parts']]
+        self.assertEqual(len(placed), result['placed_count'])
+        self.assertLessEqual(placed.count('a'), 3)
+        self.assertLessEqual(placed.count('b'), 2)
+    
+    def test_exact_fit_in_rectangular_sheet(self):
+        """Test that parts filling a rectangular sheet exactly are all placed"""
+        sheet = [{'x': 0, 'y': 0}, {'x': 10, 'y': 0}, {'x': 10, 'y': 10}, {'x': 0, 'y': 10}]
+        half = [{'x': 0, 'y': 0}, {'x': 10, 'y': 0}, {'x': 10, 'y': 5}, {'x': 0, 'y': 5}]
+        
+        nester = Nester(dict(self.config, spacing=0, rotations=1))
+        nester.add_container(sheet)
+        nester.add_part(half, quantity=2)
+        
+        result = nester.run(max_generations=2)
+        self.assertEqual(result['placed_count'], 2)
+        for part in nester.get_placement_data()[0]['parts']:
+            bounds = GeometryUtils.get_polygon_bounds(part['placed_points'])
+            self.assertGreaterEqual(bounds['x'], -1e-9)
+            self.assertGreaterEqual(bounds['y'], -1e-9)
+            self.assertLessEqual(bounds['x'] + bounds['width'], 10 + 1e-9)
+            self.assertLessEqual(bounds['y'] + bounds['height'], 10 + 1e-9)
+    
+    def test_parts_with_holes(self):
+        """Test that small parts are nested into the holes of larger ones"""
+        ring = {
+            'points': [{'x': 10, 'y': 10}, {'x': 22, 'y': 10}, {'x': 22, 'y': 22}, {'x': 10, 'y': 22}],
+            'holes': [[{'x': 12, 'y': 12}, {'x': 20, 'y': 12}, {'x': 20, 'y': 20}, {'x': 12, 'y': 20}]],
+            'id': 'ring'
+        }
+        square = {'points': self.parts_data[1], 'id': 'square', 'quantity': 4}
+        container = [{'x': 0, 'y': 0}, {'x': 17, 'y': 0}, {'x': 17, 'y': 12.5}, {'x': 0, 'y': 12.5}]
+        
+        config = dict(self.config, spacing=0, rotations=1)
+        nester = Nester(dict(config, use_holes=True))
+        nester.add_container(container)
+        nester.add_parts([ring, square])
+        
+        # Holes move with the outline and count against the part's area
+        ring_part = nester.parts[0]
+        self.assertEqual(ring_part['holes'][0].bbox, (2, 2, 10, 10))
+        self.assertEqual(ring_part['area'], 144 - 64)
+        
+        # Spacing grows the outline and shrinks the holes
+        spaced = Nester(self.config)
+        spaced.add_parts([ring])
+        self.assertEqual(spaced.parts[0]['holes'][0].bbox, (2.5, 2.5, 9.5, 9.5))
+        
+        # Four squares fill the hole; the sheet only has room for three beside the ring
+        result = nester.run(max_generations=3)
+        self.assertEqual(result['placed_count'], 5)
+        
+        placement_data = nester.get_placement_data()
+        placed_ring = [part for part in placement_data[0]['parts'] if part['id'] == 'ring'][0]
+        self.assertEqual(len(placed_ring['placed_holes']), 1)
+        self.assertEqual(len(result['parts'][0]['holes']), 1)
+        
+        # Without part-in-part placement the hole stays empty
+        nester = Nester(config)
+        nester.add_container(container)
+        nester.add_parts([ring, square])
+        self.assertLess(nester.run(max_generations=3)['placed_count'], 5)
+    
+    def test_clipper_scale(self):
+        """Test nesting exact fits at a coarse clipper scale"""
+        square = {'points': [{'x': 0, 'y': 0}, {'x': 5, 'y': 0}, {'x': 5, 'y': 5}, {'x': 0, 'y': 5}],
+                  'quantity': 12}
+        
+        for scale in (1000, 1000000):
+            nester = Nester(dict(self.config, spacing=0, rotations=1, clipper_scale=scale))
+            nester.add_container(self.container_points)
+            nester.add_parts([square])
+            self.assertEqual(nester.run(max_generations=2)['placed_count'], 12)
+            
+            # NFPs computed at one scale are not served at another
+            key = nester.nfp_cache.key(nester.parts[0]['points'], nester.parts[0]['points'], False)
+            self.assertEqual(key[-1], scale)
+        
+        for scale in (0, 1.5):
+            with self.assertRaises(ValueError):
+                Nester({'clipper_scale': scale})
+    
+    def test_simplify(self):
+        """Test that parts and containers are simplified conservatively and counted"""
+        disc = [{'x': 3 + 3 * math.cos(2 * math.pi * i / 120), 'y': 3 + 3 * math.sin(2 * math.pi * i / 120)}
+                for i in range(120)]
+        
+        nester = Nester(dict(self.config, spacing=0, simplify=True))
+        nester.add_container(self.container_points)
+        nester.add_part(disc, quantity=4)
+        
+        # The part only grows
+        plain = Nester(dict(self.config, spacing=0))
+        plain.add_part(disc)
+        part = nester.parts[0]
+        self.assertLess(len(part['points']), 40)
+        self.assertGreaterEqual(part['area'], plain.parts[0]['area'])
+        self.assertEqual(nester.simplification['shapes'], 2)
+        self.assertEqual(nester.simplification['vertices_before'], 4 + 120)
+        self.assertEqual(nester.simplification['vertices_after'], 4 + len(part['points']))
+        
+        result = nester.run(max_generations=2)
+        self.assertEqual(result['placed_count'], 4)
+    
+    def test_multi_fidelity(self):
+        """Test coarse generations followed by exact ones"""
+        disc = [{'x': 2 + 2 * math.cos(2 * math.pi * i / 64), 'y': 2 + 2 * math.sin(2 * math.pi * i / 64)}
+                for i in range(64)]
+        config = dict(self.config, spacing=0, coarse_generations=2, coarse_tolerance=0.5, seed=1)
+        nester = Nester(config)
+        nester.add_container(self.container_points)
+        nester.add_parts([{'points': disc, 'quantity': 30}] + self.parts_data)
+        
+        fidelities = []
+        result = nester.run(max_generations=4, progress_callback=lambda stats: fidelities.append(stats['fidelity']))
+        self.assertEqual(fidelities[:2], ['coarse', 'coarse'])
+        self.assertTrue(all(fidelity == 'exact' for fidelity in fidelities[2:]))
+        
+        # Coarse outlines are simpler and cover the exact ones
+        index = [len(part['points']) for part in nester.sorted_parts].index(64)
+        self.assertLess(len(nester.coarse_parts[index]['points']), 64)
+        self.assertGreaterEqual(abs(nester.coarse_parts[index]['points'].area),
+                                abs(nester.sorted_parts[index]['points'].area))
+        
+        # The best result is an exact layout: exact placement reproduces its fitness
+        worker = PlacementWorker(nester.container, nester.sorted_parts, nester.nfp_cache, nester.config, nester.atlas)
+        self.assertGreater(result['placed_count'], 0)
+        self.assertEqual(worker.place_parts(nester.best_result)['fitness'], result['fitness'])
+        
+        # Genomes refined before are not placed again
+        evaluator = PopulationEvaluator(nester.container, nester.sorted_parts, nester.nfp_cache,
+                                        dict(nester.config, workers=1), nester.atlas)
+        placed = []
+        evaluate = evaluator.evaluate
+        evaluator.evaluate = lambda population: placed.append(evaluate(population))
+        nester.refined_fitness.clear()
+        first = nester._refine(evaluator)
+        self.assertEqual(nester._refine(evaluator)['fitness'], first['fitness'])
+        self.assertEqual(placed, [1, 0])
+    
+    def test_coarse_outlines_of_small_parts(self):
+        """Test that coarse outlines of small parts and holes stay within the coarse tolerance"""
+        disc = [{'x': 1 + math.cos(2 * math.pi * i / 48), 'y': 1 + math.sin(2 * math.pi * i / 48)}
+                for i in range(48)]
+        # 3x2 part with a 0.2 wide notch and a jagged top edge
+        notched = ([(0, 0), (1.4, 0), (1.4, 1.5), (1.6, 1.5), (1.6, 0), (3, 0), (3, 2)] +
+                   [(3 - 0.25 * i, 2.1 if i % 2 else 2) for i in range(1, 12)] + [(0, 2)])
+        hole = [{'x': 2 + 1.2 * math.cos(2 * math.pi * i / 40), 'y': 2 + 1.2 * math.sin(2 * math.pi * i / 40)}
+                for i in range(40)]
+        frame = [{'x': 0, 'y': 0}, {'x': 4, 'y': 0}, {'x': 4, 'y': 4}, {'x': 0, 'y': 4}]
+        # 10 rounded teeth, 8 samples each: a coarse outline mitered across them can fold over
+        gear = [{'x': (15 + 1.5 + 1.5 * math.sin(2 * math.pi * i / 8)) * math.cos(2 * math.pi * i / 80),
+                 'y': (15 + 1.5 + 1.5 * math.sin(2 * math.pi * i / 8)) * math.sin(2 * math.pi * i / 80)}
+                for i in range(80)]
+        
+        for tolerance in (None, 0.5, 1.0):
+            with self.subTest(coarse_tolerance=tolerance):
+                nester = Nester(dict(self.config, spacing=0, coarse_generations=1, coarse_tolerance=tolerance))
+                nester.add_container(self.container_points)
+                nester.add_parts([disc, [{'x': x, 'y': y} for x, y in notched],
+                                  {'points': frame, 'holes': [hole]}, gear])
+                nester._prepare()
+                limit = tolerance or 10 * nester.config['curve_tolerance']
+                
+                for part, coarse in zip(nester.sorted_parts, nester.coarse_parts):
+                    exact = ShapelyPolygon(part['points'].coords)
+                    outline = ShapelyPolygon(coarse['points'].coords)
+                    self.assertTrue(outline.is_valid)
+                    self.assertEqual(coarse['points'].area > 0, part['points'].area > 0)
+                    self.assertTrue(outline.buffer(1e-6).contains(exact))
+                    self.assertLessEqual(exact.hausdorff_distance(outline), limit)
+                    for exact_hole, coarse_hole in zip(part['holes'], coarse['holes']):
+                        self.assertEqual(coarse_hole.area > 0, exact_hole.area > 0)
+                        exact_hole, coarse_hole = ShapelyPolygon(exact_hole.coords), ShapelyPolygon(coarse_hole.coords)
+                        self.assertTrue(coarse_hole.is_valid)
+                        self.assertTrue(exact_hole.buffer(1e-6).contains(coarse_hole))
+                        self.assertLessEqual(exact_hole.hausdorff_distance(coarse_hole), limit)
+    
     def test_clear_parts(self):
         """Test clearing parts"""
         nester = Nester(self.config)
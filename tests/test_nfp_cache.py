@@ -0,0 +1,208 @@
+import unittest
+import numpy as np
+from nester import Nester
+from nester.nfp_cache import NFPCache
+from nester.nfp_calculator import NFPCalculator
+from nester.polygon import Polygon
+from nester.rotation_atlas import RotationAtlas
+from shapely.geometry import Polygon as ShapelyPolygon
+
+
+class TestNFPCache(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.container = Polygon([(0, 0), (20, 0), (20, 15), (0, 15)])
+        self.bracket = Polygon([(0, 0), (6, 0), (6, 2), (2, 2), (2, 5), (0, 5)])
+        self.square = Polygon([(0, 0), (3, 0), (3, 3), (0, 3)])
+    
+    def assertSameNFP(self, first, second):
+        self.assertEqual(len(first), len(second))
+        for polygon_a, polygon_b in zip(first, second):
+            np.testing.assert_allclose(polygon_a.coords, polygon_b.coords, atol=1e-5)
+    
+    def test_identical_shapes_share_entries(self):
+        """Test that copies of the same shape hit the same cache entry"""
+        cache = NFPCache()
+        
+        cache.get(self.bracket, self.square, False)
+        cache.get(Polygon(self.bracket.coords.copy()), self.square, False)
+        
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+        
+        # A different shape is a separate entry
+        cache.get(self.square, self.bracket, False)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.misses, 2)
+    
+    def test_key_ignores_use_holes(self):
+        """Test that part-in-part placement reuses the NFPs computed without it"""
+        key = NFPCache({'use_holes': False}).key(self.bracket, self.square, False)
+        self.assertEqual(NFPCache({'use_holes': True}).key(self.bracket, self.square, False), key)
+        self.assertNotEqual(NFPCache({'explore_concave': True}).key(self.bracket, self.square, False), key)
+    
+    def test_translated_copies_hit(self):
+        """Test that translated copies reuse the entry and get translated NFPs"""
+        cache = NFPCache()
+        cache.get(self.bracket, self.square, False)
+        
+        moved_a = self.bracket.translate(7, -3)
+        moved_b = self.square.translate(-2, 4)
+        nfp = cache.get(moved_a, moved_b, False)
+        
+        self.assertEqual(cache.hits, 1)
+        self.assertSameNFP(nfp, NFPCalculator.calculate_nfp(moved_a, moved_b))
+    
+    def test_offsets_share_entries(self):
+        """Test that placed copies get the shared NFP plus their own offset"""
+        cache = NFPCache()
+        nfp, offset = cache.get_with_offset(self.bracket, self.square, False)
+        self.assertEqual(offset, (0, 0))
+        
+        for dx, dy in [(7, -3), (12.5, 4)]:
+            moved_nfp, (ox, oy) = cache.get_with_offset(self.bracket.translate(dx, dy), self.square, False)
+            
+            # No copy is made, only the offset changes
+            self.assertIs(moved_nfp, nfp)
+            self.assertAlmostEqual(ox, dx)
+            self.assertAlmostEqual(oy, dy)
+            self.assertSameNFP([polygon.translate(ox, oy) for polygon in moved_nfp],
+                               cache.get(self.bracket.translate(dx, dy), self.square, False))
+        
+        self.assertEqual(len(cache), 1)
+    
+    def test_relative_rotation_matches_direct_nfp(self):
+        """Test that NFPs derived from the relative rotation equal directly computed ones"""
+        cache = NFPCache()
+        
+        for rotation_a in (0, 90, 180, 270, 45):
+            for rotation_b in (0, 90, 270):
+                relative = RotationAtlas.relative_angle(rotation_b, rotation_a)
+                nfp, offset, rotation = cache.get_relative(self.bracket, rotation_a, self.bracket.rotate(relative))
+                derived = [Polygon(polygon.coords @ Polygon.rotation_matrix(rotation) + offset) for polygon in nfp]
+                direct = NFPCalculator.calculate_nfp(self.bracket.rotate(rotation_a), self.bracket.rotate(rotation_b))
+                
+                self.assertEqual(len(derived), len(direct))
+                difference = ShapelyPolygon(derived[0].coords).symmetric_difference(ShapelyPolygon(direct[0].coords))
+                self.assertLess(difference.area, 1e-4, (rotation_a, rotation_b))
+        
+        # One entry per relative rotation (four right angles, three from the 45 degree base),
+        # not per pair of absolute rotations
+        self.assertEqual(len(cache), 7)
+    
+    def test_nester_stores_relative_rotations(self):
+        """Test that precomputation needs one outer NFP per relative rotation"""
+        nester = Nester({'rotations': 4})
+        nester.add_container(Polygon([(0, 0), (40, 0), (40, 40), (0, 40)]).to_points())
+        nester.add_parts([self.bracket.to_points()])
+        
+        # Four inner NFPs and four relative rotations instead of 4 x 4 absolute pairs
+        self.assertEqual(nester.precompute_nfps(), 4 + 4)
+    
+    def test_inner_nfp_follows_part_position(self):
+        """Test that inner NFPs are translations of the moving part from where it is"""
+        cache = NFPCache()
+        
+        # Rotating about the origin moves the part into negative x
+        rotated = self.bracket.rotate(90)
+        nfp = cache.get(self.container, rotated, True)
+        
+        for x, y in nfp[0].coords.tolist():
+            placed = rotated.translate(x, y)
+            min_x, min_y, max_x, max_y = placed.bbox
+            self.assertGreaterEqual(min_x, -1e-9)
+            self.assertGreaterEqual(min_y, -1e-9)
+            self.assertLessEqual(max_x, 20 + 1e-9)
+            self.assertLessEqual(max_y, 15 + 1e-9)
+    
+    def test_statistics(self):
+        """Test hit/miss statistics and clearing"""
+        cache = NFPCache()
+        for _ in range(4):
+            cache.get(self.container, self.square, True)
+        
+        stats = cache.get_statistics()
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['misses'], 1)
+        self.assertAlmostEqual(stats['hit_rate'], 0.75)
+        
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.get_statistics()['hit_rate'], 0.0)
+    
+    def test_memory_budget(self):
+        """Test least recently used eviction under a byte budget"""
+        # Room for two 4-vertex NFPs
+        cache = NFPCache({'nfp_cache_memory_mb': 0.0006})
+        shapes = [self.square.rotate(angle) for angle in (0, 30, 60, 10, 20)]
+        
+        cache.get(self.container, shapes[0], True)
+        for shape in shapes[1:]:
+            cache.get(self.container, shape, True)
+            cache.get(self.container, shapes[0], True)
+        
+        stats = cache.get_statistics()
+        self.assertLessEqual(stats['bytes'], stats['max_bytes'])
+        self.assertGreater(stats['evictions'], 0)
+        self.assertEqual(stats['entries'] + stats['evictions'], 5)
+        self.assertGreaterEqual(stats['seconds_saved'], 0)
+        
+        # The entry used after every insert is the most recent one and survives
+        self.assertIn(cache.key(self.container, shapes[0], True), cache)
+        hits = cache.hits
+        cache.get(self.container, shapes[0], True)
+        self.assertEqual(cache.hits, hits + 1)
+    
+    def test_precompute(self):
+        """Test filling the cache up front, serially and on a process pool"""
+        pairs = [(self.container, part.rotate(angle), True)
+                 for part in (self.bracket, self.square) for angle in (0, 90, 180, 270)]
+        pairs.append((self.container, self.square.translate(5, 5), True))
+        
+        # Four bracket rotations, while the square looks the same at every right angle
+        serial = NFPCache()
+        progress = []
+        self.assertEqual(serial.precompute(pairs, progress_callback=progress.append), 5)
+        self.assertEqual(len(serial), 5)
+        self.assertEqual({key: progress[-1][key] for key in ('stage', 'done', 'total')},
+                         {'stage': 'nfp_precompute', 'done': 5, 'total': 5})
+        self.assertEqual(progress[-1]['nfp_cache']['entries'], 5)
+        
+        # Cached pairs are skipped
+        self.assertEqual(serial.precompute(pairs), 0)
+        
+        parallel = NFPCache()
+        self.assertEqual(parallel.precompute(pairs, workers=2, chunk_size=2), 5)
+        for polygon_a, polygon_b, inside in pairs:
+            self.assertSameNFP(parallel.get(polygon_a, polygon_b, inside),
+                               serial.get(polygon_a, polygon_b, inside))
+        self.assertEqual(parallel.misses, 0)
+    
+    def test_nester_precomputes_before_evolution(self):
+        """Test that a run with precomputation never computes NFPs lazily"""
+        nester = Nester({'rotations': 4, 'population_size': 3, 'max_generations': 2})
+        nester.add_container(self.container.to_points())
+        nester.add_parts([self.square.to_points(), self.bracket.to_points()])
+        
+        self.assertGreater(nester.precompute_nfps(), 0)
+        nester.run()
+        
+        self.assertEqual(nester.nfp_cache.misses, 0)
+        self.assertGreater(nester.nfp_cache.hits, 0)
+    
+    def test_nester_duplicates_share_nfps(self):
+        """Test that a job with many copies of one part computes one inner NFP per rotation"""
+        nester = Nester({'rotations': 2, 'population_size': 3, 'max_generations': 2})
+        nester.add_container(self.container.to_points())
+        nester.add_parts([self.square.to_points()] * 6)
+        nester.run()
+        
+        self.assertLessEqual(nester.nfp_cache.misses + nester.nfp_cache.precomputed, 2)
+        self.assertGreater(nester.nfp_cache.hits, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,9 @@
 import unittest
+import numpy as np
+from shapely.geometry import Polygon as ShapelyPolygon
 from nester.nfp_calculator import NFPCalculator
 from nester.geometry_utils import GeometryUtils
+from nester.polygon import Polygon
 
 
 class TestNFPCalculator(unittest.TestCase):
@@ -89,6 +92,148 @@ class TestNFPCalculator(unittest.TestCase):
         nfp = NFPCalculator.calculate_nfp(self.rect_a, self.rect_b, inside=False)
         self.assertIsInstance(nfp, list)
     
+    def assertSameRegion(self, first, second):
+        difference = ShapelyPolygon(first.coords).symmetric_difference(ShapelyPolygon(second.coords))
+        self.assertLess(difference.area, 1e-4)
+    
+    def test_rectangle_kernel(self):
+        """Test the closed-form rectangle NFP against the Minkowski path"""
+        rect_a = Polygon.from_points(self.rect_a).translate(3, -2)
+        rect_b = Polygon.from_points(self.rect_b).translate(-1, 5)
+        
+        nfp = NFPCalculator.calculate_nfp(rect_a, rect_b)
+        self.assertEqual(len(nfp), 1)
+        self.assertEqual(len(nfp[0]), 4)
+        self.assertEqual(nfp[0].bbox, (3 - 3, -2 - 8, 13 + 1, 4 - 5))
+        self.assertSameRegion(nfp[0], NFPCalculator._minkowski_difference(rect_a, rect_b)[0])
+    
+    def test_convex_kernel(self):
+        """Test the edge-merge convex NFP against the Minkowski path"""
+        rng = np.random.default_rng(5)
+        for _ in range(20):
+            shapes = []
+            for size in rng.integers(3, 12, 2):
+                # Convex hull of random points on a circle, in either orientation
+                angles = np.sort(rng.uniform(0, 2 * np.pi, size))
+                ring = np.column_stack([np.cos(angles), np.sin(angles)]) * rng.uniform(1, 5) + rng.uniform(-5, 5, 2)
+                shapes.append(Polygon(ring if rng.random() < 0.5 else ring[::-1]))
+            
+            polygon_a, polygon_b = shapes
+            self.assertNotEqual(polygon_a.shape_class, 'general')
+            
+            nfp = NFPCalculator.calculate_nfp(polygon_a, polygon_b)
+            self.assertEqual(len(nfp), 1)
+            self.assertLessEqual(len(nfp[0]), len(polygon_a) + len(polygon_b))
+            self.assertSameRegion(nfp[0], NFPCalculator._minkowski_difference(polygon_a, polygon_b)[0])
+        
+        # Triangle against rectangle mixes the two classes
+        nfp = NFPCalculator.calculate_nfp(self.triangle, self.rect_b)
+        expected = NFPCalculator._minkowski_difference(Polygon.from_points(self.triangle),
+                                                       Polygon.from_points(self.rect_b))
+        self.assertSameRegion(nfp[0], expected[0])
+    
+    def test_inner_fit_polygon(self):
+        """Test that every point of an irregular container's inner NFP keeps the part inside"""
+        square = Polygon([(0, 0), (2, 0), (2, 2), (0, 2)])
+        u_shape = Polygon([(0, 0), (10, 0), (10, 10), (7, 10), (7, 3), (3, 3), (3, 10), (0, 10)])
+        
+        nfp = NFPCalculator.calculate_nfp(u_shape, square, inside=True)
+        self.assertEqual(len(nfp), 1)
+        self.assertAlmostEqual(nfp[0].area, 8 + 7 + 7, places=3)
+        
+        container = ShapelyPolygon(u_shape.coords).buffer(1e-6)
+        for x, y in nfp[0].coords:
+            self.assertTrue(container.contains(ShapelyPolygon(square.coords + (x, y))))
+        
+        # Along sloped edges too, up to clipper rounding
+        slanted = Polygon([(0, 0), (20, 0), (20, 10), (6, 10), (0, 4)])
+        container = ShapelyPolygon(slanted.coords).buffer(1e-6)
+        for angle in (0, 30, 45):
+            part = square.rotate(angle)
+            for polygon in NFPCalculator.calculate_nfp(slanted, part, inside=True):
+                for x, y in polygon.coords:
+                    self.assertTrue(container.contains(ShapelyPolygon(part.coords + (x, y))), (angle, x, y))
+        
+        # A strip exactly as high as the part still reaches the far end of an L-shaped sheet
+        l_sheet = Polygon([(0, 0), (20, 0), (20, 2), (6, 2), (6, 10), (0, 10)])
+        nfp = NFPCalculator.calculate_nfp(l_sheet, square, inside=True)
+        self.assertAlmostEqual(max(polygon.bbox[2] for polygon in nfp), 18, places=4)
+        
+        # A slot exactly as wide as the part still leaves a sliver to place it in
+        slot = Polygon([(0, 0), (2, 0), (2, 6), (0, 6)]).rotate(30)
+        self.assertTrue(NFPCalculator.calculate_nfp(slot, square.rotate(30), inside=True))
+        
+        # A part too large for the container fits nowhere
+        bar = Polygon([(0, 0), (11, 0), (11, 1), (0, 1)])
+        self.assertEqual(NFPCalculator.calculate_nfp(u_shape, bar, inside=True), [])
+    
+    def test_orbital_concave(self):
+        """Test the orbital NFP of concave parts against the Minkowski path"""
+        l_shape = Polygon([(0, 0), (10, 0), (10, 2), (2, 2), (2, 10), (0, 10)])
+        rng = np.random.default_rng(7)
+        for _ in range(5):
+            # Random stars, with every other vertex pulled in
+            shapes = []
+            for points, outer, inner in ((6, 10, 4), (4, 5, 2)):
+                angles = np.arange(2 * points) * np.pi / points
+                radii = np.where(np.arange(2 * points) % 2, inner, outer) * rng.uniform(0.8, 1.2, 2 * points)
+                shapes.append(Polygon(np.column_stack([np.cos(angles), np.sin(angles)]) * radii[:, None]))
+            
+            for polygon_a, polygon_b in (shapes, (l_shape, shapes[1]), (shapes[0], l_shape)):
+                nfp = NFPCalculator.calculate_nfp(polygon_a, polygon_b, explore_concave=True)
+                self.assertEqual(len(nfp), 1)
+                self.assertGreater(nfp[0].area, 0)
+                self.assertSameRegion(nfp[0], NFPCalculator._minkowski_difference(polygon_a, polygon_b)[0])
+    
+    def test_orbital_interlocking(self):
+        """Test that the orbital NFP finds a pocket closed off to the outside"""
+        # A square frame with a mouth too narrow for the square to pass
+        frame = Polygon([(0, 0), (10, 0), (10, 10), (5.5, 10), (5.5, 8), (8, 8), (8, 2),
+                         (2, 2), (2, 8), (4.5, 8), (4.5, 10), (0, 10)])
+        square = Polygon([(0, 0), (2, 0), (2, 2), (0, 2)])
+        
+        nfp = NFPCalculator.calculate_nfp(frame, square, explore_concave=True)
+        self.assertEqual(len(nfp), 2)
+        self.assertAlmostEqual(nfp[0].area, 144)
+        # The pocket is a hole: the square fits anywhere in the 6x6 cavity
+        self.assertAlmostEqual(nfp[1].area, -16)
+        self.assertEqual(nfp[1].bbox, (2, 2, 6, 6))
+        
+        # The overlap checks follow the clipper scale they are given
+        coarse = NFPCalculator.calculate_nfp(frame, square, explore_concave=True, scale=1000)
+        self.assertEqual([polygon.area for polygon in coarse], [polygon.area for polygon in nfp])
+        
+        # The Minkowski path only keeps the outer boundary
+        self.assertEqual(len(NFPCalculator.calculate_nfp(frame, square)), 1)
+        
+        # Only pairs whose Minkowski sum has a pocket are orbited
+        self.assertTrue(NFPCalculator._has_pockets(frame, square))
+        self.assertFalse(NFPCalculator._has_pockets(square, square))
+        # A part filling the cavity exactly, or too large for it, leaves no pocket to find
+        self.assertFalse(NFPCalculator._has_pockets(frame, Polygon([(0, 0), (6, 0), (6, 6), (0, 6)])))
+        self.assertFalse(NFPCalculator._has_pockets(frame, Polygon([(0, 0), (6, 0), (6, 6.5), (0, 6.5)])))
+    
+    def test_orbital_inside(self):
+        """Test the orbital inner NFP of concave containers"""
+        square = Polygon([(0, 0), (2, 0), (2, 2), (0, 2)])
+        u_shape = Polygon([(0, 0), (10, 0), (10, 10), (7, 10), (7, 3), (3, 3), (3, 10), (0, 10)])
+        
+        nfp = NFPCalculator.calculate_nfp(u_shape, square, inside=True, explore_concave=True)
+        self.assertEqual(len(nfp), 1)
+        # A 1 unit wide band along the bottom and up both arms
+        self.assertAlmostEqual(nfp[0].area, 8 + 7 + 7)
+        
+        # Two rooms joined by a corridor too narrow for the square are separate regions
+        rooms = Polygon([(0, 0), (4, 0), (4, 1), (6, 1), (6, 0), (10, 0), (10, 4), (6, 4),
+                         (6, 2), (4, 2), (4, 4), (0, 4)])
+        nfp = NFPCalculator.calculate_nfp(rooms, square, inside=True, explore_concave=True)
+        self.assertEqual(sorted(polygon.bbox for polygon in nfp), [(0, 0, 2, 2), (6, 0, 8, 2)])
+        self.assertTrue(all(polygon.area > 0 for polygon in nfp))
+        
+        # A part too large for the container fits nowhere
+        bar = Polygon([(0, 0), (11, 0), (11, 1), (0, 1)])
+        self.assertEqual(NFPCalculator.calculate_nfp(u_shape, bar, inside=True, explore_concave=True), [])
+
     def test_clipper_coordinate_conversion(self):
         """Test coordinate conversion for clipper"""
         # Test conversion to clipper coordinates
@@ -0,0 +1,186 @@
+import unittest
+import os
+import shutil
+import sqlite3
+import tempfile
+from nester import Nester
+from nester.nfp_calculator import NFPCalculator
+from nester.nfp_store import PersistentNFPStore
+from nester.polygon import Polygon
+
+
+class TestPersistentNFPStore(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'nfp.sqlite')
+        
+        self.square = Polygon([(0, 0), (4, 0), (4, 4), (0, 4)])
+        self.triangle = Polygon([(0, 0), (3, 0), (1.5, 2)])
+        self.config = {'spacing': 0, 'curve_tolerance': 0.3}
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def _key(self, polygon_a, polygon_b, inside, config=None):
+        """Store key for two polygons"""
+        geometry_key = NFPCalculator.geometry_key(polygon_a, polygon_b, inside)
+        return PersistentNFPStore.make_key(geometry_key, config or self.config)
+    
+    def test_round_trip(self):
+        """Test storing and reading back an NFP"""
+        store = PersistentNFPStore(self.path)
+        key = self._key(self.square, self.triangle, False)
+        
+        self.assertIsNone(store.get(key))
+        store.put(key, [self.square, self.triangle])
+        
+        nfp = store.get(key)
+        self.assertEqual(len(nfp), 2)
+        self.assertEqual(nfp[0].to_points(), self.square.to_points())
+        self.assertEqual(nfp[1].to_points(), self.triangle.to_points())
+        
+        # Empty NFPs (part does not fit) are cached too
+        empty_key = self._key(self.triangle, self.square, True)
+        store.put(empty_key, [])
+        self.assertEqual(store.get(empty_key), [])
+        store.close()
+    
+    def test_persists_across_instances(self):
+        """Test that a second store on the same file sees earlier entries"""
+        first = PersistentNFPStore(self.path)
+        key = self._key(self.square, self.triangle, True)
+        first.put(key, [self.square])
+        first.close()
+        
+        second = PersistentNFPStore(self.path)
+        self.assertEqual(len(second), 1)
+        self.assertEqual(second.get(key)[0].to_points(), self.square.to_points())
+        second.close()
+    
+    def test_key_depends_on_geometry_and_settings(self):
+        """Test cache key sensitivity"""
+        key = self._key(self.square, self.triangle, False)
+        
+        # Dict points, Polygons and translated copies of the same shape share a key
+        self.assertEqual(key, self._key(self.square.to_points(), self.triangle.to_points(), False))
+        self.assertEqual(key, self._key(self.square, self.triangle.translate(1, 0), False))
+        
+        self.assertNotEqual(key, self._key(self.square, self.triangle.rotate(90), False))
+        self.assertNotEqual(key, self._key(self.square, self.triangle, True))
+        self.assertNotEqual(key, self._key(self.square, self.triangle, False,
+                                           {'spacing': 1, 'curve_tolerance': 0.3}))
+        self.assertNotEqual(key, self._key(self.square, self.triangle, False,
+                                           {'spacing': 0, 'curve_tolerance': 0.1}))
+    
+    def test_eviction(self):
+        """Test that the store stays under its size cap"""
+        entry_size = len(PersistentNFPStore._encode([self.square]))
+        store = PersistentNFPStore(self.path, max_bytes=entry_size * 3)
+        
+        keys = []
+        for i in range(6):
+            key = self._key(self.square, self.triangle.rotate(i * 10), False)
+            store.put(key, [self.square])
+            keys.append(key)
+        
+        self.assertEqual(len(store), 3)
+        
+        # Oldest entries are evicted first
+        self.assertIsNone(store.get(keys[0]))
+        self.assertIsNotNone(store.get(keys[-1]))
+        store.close()
+    
+    def test_reads_update_last_use_in_batches(self):
+        """Test that reads are recorded in memory and still count for eviction"""
+        entry_size = len(PersistentNFPStore._encode([self.square]))
+        store = PersistentNFPStore(self.path, max_bytes=entry_size * 3)
+        
+        keys = [self._key(self.square, self.triangle.rotate(i * 10), False) for i in range(4)]
+        for key in keys[:3]:
+            store.put(key, [self.square])
+        
+        # Reading the oldest entry does not write, but makes it the most recently used
+        last_used = store._connect().execute('SELECT last_used FROM nfp WHERE key = ?', (keys[0],)).fetchone()
+        self.assertIsNotNone(store.get(keys[0]))
+        self.assertEqual(store._connect().execute('SELECT last_used FROM nfp WHERE key = ?',
+                                                  (keys[0],)).fetchone(), last_used)
+        
+        store.put(keys[3], [self.square])
+        self.assertIsNotNone(store.get(keys[0]))
+        self.assertIsNone(store.get(keys[1]))
+        
+        # Replacing an entry does not count its size twice
+        store.put(keys[3], [self.square])
+        self.assertEqual(store._total, entry_size * 3)
+        store.close()
+    
+    def test_nester_uses_store(self):
+        """Test that a nester run fills the store and a second run reuses it"""
+        config = {
+            'rotations': 1,
+            'population_size': 3,
+            'max_generations': 2,
+            'nfp_cache_path': self.path
+        }
+        container = [{'x': 0, 'y': 0}, {'x': 20, 'y': 0}, {'x': 20, 'y': 15}, {'x': 0, 'y': 15}]
+        part = [{'x': 0, 'y': 0}, {'x': 5, 'y': 0}, {'x': 5, 'y': 3}, {'x': 0, 'y': 3}]
+        
+        nester = Nester(config)
+        nester.add_container(container)
+        nester.add_parts([part, part])
+        first = nester.run()
+        stored = len(nester.nfp_store)
+        nester.nfp_store.close()
+        self.assertGreater(stored, 0)
+        
+        nester = Nester(config)
+        nester.add_container(container)
+        nester.add_parts([part, part])
+        second = nester.run()
+        self.assertEqual(len(nester.nfp_store), stored)
+        self.assertEqual(second['placed_count'], first['placed_count'])
+        nester.nfp_store.close()
+    
+    def test_hits_only_run_records_last_use(self):
+        """Test that a run served entirely from the store saves last-use times without close"""
+        config = {
+            'rotations': 1,
+            'population_size': 3,
+            'max_generations': 2,
+            'nfp_cache_path': self.path
+        }
+        container = [{'x': 0, 'y': 0}, {'x': 20, 'y': 0}, {'x': 20, 'y': 15}, {'x': 0, 'y': 15}]
+        part = [{'x': 0, 'y': 0}, {'x': 5, 'y': 0}, {'x': 5, 'y': 3}, {'x': 0, 'y': 3}]
+        
+        nester = Nester(config)
+        nester.add_container(container)
+        nester.add_parts([part, part])
+        nester.run()
+        nester.close()
+        
+        # Second runs read every NFP from the store, in this process or in pool workers
+        for extra in ({}, {'precompute_nfp': False, 'workers': 2, 'executor': 'process'}):
+            with self.subTest(**extra):
+                connection = sqlite3.connect(self.path, isolation_level=None)
+                connection.execute('UPDATE nfp SET last_used = 0')
+                
+                nester = Nester(dict(config, **extra))
+                nester.add_container(container)
+                nester.add_parts([part, part])
+                nester.run()
+                self.assertEqual(nester.nfp_cache.precomputed, 0)
+                
+                stale = connection.execute('SELECT COUNT(*) FROM nfp WHERE last_used = 0').fetchone()[0]
+                connection.close()
+                if extra:
+                    # Workers only read the NFPs their placements need
+                    self.assertLess(stale, len(nester.nfp_store))
+                else:
+                    self.assertEqual(stale, 0)
+                nester.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import pickle
+import numpy as np
+from nester.geometry_utils import GeometryUtils
+from nester.packed_nfp import PackedNFP
+from nester.polygon import Polygon
+
+
+class TestPackedNFP(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.square = Polygon([(0, 0), (4, 0), (4, 4), (0, 4)])
+        self.pocket = Polygon([(1, 1), (1, 2.5), (2.25, 2.5), (2.25, 1)])
+
+    def test_round_trip(self):
+        """Test packing rings into one buffer and reading them back as Polygons"""
+        nfp = PackedNFP.from_polygons([self.square, self.pocket])
+        self.assertEqual(len(nfp), 2)
+        self.assertEqual(nfp.vertices.dtype, np.int64)
+        self.assertEqual(nfp.vertices.shape, (8, 2))
+        self.assertEqual(nfp.ring_starts.tolist(), [0, 4, 8])
+        self.assertEqual([polygon.to_points() for polygon in nfp],
+                         [self.square.to_points(), self.pocket.to_points()])
+        self.assertEqual(nfp[-1].to_points(), self.pocket.to_points())
+        with self.assertRaises(IndexError):
+            nfp.ring(2)
+
+        self.assertIs(PackedNFP.from_polygons(nfp), nfp)
+        self.assertEqual(len(PackedNFP.from_polygons([])), 0)
+
+        copy = pickle.loads(pickle.dumps(nfp))
+        np.testing.assert_array_equal(copy.vertices, nfp.vertices)
+        np.testing.assert_array_equal(copy.ring_starts, nfp.ring_starts)
+
+    def test_rings_clip_like_polygons(self):
+        """Test that clipper rings give the same difference as float polygons"""
+        nfp = PackedNFP.from_polygons([self.square, self.pocket])
+        subject = [Polygon([(-5, -5), (10, -5), (10, 10), (-5, 10)])]
+        for rotation in (0, 90, 30):
+            arguments = ([(1.5, -0.5)] * 2, [rotation] * 2, [False, True])
+            from_rings = GeometryUtils.polygon_difference(subject, nfp.rings(), *arguments)
+            from_polygons = GeometryUtils.polygon_difference(subject, list(nfp), *arguments)
+            self.assertAlmostEqual(sum(polygon.area for polygon in from_rings),
+                                   sum(polygon.area for polygon in from_polygons), places=4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+import unittest
+from unittest.mock import patch
+import numpy as np
+from shapely.geometry import Polygon as ShapelyPolygon
+from nester.placement_worker import PlacementWorker
+from nester.nfp_cache import NFPCache
+from nester.packed_nfp import PackedNFP
+from nester.geometry_utils import GeometryUtils
+from nester.polygon import Polygon
+
+
+class TestPlacementWorker(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.container = {'points': Polygon([(0, 0), (20, 0), (20, 10), (0, 10)])}
+        self.parts = [
+            {'id': 0, 'points': Polygon([(0, 0), (6, 0), (6, 2), (2, 2), (2, 5), (0, 5)]), 'area': 18},
+            {'id': 1, 'points': Polygon([(0, 0), (4, 0), (4, 4), (0, 4)]), 'area': 16},
+            {'id': 2, 'points': Polygon([(0, 0), (5, 0), (5, 3), (0, 3)]), 'area': 15}
+        ]
+        self.config = {'rotations': 4}
+    
+    def place(self, placement, rotation):
+        worker = PlacementWorker(self.container, self.parts, NFPCache(self.config), self.config)
+        return worker, worker.place_parts({'placement': placement, 'rotation': rotation})
+    
+    def assertNoOverlaps(self, worker):
+        shapes = [ShapelyPolygon(placed['points'].coords) for placed in worker.placed_parts]
+        container = ShapelyPolygon(self.container['points'].coords)
+        for i, shape in enumerate(shapes):
+            self.assertLess(shape.difference(container).area, 1e-6)
+            for other in shapes[i + 1:]:
+                self.assertLess(shape.intersection(other).area, 1e-6)
+    
+    def test_parts_touch_without_overlap(self):
+        """Test that feasible region vertices give touching, non-overlapping placements"""
+        worker, result = self.place([1, 1, 1, 1, 2, 2, 0], [0] * 7)
+        
+        self.assertEqual(result['placed_count'], 7)
+        self.assertNoOverlaps(worker)
+        
+        # Bottom-left packing puts the second square against the first one
+        first, second = result['placements'][0][:2]
+        self.assertEqual((first['x'], first['y']), (0, 0))
+        self.assertAlmostEqual(second['x'] + second['y'], 4)
+    
+    def test_concave_part_interlocks(self):
+        """Test that a square is placed in the corner of an L-shaped part"""
+        worker, result = self.place([0, 1], [0, 0])
+        
+        self.assertEqual(result['placed_count'], 2)
+        self.assertNoOverlaps(worker)
+        
+        # The square sits on the L's foot, against its stem
+        square = result['placements'][0][1]
+        self.assertAlmostEqual(square['x'], 2)
+        self.assertAlmostEqual(square['y'], 2)
+    
+    def test_part_placed_in_pocket(self):
+        """Test that with explore_concave a part goes into a pocket of a placed part"""
+        frame = Polygon([(0, 0), (10, 0), (10, 10), (5.5, 10), (5.5, 8), (8, 8), (8, 2),
+                         (2, 2), (2, 8), (4.5, 8), (4.5, 10), (0, 10)])
+        self.container = {'points': Polygon([(0, 0), (20, 0), (20, 12), (0, 12)])}
+        self.parts = [{'id': 0, 'points': frame, 'area': frame.area},
+                      {'id': 1, 'points': Polygon([(0, 0), (2, 0), (2, 2), (0, 2)]), 'area': 4}]
+        
+        self.config = {'rotations': 4, 'explore_concave': True}
+        worker, result = self.place([0, 1], [0, 0])
+        self.assertNoOverlaps(worker)
+        square = result['placements'][0][1]
+        self.assertEqual((square['x'], square['y']), (2, 2))
+        
+        # The Minkowski NFP has no pockets, so the square goes next to the frame
+        self.config = {'rotations': 4}
+        worker, result = self.place([0, 1], [0, 0])
+        self.assertNoOverlaps(worker)
+        square = result['placements'][0][1]
+        self.assertAlmostEqual(square['x'] + square['y'], 10)
+    
+    def test_irregular_container(self):
+        """Test that the inner-fit polygon of an irregular container keeps parts inside"""
+        # An L-shaped remnant: a 20x4 strip with an 8x6 block on its left end
+        self.container = {'points': Polygon([(0, 0), (20, 0), (20, 4), (8, 4), (8, 10), (0, 10)])}
+        worker, result = self.place([1] * 9, [0] * 9)
+        
+        # Five 4x4 squares along the strip and two on the block
+        self.assertEqual(result['placed_count'], 7)
+        self.assertNoOverlaps(worker)
+        
+        # A slanted edge cuts off the top left corner
+        self.container = {'points': Polygon([(0, 0), (20, 0), (20, 10), (6, 10), (0, 4)])}
+        worker, result = self.place([1, 2, 1, 2, 0, 1], [0] * 6)
+        self.assertGreater(result['placed_count'], 3)
+        self.assertNoOverlaps(worker)
+    
+    def test_sloped_edges(self):
+        """Test that parts turned in 45 degree steps stay inside slanted containers"""
+        # A finer clipper scale keeps rounding along diagonal contacts below the overlap tolerance
+        self.config = {'rotations': 8, 'clipper_scale': 10 ** 7}
+        rng = np.random.default_rng(0)
+        for points in ([(0, 0), (20, 0), (20, 10), (6, 10), (0, 4)], [(0, 0), (20, 2), (17, 12), (3, 9)]):
+            self.container = {'points': Polygon(points)}
+            for _ in range(10):
+                worker, result = self.place(rng.integers(0, 3, 8).tolist(), (rng.integers(0, 8, 8) * 45).tolist())
+                self.assertGreater(result['placed_count'], 2)
+                self.assertNoOverlaps(worker)
+    
+    def test_part_placed_in_hole(self):
+        """Test that with use_holes a part goes into a hole of a placed part"""
+        ring = Polygon([(0, 0), (10, 0), (10, 10), (0, 10)])
+        hole = Polygon([(2, 2), (8, 2), (8, 8), (2, 8)])
+        self.container = {'points': Polygon([(0, 0), (20, 0), (20, 12), (0, 12)])}
+        self.parts = [{'id': 0, 'points': ring, 'holes': [hole], 'area': 64},
+                      {'id': 1, 'points': Polygon([(0, 0), (4, 0), (4, 4), (0, 4)]), 'area': 16}]
+        
+        self.config = {'rotations': 4, 'use_holes': True}
+        worker, result = self.place([0, 1, 1], [0, 0, 90])
+        square = result['placements'][0][1]
+        self.assertEqual((square['x'], square['y']), (2, 2))
+        
+        # The hole is full after one square, so the next one goes on the sheet
+        square = result['placements'][0][2]
+        self.assertGreaterEqual(square['x'], 10)
+        
+        self.config = {'rotations': 4}
+        worker, result = self.place([0, 1], [0, 0])
+        square = result['placements'][0][1]
+        self.assertAlmostEqual(square['x'] + square['y'], 10)
+    
+    def test_full_container(self):
+        """Test that parts that do not fit are left unplaced"""
+        worker, result = self.place([1] * 12, [0] * 12)
+        
+        # Only ten 4x4 squares can go in 20x10, two rows of five
+        self.assertEqual(result['placed_count'], 10)
+        self.assertNoOverlaps(worker)
+    
+    def test_best_position(self):
+        """Test picking the lowest scoring candidate across rings, clamped into the region"""
+        worker = PlacementWorker(self.container, self.parts, NFPCache(self.config), self.config)
+        part = {'points': self.parts[1]['points']}
+        inner_nfp = [Polygon([(3, 1), (16, 1), (16, 6), (3, 6)]),
+                     Polygon([(3, 1), (1, 3), (-2, 4)]),
+                     Polygon([])]
+        
+        # (-2, 4) is clamped to (0, 4); every candidate ties and the first one wins
+        position, fitness = worker._best_position(inner_nfp, (0, 0, 20, 10), part, [])
+        self.assertEqual(position, {'x': 3.0, 'y': 1.0})
+        self.assertEqual(fitness, 4)
+        self.assertEqual(fitness, worker._evaluate_position(position))
+        
+        position, fitness = worker._best_position([Polygon([])], (0, 0, 20, 10), part, [])
+        self.assertIsNone(position)
+        self.assertEqual(fitness, float('inf'))
+
+    
+    def test_placed_part_nfp_bboxes(self):
+        """Test that the boxes from the parts' boxes match the placed outer NFPs"""
+        worker, result = self.place([0, 1, 2], [0, 90, 270])
+        self.assertEqual(result['placed_count'], 3)
+        
+        for rotation in range(4):
+            for nfp, offset, placed_rotation, bbox in worker._placed_part_nfps(0, rotation * 90):
+                points = np.concatenate(nfp.rings()) / worker.scale
+                if placed_rotation:
+                    points = points @ Polygon.rotation_matrix(placed_rotation)
+                points = points + offset
+                np.testing.assert_allclose(bbox, [*points.min(axis=0), *points.max(axis=0)], atol=1e-5)
+    
+    def test_best_position_skips_distant_nfps(self):
+        """Test that outer NFPs outside the inner NFP's box are left out of the clip"""
+        worker = PlacementWorker(self.container, self.parts, NFPCache(self.config), self.config)
+        part = {'points': self.parts[1]['points']}
+        inner_nfp = [Polygon([(0, 0), (6, 0), (6, 6), (0, 6)])]
+        bar = PackedNFP.from_polygons([Polygon([(0, 0), (10, 0), (10, 2), (0, 2)])])
+        placed_nfps = [(bar, (-1, 1), 0, (-1, 1, 9, 3)),        # Cuts across the inner NFP
+                       (bar, (-1, 7), 0, (-1, 7, 9, 9)),        # Clear of it above
+                       (bar, (7, -4), 90, (5, -4, 7, 6)),       # Stands up to its right, rotated
+                       (bar, (20, 20), 45, (18.6, 20, 27.1, 28.5))]    # Far away
+        
+        with patch.object(GeometryUtils, 'polygon_difference', wraps=GeometryUtils.polygon_difference) as difference:
+            position, fitness = worker._best_position(inner_nfp, (0, 0, 20, 10), part, placed_nfps)
+        clips = difference.call_args[0]
+        self.assertEqual(clips[2], [(-1, 1), (7, -4)])
+        self.assertEqual(clips[3], [0, 90])
+        
+        # Below the bar is the lowest free band
+        self.assertEqual(position, {'x': 0.0, 'y': 0.0})
+        
+        # With every outer NFP out of reach nothing is clipped
+        with patch.object(GeometryUtils, 'polygon_difference') as difference:
+            self.assertEqual(worker._best_position(inner_nfp, (0, 0, 20, 10), part, placed_nfps[1:2])[0],
+                             {'x': 0.0, 'y': 0.0})
+        difference.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
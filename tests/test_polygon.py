@@ -0,0 +1,126 @@
+import unittest
+import numpy as np
+from nester.polygon import Polygon
+from nester.geometry_utils import GeometryUtils
+
+
+class TestPolygon(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.rectangle_points = [
+            {'x': 0, 'y': 0},
+            {'x': 10, 'y': 0},
+            {'x': 10, 'y': 5},
+            {'x': 0, 'y': 5}
+        ]
+        self.rectangle = Polygon.from_points(self.rectangle_points)
+
+    def test_from_points_round_trip(self):
+        """Test conversion between dict points and the array representation"""
+        self.assertEqual(self.rectangle.coords.shape, (4, 2))
+        self.assertEqual(self.rectangle.coords.dtype, np.float64)
+        self.assertEqual(self.rectangle.to_points(), self.rectangle_points)
+
+        # Existing polygons are passed through unchanged
+        self.assertIs(Polygon.from_points(self.rectangle), self.rectangle)
+
+        # Empty input gives an empty polygon
+        self.assertEqual(len(Polygon.from_points([])), 0)
+
+    def test_sequence_protocol(self):
+        """Test that a polygon reads like a list of dict points"""
+        self.assertEqual(len(self.rectangle), 4)
+        self.assertEqual(self.rectangle[2], {'x': 10.0, 'y': 5.0})
+        self.assertEqual(self.rectangle[-1], {'x': 0.0, 'y': 5.0})
+        self.assertEqual(list(self.rectangle), self.rectangle_points)
+
+    def test_area_and_orientation(self):
+        """Test cached signed area and orientation"""
+        self.assertAlmostEqual(self.rectangle.area, 50.0)
+        self.assertEqual(self.rectangle.orientation, 1)
+
+        reversed_rect = self.rectangle.reversed()
+        self.assertAlmostEqual(reversed_rect.area, -50.0)
+        self.assertEqual(reversed_rect.orientation, -1)
+
+    def test_bounds(self):
+        """Test bounding box caching and format"""
+        self.assertEqual(self.rectangle.bbox, (0, 0, 10, 5))
+        self.assertEqual(self.rectangle.bounds, GeometryUtils.get_polygon_bounds(self.rectangle_points))
+        self.assertIsNone(Polygon([]).bounds)
+
+    def test_translate(self):
+        """Test translation keeps cached values consistent"""
+        self.rectangle.area
+        self.rectangle.bbox
+        translated = self.rectangle.translate(3, -2)
+
+        self.assertEqual(translated.bbox, (3, -2, 13, 3))
+        self.assertAlmostEqual(translated.area, 50.0)
+        np.testing.assert_allclose(translated.coords, self.rectangle.coords + (3, -2))
+
+        # The source polygon is not modified
+        self.assertEqual(self.rectangle.bbox, (0, 0, 10, 5))
+
+    def test_rotate(self):
+        """Test rotation about the origin"""
+        rotated = self.rectangle.rotate(90)
+
+        self.assertAlmostEqual(rotated.area, 50.0)
+        min_x, min_y, max_x, max_y = rotated.bbox
+        self.assertAlmostEqual(min_x, -5)
+        self.assertAlmostEqual(max_x, 0)
+        self.assertAlmostEqual(min_y, 0)
+        self.assertAlmostEqual(max_y, 10)
+
+        expected = GeometryUtils.rotate_polygon(self.rectangle_points, 90)['points']
+        for point, expected_point in zip(rotated, expected):
+            self.assertAlmostEqual(point['x'], expected_point['x'])
+            self.assertAlmostEqual(point['y'], expected_point['y'])
+
+    def test_fingerprint(self):
+        """Test that fingerprints identify shapes independent of position and start vertex"""
+        fingerprint = self.rectangle.fingerprint
+
+        self.assertEqual(self.rectangle.translate(12.5, -3.25).fingerprint, fingerprint)
+        self.assertEqual(Polygon(self.rectangle.coords + (0.1, 0.2)).fingerprint, fingerprint)
+        self.assertEqual(Polygon(np.roll(self.rectangle.coords, 2, axis=0)).fingerprint, fingerprint)
+
+        self.assertNotEqual(self.rectangle.rotate(90).fingerprint, fingerprint)
+        self.assertNotEqual(Polygon([(0, 0), (10, 0), (10, 6), (0, 6)]).fingerprint, fingerprint)
+
+    def test_shape_class(self):
+        """Test rectangle / convex / general classification"""
+        self.assertEqual(self.rectangle.shape_class, 'rectangle')
+        self.assertEqual(self.rectangle.reversed().shape_class, 'rectangle')
+        self.assertEqual(self.rectangle.rotate(30).shape_class, 'convex')
+        self.assertEqual(Polygon([(0, 0), (4, 0), (2, 3)]).shape_class, 'convex')
+        
+        # Collinear and repeated vertices do not make a shape concave
+        self.assertEqual(Polygon([(0, 0), (5, 0), (10, 0), (10, 5), (10, 5), (0, 5)]).shape_class, 'rectangle')
+        
+        self.assertEqual(Polygon([(0, 0), (6, 0), (6, 2), (2, 2), (2, 5), (0, 5)]).shape_class, 'general')
+        
+        # A pentagram turns the same way at every vertex but winds twice
+        star = [(np.cos(a), np.sin(a)) for a in np.arange(5) * 4 * np.pi / 5]
+        self.assertEqual(Polygon(star).shape_class, 'general')
+        self.assertEqual(Polygon([(0, 0), (1, 1)]).shape_class, 'general')
+        
+        # The class is carried over by translation
+        self.assertEqual(self.rectangle.translate(4, 4)._shape_class, 'rectangle')
+    
+    def test_geometry_utils_preserve_input_format(self):
+        """Test GeometryUtils returns the same polygon format it was given"""
+        self.assertIsInstance(GeometryUtils.translate_polygon(self.rectangle, 1, 1), Polygon)
+        self.assertIsInstance(GeometryUtils.translate_polygon(self.rectangle_points, 1, 1), list)
+
+        self.assertIsInstance(GeometryUtils.normalize_polygon(self.rectangle), Polygon)
+        self.assertIsInstance(GeometryUtils.normalize_polygon(self.rectangle_points), list)
+
+        self.assertIsInstance(GeometryUtils.polygon_offset(self.rectangle, 1), Polygon)
+        self.assertIsInstance(GeometryUtils.polygon_offset(self.rectangle_points, 1), list)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from nester.prefix_trie import PrefixTrie
+from nester.placement_worker import PlacementWorker
+from nester.nfp_cache import NFPCache
+from nester.polygon import Polygon
+
+
+class TestPrefixTrie(unittest.TestCase):
+    
+    def test_longest_prefix(self):
+        """Test lookup of the deepest stored snapshot along a sequence"""
+        trie = PrefixTrie()
+        sequence = [(0, 0), (1, 90), (2, 0), (3, 0)]
+        
+        self.assertEqual(trie.longest(sequence), (0, trie.root, None))
+        
+        node = trie.insert(trie.root, sequence[:2], 'two')
+        trie.insert(node, sequence[2:3], 'three')
+        
+        length, _, snapshot = trie.longest(sequence)
+        self.assertEqual((length, snapshot), (3, 'three'))
+        
+        # A sequence diverging after two steps resumes from the second snapshot
+        length, _, snapshot = trie.longest([(0, 0), (1, 90), (3, 0), (2, 0)])
+        self.assertEqual((length, snapshot), (2, 'two'))
+        
+        # Same parts with a different rotation share nothing
+        self.assertEqual(trie.longest([(0, 90), (1, 90)])[0], 0)
+        self.assertEqual((trie.hits, trie.misses), (2, 2))
+    
+    def test_eviction(self):
+        """Test that the least recently used snapshot is dropped and its branch pruned"""
+        trie = PrefixTrie(max_snapshots=2)
+        trie.insert(trie.root, [(0, 0)], 'a')
+        trie.insert(trie.root, [(1, 0), (2, 0)], 'b')
+        
+        # Touch 'a' so 'b' is the oldest
+        trie.longest([(0, 0)])
+        trie.insert(trie.root, [(3, 0)], 'c')
+        
+        self.assertEqual(len(trie), 2)
+        self.assertEqual(trie.longest([(1, 0), (2, 0)])[2], None)
+        self.assertNotIn((1, 0), trie.root.children)
+        self.assertEqual(trie.longest([(0, 0)])[2], 'a')
+
+
+class TestPrefixReuse(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.container = {'points': Polygon([(0, 0), (30, 0), (30, 12), (0, 12)])}
+        self.parts = [
+            {'id': i, 'points': Polygon([(0, 0), (w, 0), (w, h), (0, h)]), 'area': w * h}
+            for i, (w, h) in enumerate([(5, 4), (4, 4), (6, 3), (3, 3), (2, 5), (4, 2), (3, 2), (2, 2)])
+        ]
+    
+    def test_resumed_placement_matches_full_placement(self):
+        """Test that resuming from a snapshot gives the same result as placing from scratch"""
+        config = {'rotations': 4, 'prefix_checkpoint_interval': 2}
+        reference_config = dict(config, prefix_checkpoint_interval=0)
+        
+        worker = PlacementWorker(self.container, self.parts, NFPCache(config), config)
+        reference = PlacementWorker(self.container, self.parts, NFPCache(reference_config), reference_config)
+        
+        parent = {'placement': list(range(8)), 'rotation': [0, 90, 0, 0, 90, 0, 0, 0]}
+        child = {'placement': [0, 1, 2, 3, 4, 5, 7, 6], 'rotation': [0, 90, 0, 0, 90, 0, 0, 0]}
+        
+        self.assertEqual(worker.place_parts(parent), reference.place_parts(parent))
+        self.assertEqual(worker.resumed_parts, 0)
+        
+        self.assertEqual(worker.place_parts(child), reference.place_parts(child))
+        self.assertEqual(worker.resumed_parts, 6)
+        self.assertEqual(len(worker.placed_parts), len(reference.placed_parts))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+from nester.rotation_atlas import RotationAtlas
+from nester.genetic_algorithm import GeneticAlgorithm
+from nester.placement_worker import PlacementWorker
+from nester.nfp_cache import NFPCache
+
+
+class TestRotationAtlas(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.container = {
+            'points': [
+                {'x': 0, 'y': 0},
+                {'x': 20, 'y': 0},
+                {'x': 20, 'y': 8},
+                {'x': 0, 'y': 8}
+            ]
+        }
+
+        self.parts = [
+            # Fits only when lying flat
+            {
+                'id': 0,
+                'points': [
+                    {'x': 0, 'y': 0},
+                    {'x': 12, 'y': 0},
+                    {'x': 12, 'y': 3},
+                    {'x': 0, 'y': 3}
+                ],
+                'area': 36
+            },
+            # Fits at any right angle
+            {
+                'id': 1,
+                'points': [
+                    {'x': 0, 'y': 0},
+                    {'x': 4, 'y': 0},
+                    {'x': 4, 'y': 4},
+                    {'x': 0, 'y': 4}
+                ],
+                'area': 16
+            }
+        ]
+
+        self.config = {
+            'rotations': 4,
+            'population_size': 4,
+            'mutation_rate': 20,
+            'seed': 1
+        }
+
+    def test_entries(self):
+        """Test rotated geometry stored per part and angle"""
+        atlas = RotationAtlas(self.parts, self.container, 4)
+
+        self.assertEqual(atlas.angles, [0, 90, 180, 270])
+
+        entry = atlas.get(0, 90)
+        self.assertAlmostEqual(entry['bounds']['width'], 3)
+        self.assertAlmostEqual(entry['bounds']['height'], 12)
+        self.assertAlmostEqual(entry['area'], 36)
+        self.assertFalse(entry['fits'])
+
+        # Entries are built once and reused
+        self.assertIs(atlas.get(0, 90), entry)
+
+    def test_valid_angles(self):
+        """Test container fit filtering"""
+        atlas = RotationAtlas(self.parts, self.container, 4)
+
+        self.assertEqual(atlas.valid_angles(0), [0, 180])
+        self.assertEqual(atlas.valid_angles(1), [0, 90, 180, 270])
+
+    def test_unlisted_angle(self):
+        """Test that angles outside the configured set are added on demand"""
+        atlas = RotationAtlas(self.parts, self.container, 4)
+
+        entry = atlas.get(1, 45)
+        self.assertAlmostEqual(entry['bounds']['width'], 4 * 2 ** 0.5)
+        self.assertIs(atlas.get(1, 45), entry)
+
+    def test_no_rotation(self):
+        """Test that zero rotations leaves every part at its original angle"""
+        atlas = RotationAtlas(self.parts, self.container, 0)
+
+        self.assertEqual(atlas.angles, [0])
+        self.assertEqual(atlas.valid_angles(1), [0])
+
+    def test_shared_by_ga_and_worker(self):
+        """Test that the GA and the placement worker read from the same atlas"""
+        atlas = RotationAtlas(self.parts, self.container, self.config['rotations'])
+        ga = GeneticAlgorithm(self.parts, self.container, self.config, atlas)
+        worker = PlacementWorker(self.container, self.parts, NFPCache(self.config), self.config, atlas)
+
+        self.assertIs(ga.atlas, atlas)
+        self.assertIs(worker.atlas, atlas)
+
+        # Mutation moves rotations along with their parts, so every angle stays valid
+        lineage = list(ga.population)
+        for _ in range(50):
+            lineage.append(ga._mutate(lineage[-1]))
+        for individual in lineage:
+            for part_index, rotation in zip(individual['placement'], individual['rotation']):
+                self.assertIn(rotation, atlas.valid_angles(part_index))
+
+
+if __name__ == '__main__':
+    unittest.main()
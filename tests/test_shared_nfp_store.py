@@ -0,0 +1,111 @@
+import unittest
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from nester.nfp_cache import NFPCache
+from nester.nfp_calculator import NFPCalculator
+from nester import shared_nfp_store
+from nester.polygon import Polygon
+from nester.shared_nfp_store import SharedNFPStore
+
+
+def _read_in_process(store, key):
+    """Process pool task: read an NFP from a store attached by name"""
+    nfp = store.get(key)
+    return [polygon.coords.tolist() for polygon in nfp], len(store)
+
+
+class TestSharedNFPStore(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.square = Polygon([(0, 0), (4, 0), (4, 4), (0, 4)])
+        self.triangle = Polygon([(0, 0), (3, 0), (1.5, 2)])
+        self.store = SharedNFPStore()
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_round_trip(self):
+        """Test adding NFPs and reading them back"""
+        self.assertEqual(self.store.add([('a', [self.square, self.triangle]), ('b', [self.triangle]), ('c', [])]), 3)
+
+        nfp = self.store.get('a')
+        self.assertEqual(len(nfp), 2)
+        self.assertEqual(nfp[0].to_points(), self.square.to_points())
+        self.assertEqual(nfp[1].to_points(), self.triangle.to_points())
+        self.assertEqual(len(self.store.get('c')), 0)
+        self.assertIsNone(self.store.get('missing'))
+
+        # Keys already stored are skipped
+        self.assertEqual(self.store.add([('a', [self.triangle]), ('d', [self.square])]), 1)
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual(len(self.store.get('a')), 2)
+
+    def test_close_with_nfps_in_use(self):
+        """Test that closing while NFPs still view the memory defers detaching to a later close"""
+        self.store.add([('a', [self.square])])
+        reader = pickle.loads(pickle.dumps(self.store))
+        nfp = reader.get('a')
+
+        reader.close()
+        # The segment the NFP views stays mapped, the manifest is detached
+        self.assertEqual(len(shared_nfp_store._unreleased), 1)
+        self.assertEqual(nfp[0].to_points(), self.square.to_points())
+
+        del nfp
+        SharedNFPStore().close()
+        self.assertEqual(shared_nfp_store._unreleased, [])
+
+    def test_readers_attach_by_name(self):
+        """Test that a pickled store reads the owner's memory, including later segments"""
+        self.store.add([('a', [self.square])])
+        reader = pickle.loads(pickle.dumps(self.store))
+        self.assertLess(len(pickle.dumps(self.store)), 200)
+
+        nfp = reader.get('a')
+        self.assertEqual(nfp[0].to_points(), self.square.to_points())
+        # Zero-copy and read-only
+        self.assertFalse(nfp.vertices.flags.writeable)
+
+        self.store.add([('b', [self.triangle])])
+        self.assertEqual(reader.get('b')[0].to_points(), self.triangle.to_points())
+
+        with self.assertRaises(RuntimeError):
+            reader.add([('c', [self.square])])
+        reader.close()
+
+    def test_worker_processes(self):
+        """Test reading from worker processes"""
+        self.store.add([('a', [self.square])])
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(_read_in_process, [self.store] * 2, ['a'] * 2))
+        for coords, count in results:
+            self.assertEqual(coords, [self.square.coords.tolist()])
+            self.assertEqual(count, 1)
+
+    def test_shared_cache(self):
+        """Test that a pickled cache reads shared entries instead of carrying them"""
+        cache = NFPCache()
+        cache.get(self.square, self.triangle, False)
+        cache.get(self.triangle, self.square, False)
+        self.assertEqual(cache.share(), 2)
+        self.assertEqual(cache.share(), 0)
+
+        worker_cache = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(len(worker_cache), 0)
+        misses = worker_cache.misses
+
+        nfp = worker_cache.get(self.square.translate(5, 5), self.triangle, False)
+        expected = NFPCalculator.calculate_nfp(self.square.translate(5, 5), self.triangle)
+        self.assertEqual(nfp[0].bbox, expected[0].bbox)
+        self.assertEqual(worker_cache.hits, 1)
+        self.assertEqual(worker_cache.misses, misses)
+        self.assertEqual(cache.get_statistics()['shared_entries'], 2)
+
+        worker_cache.shared.close()
+        cache.unshare()
+        self.assertIsNone(cache.shared)
+
+
+if __name__ == '__main__':
+    unittest.main()